@@ -40,20 +40,32 @@ bl_info = {
 if "bpy" in locals():
     from importlib import reload as _r
     _r(props)
+    _r(log_graph)
     _r(ops_main)
     _r(ops_extra)
     _r(ui)
+    _r(thumbnail_store)
+    _r(blend_preview)
     _r(image_util)
+    _r(backend_odb)
     _r(backend_git)
+    _r(metrics)
+    _r(watcher)
     _r(common)
 else:
     from . import (
         props,
+        log_graph,
         ops_main,
         ops_extra,
         ui,
+        thumbnail_store,
+        blend_preview,
         image_util,
+        backend_odb,
         backend_git,
+        metrics,
+        watcher,
         common
         )
 
@@ -132,18 +144,28 @@ class BlendGitPreferences(bpy.types.AddonPreferences):
         )
 
     def update_execpath(self, context):
-        git = backend_git.Git(context)
+        git = backend_git.Git.get(context)
         gcon = common.get_git_context(context)
-        if git.operative:
-            gcon.version = list(git.command(["version"]))[0]
-        else:
-            gcon.version = ""
+        gcon.version = git.version_string
 
     git_execpath: StringProperty(
         subtype='FILE_PATH',
         update=update_execpath
         )
 
+    use_object_database: BoolProperty(
+        name="Read Objects In-Process",
+        description="Read commits, trees and refs from .git directly instead of running git. "
+                    "Falls back to git for objects it can not read",
+        default=True
+        )
+    use_watcher: BoolProperty(
+        name="Watch Worktree",
+        description="Track changed files with inotify (Linux) so reloads and git status skip unchanged paths. "
+                    "Full scans are used when the watch limit is exceeded",
+        default=True
+        )
+
     log_commands: CollectionProperty(type=CommandShortcut)
     log_command: EnumProperty(
         items=lambda s,c: [(cmd.command, cmd.name, "") for  cmd in s.log_commands],
@@ -163,9 +185,66 @@ class BlendGitPreferences(bpy.types.AddonPreferences):
             ],
         default='none'
         )
+    thumbnail_memory: IntProperty(
+        name="Thumbnail Memory",
+        description="Megabytes of thumbnail previews kept, least recently shown are released beyond",
+        min=4, max=1024,
+        default=64
+        )
+    thumbnail_store: EnumProperty(
+        name="Thumbnail Store",
+        items=[
+            ('DATABASE', "Database", "SQLite database in .git, kept in this clone"),
+            ('NOTES', "Git Notes", "Git objects noted on commits (refs/notes/blendgit-thumbnails), "
+                                   "shared by pushing refs/notes/*"),
+            ],
+        default='DATABASE'
+        )
+    extract_previews: BoolProperty(
+        name="Previews of History",
+        description="Thumbnails of commits from previews saved in the .blend files they changed",
+        default=True
+        )
+    preview_workers: IntProperty(
+        name="Preview Workers",
+        description="Threads reading previews of .blend files from the repository",
+        min=1, max=16,
+        default=4
+        )
+    render_workers: IntProperty(
+        name="Render Workers",
+        description="Blender processes rendering thumbnails of history at once",
+        min=1, max=8,
+        default=2
+        )
+    render_engine: EnumProperty(
+        name="Render Engine",
+        items=[
+            ('WORKBENCH', "Workbench", "Solid shading, fast"),
+            ('EEVEE', "EEVEE", "Materials and lights of the file"),
+            ],
+        default='WORKBENCH'
+        )
     show_panel_topbar: BoolProperty(default=True, name="Topbar Panel Popup Button")
     show_command_topbar: BoolProperty(default=True, name="Topbar Command Popup Button")
     show_v3d_panels: BoolProperty(default=True, name="3D View Panels")
+    show_metrics_panel: BoolProperty(default=False, name="Metrics Panel")
+
+    def set_trace(self, value):
+        if value:
+            metrics.tracer.start()
+        elif metrics.tracer.enabled:
+            metrics.tracer.stop()
+            if metrics.tracer.events:
+                bpy.ops.git.trace_write()
+
+    # not saved: tracing lives only in this session
+    record_trace: BoolProperty(
+        name="Record Trace",
+        description="Record git calls, reloads and panel drawing. Trace is written into .git when turned off",
+        get=lambda s: metrics.tracer.enabled,
+        set=set_trace
+        )
 
     # shortcuts
     shortcuts: CollectionProperty(type=CommandShortcut)
@@ -187,6 +266,9 @@ class BlendGitPreferences(bpy.types.AddonPreferences):
         if tab == 'path':
             layout.prop(self, "git_execpath", text="git.exe")
             layout.prop(self, "archive_dir")
+            layout.prop(self, "use_object_database")
+            layout.prop(self, "use_watcher")
+
 
         elif tab == 'log':
             layout.label(text="Log Commands")
@@ -236,12 +318,22 @@ class BlendGitPreferences(bpy.types.AddonPreferences):
             layout.prop(self, 'show_panel_topbar')
             layout.prop(self, 'show_command_topbar')
             layout.prop(self, 'show_v3d_panels')
+            layout.prop(self, 'show_metrics_panel')
+            row = layout.row()
+            row.prop(self, 'record_trace')
+            row.operator("git.trace_write", text="", icon='EXPORT')
 
             layout.separator()
 
             layout.label(text="Popup", icon='WINDOW')
             layout.prop(self, 'popup_width', slider=True)
             layout.prop(self, 'thumbnail_extension', text="Thumbnail Extention", expand=True)
+            layout.prop(self, 'thumbnail_memory')
+            layout.prop(self, 'thumbnail_store', expand=True)
+            layout.prop(self, 'extract_previews')
+            layout.prop(self, 'preview_workers')
+            layout.prop(self, 'render_workers')
+            layout.prop(self, 'render_engine', expand=True)
 
         elif tab == 'link':
             grid = layout.grid_flow(even_columns=True)
@@ -277,15 +369,6 @@ def file_handler(dummy):
     bpy.ops.git.reload('INVOKE_DEFAULT')
 
 
-@handlers.persistent
-def data_handler(dummy):
-    for lib in (bpy.data.textures, bpy.data.images):
-        for data in lib:
-            dot, *hs = data.name
-            if dot=="." and common.extract_hash(hs):
-                data.user_clear()
-
-
 _draw_right = None
 
 def draw_right(self, context):
@@ -310,8 +393,6 @@ def register():
 
     props.register()
 
-    handlers.save_pre.append(data_handler)
-
     handlers.load_post.append(file_handler)
     handlers.save_post.append(file_handler)
 
@@ -326,16 +407,20 @@ def unregister():
     handlers.save_post.remove(file_handler)
     handlers.load_post.remove(file_handler)
 
-    handlers.save_pre.remove(data_handler)
-
     props.unregister()
 
     from bpy.utils import unregister_class
     for cls in reversed(classes):
         unregister_class(cls)
 
+    blend_preview.unregister()
     image_util.unregister()
 
+    ops_main.reloader.stop()
+    log_graph.unregister()
+    backend_git.shutdown()
+    watcher.shutdown()
+
 
 if __name__ == "__main__":
     register()
\ No newline at end of file
@@ -4,8 +4,21 @@ import platform
 
 import sys
 import re
+import threading
+import time
+import hashlib
+import tempfile
+import codecs
+import itertools
+import zlib
 
 from typing import Union, Generator
+from functools import partial
+
+from .metrics import metrics, tracer, subcommand_of
+from . import backend_odb
+from .backend_odb import ObjectReader
+from collections import namedtuple, OrderedDict
 
 
 
@@ -15,6 +28,493 @@ PTN_WORD = rf"([-\w\.=:]+({PTN_QUOTED})*)"
 unquote = lambda w: re.sub(PTN_QUOTED, r"\1" or r"\2", w)
 
 
+# `status --porcelain=v2` entry
+# xy: "XY" code ("." for unmodified), mode: worktree mode, oids: (HEAD, index)
+StatusRecord = namedtuple('StatusRecord', ('xy', 'path', 'orig_path', 'mode', 'oids'))
+
+
+def parse_status_v2(data: bytes) -> '(branch: dict, records: [StatusRecord, ...])':
+    '''
+    Parse output of `status --porcelain=v2 -z [--branch] [--ignored]`.
+    Whole output is decoded once, entries are split by NUL.
+    '''
+    branch = {}
+    records = []
+    append = records.append
+
+    entries = data.decode('utf-8', 'surrogateescape').split('\0')
+    it = iter(entries)
+    for entry in it:
+        kind = entry[:1]
+        if kind == '1':
+            # 1 XY sub mH mI mW hH hI path
+            _, xy, _, _, _, mW, hH, hI, path = entry.split(' ', 8)
+            append(StatusRecord(xy, path, "", mW, (hH, hI)))
+        elif kind == '2':
+            # 2 XY sub mH mI mW hH hI Xscore path \0 origPath
+            _, xy, _, _, _, mW, hH, hI, _, path = entry.split(' ', 9)
+            append(StatusRecord(xy, path, next(it, ""), mW, (hH, hI)))
+        elif kind == 'u':
+            # u XY sub m1 m2 m3 mW h1 h2 h3 path
+            _, xy, _, _, _, _, mW, h1, h2, _, path = entry.split(' ', 10)
+            append(StatusRecord(xy, path, "", mW, (h1, h2)))
+        elif kind == '?':
+            append(StatusRecord("??", entry[2:], "", "", ()))
+        elif kind == '!':
+            append(StatusRecord("!!", entry[2:], "", "", ()))
+        elif kind == '#':
+            # "# branch.oid <commit>", "# branch.head <name>", ...
+            _, key, value = entry.split(' ', 2)
+            branch[key] = value
+    return branch, records
+
+
+def parse_status_v1(data: bytes) -> '(branch: dict, records: [StatusRecord, ...])':
+    '''
+    Fallback for git without porcelain v2: `status --porcelain -z`.
+    '''
+    records = []
+    it = iter(data.decode('utf-8', 'surrogateescape').split('\0'))
+    for entry in it:
+        if len(entry) < 4:
+            continue
+        xy = entry[:2].replace(' ', '.')
+        orig = next(it, "") if xy[0] in "RC" else ""
+        records.append(StatusRecord(xy, entry[3:], orig, "", ()))
+    return {}, records
+
+
+# `log` entry of Git.log
+# graph: graph columns of the commit line, then lines below it ("\n" separated)
+# hash / parents: full, abbrev: as --oneline shows, date: as --date (short by default)
+LogRecord = namedtuple('LogRecord', ('graph', 'hash', 'abbrev', 'parents', 'author', 'date', 'refs', 'subject'))
+
+# %x1e starts a commit (graph columns are put before it), %x1f separates fields
+LOG_FORMAT = "%x1e%H%x1f%h%x1f%P%x1f%an%x1f%ad%x1f%D%x1f%s"
+
+# options of a log command replaced by LOG_FORMAT
+LOG_FORMAT_OPTIONS = ("--oneline", "--pretty", "--format", "--decorate", "--color")
+
+# refs of `--all` but notes: commits of notes refs (NotesStore thumbnails) are not history
+NOTES_GLOB = "refs/notes/*"
+ALL_REFS = (f"--exclude={NOTES_GLOB}", "--all")
+
+
+def iter_log(records) -> Generator[LogRecord, None, None]:
+    '''
+    Parse output of `log --format=LOG_FORMAT` split on "\x1e", as records come.
+    A record is the fields of a commit, the lines below it (graph, --stat, ...),
+    and the graph columns of the next commit.
+    '''
+    records = iter(records)
+    # columns of the first commit
+    graph = next(records, "")
+    for record in records:
+        fields, _, rest = record.partition("\n")
+        *below, next_graph = rest.split("\n")
+        sha, abbrev, parents, author, date, refs, subject = fields.split("\x1f", 6)
+        if below:
+            graph = "\n".join([graph, *(line for line in below if line.strip())])
+        yield LogRecord(graph, sha, abbrev, parents.split(), author, date, refs, subject)
+        graph = next_graph
+
+
+def parse_log(records) -> '[LogRecord, ...]':
+    return list(iter_log(records))
+
+
+def parse_nul_list(data: bytes) -> '[str, ...]':
+    # `ls-files -z` etc.
+    return data.decode('utf-8', 'surrogateescape').split('\0')[:-1]
+
+
+def split_records(chunks, sep="\n") -> Generator[list, None, None]:
+    '''
+    Records of byte chunks split on sep ("\n" or "\0"), one list per chunk.
+    Decoded incrementally: a character may span chunks, undecodable bytes
+    are kept as surrogates.
+    '''
+    decoder = codecs.getincrementaldecoder('utf-8')('surrogateescape')
+    pending = ""
+    for chunk in chunks:
+        *records, pending = (pending + decoder.decode(chunk)).split(sep)
+        if records:
+            yield records
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield [pending]
+
+
+class Records(list):
+    '''
+    Output of Git.records: stdout records, with stderr and returncode.
+    '''
+    stderr = ""
+    returncode = None
+
+    def copy(self) -> 'Records':
+        other = Records(self)
+        other.stderr = self.stderr
+        other.returncode = self.returncode
+        return other
+
+
+def literal_pathspecs(paths) -> '["--", ":(literal)<path>", ...]':
+    return ["--", *(":(literal)" + p for p in paths)]
+
+
+def find_gitdir(dirpath) -> 'str: absolute .git directory | ""':
+    dirpath = os.path.abspath(dirpath or os.curdir)
+    while True:
+        dotgit = os.path.join(dirpath, ".git")
+        if os.path.isdir(dotgit):
+            return dotgit
+        if os.path.isfile(dotgit):
+            # worktree / submodule: "gitdir: <path>"
+            with open(dotgit, "r") as f:
+                line = f.readline().strip()
+            if line.startswith("gitdir:"):
+                return os.path.normpath(os.path.join(dirpath, line[7:].strip()))
+        parent = os.path.dirname(dirpath)
+        if parent == dirpath:
+            return ""
+        dirpath = parent
+
+
+# results of read-only commands, valid while repository fingerprint is same
+class ResultCache:
+    # files in gitdir whose stat changes on every ref / index update
+    FINGERPRINT_FILES = (
+        "HEAD",
+        "index",
+        "packed-refs",
+        os.path.join("logs", "HEAD"),
+        os.path.join("logs", "refs", "stash"),
+        )
+
+    # subcommands never writing repository, and not reading the worktree:
+    # status / diff / blame of files change without the fingerprint changing
+    READONLY = {
+        "log", "show", "ls-tree", "rev-parse", "rev-list",
+        "cat-file", "describe", "shortlog", "version",
+        }
+    # ls-files options listing the index only (-o, -m, -d, ... read the worktree)
+    LS_FILES_INDEX = {"-c", "--cached", "-s", "--stage", "-z", "--full-name", "--"}
+    # subcommands read-only with these first arguments (or only options for "branch")
+    READONLY_ACTIONS = {
+        "stash":    {"list", "show"},
+        "remote":   {"show", "-v"},
+        "notes":    {"list", "show"},
+        "config":   {"--get", "--get-all", "--list", "-l"},
+        }
+
+    # subcommands reading the worktree: never cached, but not writing repository either
+    WORKTREE_READERS = {"status", "diff", "blame", "ls-files", "check-ignore", "grep"}
+
+    # max entries
+    size = 64
+
+    def __init__(self, gitdir):
+        self.gitdir = gitdir
+
+        self.hits = 0
+        self.misses = 0
+
+        self.__lock = threading.Lock()
+        # {(mode, *args): (fingerprint, result)}
+        self.__entries = OrderedDict()
+
+    @classmethod
+    def is_cacheable(cls, args) -> bool:
+        # global options before subcommand (-c key=value, ...)
+        while args and args[0].startswith("-"):
+            args = args[2:] if args[0] in ("-c", "-C", "--git-dir", "--work-tree") else args[1:]
+        if not args:
+            return False
+        sub, *rest = args
+        if sub in cls.READONLY:
+            return True
+        if sub == "branch":
+            # listing only: `branch [-a | -r | -v | --list ...]`
+            return all(a.startswith("-") and a not in {
+                "-d", "-D", "-m", "-M", "-c", "-C", "-f", "--delete", "--move", "--copy",
+                "--set-upstream-to", "-u", "--unset-upstream", "--edit-description"
+                } for a in rest)
+        if sub == "ls-files":
+            return all(a in cls.LS_FILES_INDEX or not a.startswith("-") for a in rest)
+        actions = cls.READONLY_ACTIONS.get(sub)
+        return bool(actions and rest and rest[0] in actions)
+
+    @classmethod
+    def is_mutating(cls, args) -> bool:
+        return not cls.is_cacheable(args) and subcommand_of(args) not in cls.WORKTREE_READERS
+
+    def fingerprint(self) -> tuple:
+        stats = []
+        for name in self.FINGERPRINT_FILES:
+            try:
+                st = os.stat(os.path.join(self.gitdir, name))
+                stats.append((st.st_mtime_ns, st.st_size, st.st_ino))
+            except OSError:
+                stats.append(None)
+        # ref updates rename lock files: directory mtime changes
+        for dirpath, _, _ in os.walk(os.path.join(self.gitdir, "refs")):
+            stats.append(os.stat(dirpath).st_mtime_ns)
+        return tuple(stats)
+
+    def get(self, key) -> 'result | None':
+        fp = self.fingerprint()
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry and entry[0] == fp:
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key, fingerprint, result):
+        with self.__lock:
+            self.__entries[key] = (fingerprint, result)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.size:
+                self.__entries.popitem(last=False)
+
+    def invalidate(self):
+        with self.__lock:
+            self.__entries.clear()
+
+    def reset_stats(self):
+        self.hits = self.misses = 0
+
+
+def sizeof(obj) -> 'int: approximate bytes of nested containers':
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(sizeof(k) + sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(sizeof(v) for v in obj)
+    return size
+
+
+# LRU of commit-addressed results (never invalidated: objects are immutable)
+class ObjectCache:
+    def __init__(self, max_entries=1024, max_bytes=64 << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        self.__lock = threading.Lock()
+        # {key: (value, size)}
+        self.__entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, key, factory) -> 'value':
+        '''
+        Cached value of key, or factory() stored under key.
+        None from factory is not cached.
+        '''
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = factory()
+        if value is not None:
+            self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        size = sizeof(value)
+        with self.__lock:
+            old = self.__entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self.__entries[key] = (value, size)
+            self.nbytes += size
+            while self.__entries and (
+                len(self.__entries) > self.max_entries or self.nbytes > self.max_bytes
+                ):
+                _, (_, s) = self.__entries.popitem(last=False)
+                self.nbytes -= s
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.nbytes = 0
+
+
+objects = ObjectCache()
+
+
+# long-lived `git cat-file --batch` / `--batch-check` worker
+class CatFile(ObjectReader):
+    # chunk size of streaming copy
+    BUFSIZE = 1 << 20
+
+    def __init__(self, git_execpath, rootdir):
+        self.git_execpath = git_execpath
+        self.rootdir = rootdir
+
+        self.__lock = threading.RLock()
+        # {option: Popen}
+        self.__procs = {}
+
+    def __spawn(self, option):
+        return subprocess.Popen(
+            [self.git_execpath, "cat-file", option],
+            stdin = subprocess.PIPE,
+            stdout = subprocess.PIPE,
+            stderr = subprocess.DEVNULL,
+            cwd = self.rootdir
+            )
+
+    def __process(self, option) -> 'Popen: running worker (restarted if dead)':
+        p = self.__procs.get(option)
+        if p is None or p.poll() is not None:
+            p = self.__procs[option] = self.__spawn(option)
+            metrics.record_command("cat-file " + option + " (start)", metrics.origin, 0.0, 0, 0)
+        return p
+
+    def __kill(self, option):
+        p = self.__procs.pop(option, None)
+        if p is not None:
+            for f in (p.stdin, p.stdout):
+                try:
+                    f.close()
+                except OSError:
+                    pass
+            if p.poll() is None:
+                p.kill()
+            p.wait()
+
+    def __request(self, option, rev):
+        # -> (stdout, header: [sha, type, size] | None)
+        p = self.__process(option)
+        p.stdin.write(rev.encode('utf-8') + b"\n")
+        p.stdin.flush()
+
+        header = p.stdout.readline()
+        if not header:
+            raise BrokenPipeError(f"git cat-file {option} exited")
+
+        fields = header.split()
+        # "<rev> missing" / "<rev> ambiguous"
+        if len(fields) != 3:
+            return p.stdout, None
+        sha, typ, size = fields
+        return p.stdout, [sha.decode(), typ.decode(), int(size)]
+
+    def __call(self, option, rev, read_body):
+        with self.__lock, metrics.command("cat-file " + option, spawned=False) as m:
+            m[1] = 1
+            # retry once with fresh worker when the pipe is broken
+            for retry in (False, True):
+                try:
+                    stdout, header = self.__request(option, rev)
+                    m[1] = 0 if header else 1
+                    if header is None or not read_body:
+                        return header, None
+                    body = stdout.read(header[2])
+                    stdout.read(1)  # trailing LF
+                    if len(body) != header[2]:
+                        raise BrokenPipeError(f"git cat-file {option} truncated")
+                    m[0] = len(body)
+                    return header, body
+                except (OSError, ValueError):
+                    self.__kill(option)
+                    if retry:
+                        raise
+
+    def copy(self, rev, fileobj, progress=None) -> '(sha, type, size) | None':
+        '''
+        Stream object into fileobj with fixed sized buffer.
+        Object id is re-hashed while streaming, mismatch raises ValueError.
+        progress(written: int, size: int) is called per chunk.
+        '''
+        with self.__lock, metrics.command("cat-file --batch", spawned=False) as m:
+            m[1] = 1
+            for retry in (False, True):
+                try:
+                    stdout, header = self.__request("--batch", rev)
+                    break
+                except OSError:
+                    self.__kill("--batch")
+                    if retry:
+                        raise
+            if header is None:
+                return None
+
+            sha, typ, size = header
+            m[0] = size
+            digest = hashlib.sha1() if len(sha) == 40 else hashlib.sha256()
+            digest.update(f"{typ} {size}\0".encode())
+            try:
+                written = 0
+                while written < size:
+                    chunk = stdout.read(min(self.BUFSIZE, size - written))
+                    if not chunk:
+                        raise ValueError(f"truncated object {sha}: {written}/{size} bytes")
+                    digest.update(chunk)
+                    fileobj.write(chunk)
+                    written += len(chunk)
+                    if progress:
+                        progress(written, size)
+                stdout.read(1)  # trailing LF
+            except BaseException:
+                # pipe is left in the middle of object
+                self.__kill("--batch")
+                raise
+
+            if digest.hexdigest() != sha:
+                raise ValueError(f"object hash mismatch: {sha}")
+            m[1] = 0
+            return sha, typ, size
+
+    def info(self, rev) -> '(sha, type, size) | None':
+        header, _ = self.__call("--batch-check", rev, False)
+        return tuple(header) if header else None
+
+    def read(self, rev) -> '(sha, type, data: bytes) | None':
+        header, body = self.__call("--batch", rev, True)
+        return (header[0], header[1], body) if header else None
+
+    def close(self):
+        with self.__lock:
+            for option in list(self.__procs):
+                self.__kill(option)
+
+
+# {(git_execpath, rootdir): CatFile}
+_catfiles = {}
+_catfiles_lock = threading.Lock()
+
+
+def get_catfile(git_execpath, rootdir) -> CatFile:
+    key = (git_execpath, os.path.normcase(os.path.abspath(rootdir)))
+    with _catfiles_lock:
+        worker = _catfiles.get(key)
+        if worker is None:
+            worker = _catfiles[key] = CatFile(*key)
+        return worker
+
+
+def shutdown():
+    with _catfiles_lock:
+        for worker in _catfiles.values():
+            worker.close()
+        _catfiles.clear()
+    backend_odb.shutdown()
+
+
 #git command class
 class Git:
     PATH_GITIGNORE  = ".gitignore"
@@ -28,9 +528,70 @@ class Git:
     STATUS_STAGED       = 0b10000
 
 
-    def __init__(self, context):
+    # "XY" codes of merge conflicts
+    XY_UNMERGED = {
+        "DD",   # unmerged, both deleted
+        "AU",   # unmerged, added by us
+        "UD",   # unmerged, deleted by them
+        "UA",   # unmerged, added by them
+        "DU",   # unmerged, deleted by us
+        "AA",   # unmerged, both added
+        "UU"    # unmerged, both modified
+        }
+
+    @classmethod
+    def status_from_xy(cls, xy) -> 'int: STATUS_*':
+        X, Y = xy
+        if xy == "!!":  # ignored
+            return cls.STATUS_IGNORED
+        elif xy == "??":  # untracked
+            return cls.STATUS_UNTRACKED
+        elif xy in cls.XY_UNMERGED:  # merge conflicts
+            return cls.STATUS_UNMERGED
+        elif Y in "AMDRCT":  # not updated
+            return cls.STATUS_NOTSTAGED
+        elif X in "DMARCT":  # index and worktree matches
+            return cls.STATUS_STAGED
+        return cls.STATUS_UNMODIFIED
+
+    # Capabilities: {name: minimum version}
+    CAPABILITIES = {
+        'porcelain_v2':             (2, 11),  # status --porcelain=v2
+        'switch':                   (2, 23),
+        'restore':                  (2, 23),
+        'merge_tree_write_tree':    (2, 38),  # merge-tree --write-tree
+        }
+
+    # {(git_execpath, rootdir): Git}
+    __sessions = {}
+
+    @classmethod
+    def get(cls, context) -> 'Git':
+        '''
+        Cached session of current repository.
+        Recreated only when git_execpath or rootdir is changed.
+        '''
         prefs = context.preferences.addons[__package__].preferences
-        path = prefs.git_execpath
+        gcon = context.window_manager.git_context
+        key = (prefs.git_execpath, gcon.rootdir)
+
+        git = cls.__sessions.get(key)
+        if git is None:
+            # execpath changed: drop sessions of old executable
+            for k in [k for k in cls.__sessions if k[0] != key[0]]:
+                del cls.__sessions[k]
+            git = cls.__sessions[key] = cls(*key)
+        else:
+            # commands run in cwd: another session (or init) may have moved it
+            git.chdir(git.rootdir)
+            # rootdir was not a repository when the session was created
+            if git.rootdir and not git.cache.gitdir:
+                git.cache.gitdir = find_gitdir(git.rootdir)
+        git.use_odb = prefs.use_object_database
+        return git
+
+    def __init__(self, git_execpath="", rootdir=""):
+        path = git_execpath
 
         #try to use user supplied path first
         if path:
@@ -47,37 +608,153 @@ class Git:
 
         self.operative = os.path.isfile(self.git_execpath)
 
-        gcon = context.window_manager.git_context
-        self.chdir(gcon.rootdir)
+        self.rootdir = rootdir
+        self.chdir(rootdir)
+
+        self.__version_string = None
+
+        self.cache = ResultCache(find_gitdir(rootdir))
+
+
+    # Capability detection (once per session)
+
+    @property
+    def version_string(self) -> 'str: "git version x.y.z"':
+        if self.__version_string is None:
+            self.__version_string = "\n".join(self.command(["version"])) if self.operative else ""
+        return self.__version_string
+
+    @property
+    def version(self) -> 'tuple: (major, minor, patch)':
+        m = re.search(r"(\d+)\.(\d+)(?:\.(\d+))?", self.version_string)
+        return tuple(int(v or 0) for v in m.groups()) if m else (0, 0, 0)
+
+    def supports(self, capability) -> bool:
+        return self.version >= self.CAPABILITIES[capability]
+
 
+    # Object access over persistent cat-file worker
+
+    @property
+    def catfile(self) -> CatFile:
+        return get_catfile(self.git_execpath, self.rootdir or os.getcwd())
+
+    # read objects in-process (backend_odb) before cat-file
+    use_odb = True
+
+    @property
+    def odb(self) -> 'ObjectDatabase | None':
+        if not self.use_odb or not self.cache.gitdir:
+            return None
+        return backend_odb.get_database(self.cache.gitdir)
+
+    def query(self, kind, fn) -> 'fn(ObjectDatabase) | fn(CatFile)':
+        '''
+        fn(reader) with the in-process database, or with cat-file when
+        the object is not found there (alternates, promisor remotes) or
+        can not be read.
+        '''
+        odb = self.odb
+        if odb is not None:
+            with metrics.command("odb " + kind, spawned=False) as m:
+                try:
+                    result = fn(odb)
+                except (LookupError, ValueError, OSError, zlib.error):
+                    result = None
+                m[1] = 0 if result is not None else 1
+            if result is not None:
+                return result
+        return fn(self.catfile)
 
     # Update workdir file with specific version
     
     # def backup(self, filename, dirpath, commit_hash):
-    def backup(self, blobnr, filepath):
-        if blobnr!=None:
-            p = subprocess.Popen(
-                [self.git_execpath, "cat-file", "blob", blobnr],
-                stdout = subprocess.PIPE, 
-                stderr = subprocess.STDOUT
-                )
-            blob = p.stdout.read()
+    def backup(self, blobnr, filepath, progress=None) -> 'bool: Is extracted':
+        if blobnr is None or not self.operative:
+            return False
 
-            with open(filepath, "wb+") as tmp:
-                tmp.write(blob)
-        return
+        # stream into temp file next to filepath, then rename atomically
+        dirpath = os.path.dirname(os.path.abspath(filepath))
+        fd, tmppath = tempfile.mkstemp(prefix=".blendgit-", suffix=".part", dir=dirpath)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                header = self.catfile.copy(blobnr, tmp, progress)
+            if header is None or header[1] != "blob":
+                raise ValueError(f"not a blob: {blobnr}")
+            os.replace(tmppath, filepath)
+            return True
+        except (OSError, ValueError) as e:
+            print(e, file=sys.stderr)
+            if os.path.exists(tmppath):
+                os.remove(tmppath)
+            return False
     
-    def get_blobs(self, commit_hash):
-        blobs = {}
-        results = self.command(["ls-tree", "-r", commit_hash])
-        for l in results:
-            tab = l.split("\t")
-            name = tab[1]
-            _,blob,blobnr = tab[0].split(" ")
-            
-            if blob=="blob":
-                blobs[name] = blobnr
-        return blobs
+    # Commit-addressed queries (cached in `objects`)
+
+    PTN_HASH = re.compile(r"[0-9a-f]{4,64}")
+
+    def object_key(self, kind, rev) -> 'tuple | None':
+        # symbolic revs (HEAD, branches) move: not cachable
+        if not self.PTN_HASH.fullmatch(rev):
+            return None
+        # abbreviated hash is unique only in its repository
+        if len(rev) in (40, 64):
+            return (kind, rev)
+        return (kind, self.cache.gitdir, rev)
+
+    def cached(self, kind, rev, factory):
+        if not self.operative or not rev:
+            return None
+        key = self.object_key(kind, rev)
+        return objects.get(key, factory) if key else factory()
+
+    def commit_info(self, commit_hash) -> '(headers: dict, message: str) | None':
+        def read(reader):
+            headers, message = reader.commit(commit_hash)
+            return (headers, message) if headers else None
+        return self.cached('commit', commit_hash, lambda: self.query('commit', read))
+
+    def parents(self, commit_hash) -> '[parent_hash, ...]':
+        info = self.commit_info(commit_hash)
+        return info[0].get("parent", []) if info else []
+
+    def get_blobs(self, commit_hash) -> '{path: blob_hash}':
+        def factory():
+            info = self.commit_info(commit_hash)
+            if not info:
+                return None
+            tree = info[0]["tree"][0]
+            return self.query('tree', lambda reader: dict(reader.walk_blobs(tree)))
+        return self.cached('blobs', commit_hash, factory) or {}
+
+    def tree_names(self, commit_hash) -> '[path, ...]':
+        def factory():
+            blobs = self.get_blobs(commit_hash)
+            return sorted(blobs) if blobs else None
+        return self.cached('names', commit_hash, factory) or []
+
+    def blob_size(self, blob_hash) -> 'int | None':
+        def factory():
+            info = self.query('info', lambda reader: reader.info(blob_hash))
+            return info[2] if info else None
+        return self.cached('size', blob_hash, factory)
+
+    def walk(self, revs, max_count=None) -> '[commit_hash, ...] newest first':
+        '''
+        Commits reachable from revs (hashes, refs or ALL_REFS) as `rev-list` lists them.
+        '''
+        odb = self.odb
+        if odb is not None:
+            with metrics.command("odb walk", spawned=False) as m:
+                try:
+                    commits = [sha for sha, _ in odb.walk(revs, max_count)]
+                    m[0] = len(commits)
+                    return commits
+                except (LookupError, ValueError, OSError, zlib.error):
+                    m[1] = 1
+        cmd = ["rev-list", *([f"--max-count={max_count}"] if max_count else []), *revs]
+        results = self.records(cmd)
+        return list(results) if results.returncode == 0 else []
 
 
     # Miscellaneous
@@ -85,9 +762,14 @@ class Git:
     def write_ignore(self, statement: str):
         with open(self.PATH_GITIGNORE, "a+") as f:
             f.write(statement+"\n")
+        # status depends on .gitignore, not on repository fingerprint
+        self.invalidate()
 
 
     def clean_ignore(self):
+        if not os.path.isfile(self.PATH_GITIGNORE):
+            return
+
         ignore_dict = {}
         with open(self.PATH_GITIGNORE, "r") as f:
             # fromkeys : remove overwrapping
@@ -134,11 +816,7 @@ class Git:
     # generic Git command with [textual feedback]
     # => for interactive, get result as generator
           
-    def command(self, cmd: Union[str, list, tuple]) -> Generator[str, None, bytes]:
-        
-        if not self.operative:
-            return None
-        
+    def parse_args(self, cmd: Union[str, list, tuple]) -> 'args: list | None':
         args = [self.git_execpath]
 
         if type(cmd) is str:
@@ -151,26 +829,314 @@ class Git:
             return None
 
         # remove quote-character overwrapping
-        args = list(map(unquote, args))
-        # print(args)
+        return list(map(unquote, args))
 
-        p = subprocess.Popen(
-            args,
-            stdout = subprocess.PIPE, 
-            stderr = subprocess.STDOUT
-            )
+    def spawn(self, cmd: Union[str, list, tuple], **kwargs) -> 'Popen | None':
+        if not self.operative:
+            return None
+
+        args = self.parse_args(cmd)
+        if args is None:
+            return None
 
+        # writing command: cached results are stale, packs may be rewritten
+        if self.cache.is_mutating(args[1:]):
+            self.invalidate()
+
+        kwargs.setdefault('stdout', subprocess.PIPE)
+        kwargs.setdefault('stderr', subprocess.STDOUT)
+        return subprocess.Popen(args, **kwargs)
+
+    def cache_key(self, mode, cmd) -> 'tuple | None: key if cachable':
+        if not self.operative or not self.cache.gitdir:
+            return None
+        args = self.parse_args(cmd)
+        if args is None or not self.cache.is_cacheable(args[1:]):
+            return None
+        return (mode, *args[1:])
+
+    def invalidate(self):
+        self.cache.invalidate()
+        if self.use_odb and self.cache.gitdir:
+            self.odb.refresh()
+
+    def record_hit(self, key, nbytes):
+        # key: (mode, *args)
+        sub = subcommand_of(key[1:])
+        metrics.record_command(sub + " (cached)", metrics.origin, 0.0, nbytes, 0, spawned=False)
+
+    def start(self, cmd: Union[str, list, tuple]) -> 'Job | None':
+        p = self.spawn(cmd, stdin=subprocess.DEVNULL)
+        return Job(p) if p else None
+
+    def output(self, cmd: Union[str, list, tuple]) -> bytes:
+        # raw stdout, stderr is discarded
+        key = self.cache_key('bytes', cmd)
+        if key:
+            data = self.cache.get(key)
+            if data is not None:
+                self.record_hit(key, len(data))
+                return data
+            fingerprint = self.cache.fingerprint()
+
+        p = self.spawn(cmd, stderr=subprocess.DEVNULL)
+        if p is None:
+            return b""
+        with metrics.command(subcommand_of(p.args[1:])) as m:
+            data, _ = p.communicate()
+            m[:] = len(data), p.returncode
+
+        if key:
+            self.cache.put(key, fingerprint, data)
+        return data
+
+    def __read(self, cmd, sep, stderr, result: Records) -> Generator[list, None, None]:
+        '''
+        Lists of records read from stdout in chunks.
+        stderr: subprocess.STDOUT to merge, or PIPE to keep it in result.stderr.
+        returncode is set into result when stdout is exhausted.
+        '''
+        p = self.spawn(cmd, stderr=stderr)
+        if p is None:
+            return
+
+        # drain stderr beside stdout: a full pipe would block git
+        errors = []
+        if p.stderr:
+            reader = threading.Thread(target=lambda: errors.append(p.stderr.read()), daemon=True)
+            reader.start()
+
+        with metrics.command(subcommand_of(p.args[1:])) as m:
+            def chunks():
+                for chunk in iter(partial(p.stdout.read1, CatFile.BUFSIZE), b""):
+                    m[0] += len(chunk)
+                    yield chunk
+            exhausted = False
+            try:
+                yield from split_records(chunks(), sep)
+                exhausted = True
+            finally:
+                # consumer stopped early
+                if not exhausted and p.poll() is None:
+                    p.kill()
+                p.stdout.close()
+                m[1] = result.returncode = p.wait()
+                if p.stderr:
+                    reader.join()
+                    p.stderr.close()
+                    result.stderr = b"".join(errors).decode('utf-8', 'surrogateescape')
+
+    def records(self, cmd: Union[str, list, tuple], sep="\n") -> Records:
+        '''
+        All records of stdout split on sep, read and decoded in bulk.
+        stderr is kept apart in Records.stderr.
+        '''
+        key = self.cache_key(('records', sep), cmd)
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.record_hit(key, sum(len(r) + 1 for r in cached))
+                return cached.copy()
+            fingerprint = self.cache.fingerprint()
+
+        result = Records()
+        for batch in self.__read(cmd, sep, subprocess.PIPE, result):
+            result.extend(batch)
+
+        if key:
+            self.cache.put(key, fingerprint, result.copy())
+        return result
+
+    def stream(self, cmd: Union[str, list, tuple], sep="\n") -> Generator[str, None, Records]:
+        '''
+        Records of stdout as they are read, for large or slow output.
+        Returns empty Records with stderr and returncode.
+        '''
+        result = Records()
+        for batch in self.__read(cmd, sep, subprocess.PIPE, result):
+            yield from batch
+        return result
+
+    def log_args(self, cmd: Union[str, list, tuple], graph_text=True) -> 'args: list | None':
+        # cmd with its format replaced by LOG_FORMAT, graph and filter options kept
+        # graph_text: False to order as --graph does without drawing it
+        args = self.parse_args(cmd)
+        if args is None or len(args) < 2:
+            return None
+        subcommand, *options = args[1:]
+        options = [o for o in options if not o.startswith(LOG_FORMAT_OPTIONS)]
+        # --all before paths lists notes commits too
+        end = options.index("--") if "--" in options else len(options)
+        options[:end] = [o for a in options[:end] for o in (ALL_REFS if a == "--all" else (a,))]
+        if not graph_text and "--graph" in options:
+            # --parents rewrites parents as --graph does: of a path-limited log,
+            # %P are the nearest listed commits
+            i = options.index("--graph")
+            options[i:i + 1] = ["--topo-order", "--parents"]
+        if not any(o.startswith("--date") for o in options):
+            # before "--": paths follow it
+            end = options.index("--") if "--" in options else len(options)
+            options.insert(end, "--date=short")
+        return [subcommand, f"--format={LOG_FORMAT}", "--no-color", *options]
+
+    def log(self, cmd: Union[str, list, tuple] = "log --graph --oneline --all") -> '[LogRecord, ...]':
+        '''
+        Commits of a log command with its format replaced by LOG_FORMAT.
+        Graph and filter options of cmd are kept.
+        '''
+        args = self.log_args(cmd)
+        return parse_log(self.records(args, sep="\x1e")) if args else []
+
+    def log_pages(self, cmd: Union[str, list, tuple], size=200, graph_text=True) -> 'LogPager':
+        '''
+        Commits of a log command in pages of size, read from one git process.
+        '''
+        args = self.log_args(cmd, graph_text)
+        return LogPager(self.stream(args, sep="\x1e") if args else iter(()), size)
+
+    def status(self, paths=(), fsmonitor="") -> '(branch: dict, records: [StatusRecord, ...])':
+        '''
+        paths: only these paths (directories end with "/"), all if empty.
+        fsmonitor: core.fsmonitor hook command (watcher.Watcher.hook_command).
+        '''
+        options = ["-c", "core.fsmonitor=" + fsmonitor, "-c", "core.fsmonitorHookVersion=2"] if fsmonitor else []
+        pathspecs = literal_pathspecs(paths) if paths else []
+        if self.supports('porcelain_v2'):
+            data = self.output([*options, "status", "--porcelain=v2", "-z", "--branch", "--ignored", *pathspecs])
+            return parse_status_v2(data)
+        data = self.output([*options, "status", "--porcelain", "-z", "--ignored", *pathspecs])
+        return parse_status_v1(data)
+
+    def command(self, cmd: Union[str, list, tuple]) -> Generator[str, None, bytes]:
+        
+        key = self.cache_key('lines', cmd)
+        if key:
+            lines = self.cache.get(key)
+            if lines is not None:
+                self.record_hit(key, sum(len(l) + 1 for l in lines))
+                yield from lines
+                return
+            fingerprint = self.cache.fingerprint()
+            lines = []
+
+        # stderr merged: messages of git are reported with the result
+        for batch in self.__read(cmd, "\n", subprocess.STDOUT, Records()):
+            if key:
+                lines.extend(batch)
+            yield from batch
+
+        # cache only completely read results
+        if key:
+            self.cache.put(key, fingerprint, lines)
+
+
+class LogPager:
+    '''
+    Pages of Git.log read from one streaming git process, so the graph stays
+    continuous across pages. Between pages git waits on the full pipe.
+    close() terminates git.
+    '''
+
+    def __init__(self, stream, size=200):
+        self.size = size
+        # pages read
+        self.pages = 0
+        # no more pages
+        self.done = False
+        self.__stream = stream
+        self.__logs = iter_log(stream)
+        self.__lock = threading.Lock()
+
+    def next_page(self) -> '[LogRecord, ...]':
+        with self.__lock:
+            if self.done:
+                return []
+            try:
+                page = list(itertools.islice(self.__logs, self.size))
+            except Exception:
+                self.__close()
+                raise
+            self.pages += 1
+            if len(page) < self.size:
+                self.__close()
+            return page
+
+    def close(self):
+        with self.__lock:
+            self.__close()
+
+    def __close(self):
+        self.done = True
+        self.__logs.close()
+        if hasattr(self.__stream, 'close'):
+            self.__stream.close()
+
+
+# git process running off the main thread
+class Job:
+    PTN_PERCENT = re.compile(r"(\d+)%")
+
+    def __init__(self, process):
+        self.process = process
+        self.origin = metrics.origin
+        self.nbytes = 0
+        self.__start = time.perf_counter()
+
+        self.lines = []
+        # last progress line ("Updating files:  42% (420/1000)")
+        self.message = ""
+        # 0.0 - 1.0, None while unknown
+        self.progress = None
+        self.returncode = None
+        self.cancelled = False
+
+        self.__thread = threading.Thread(target=self.__read, daemon=True)
+        self.__thread.start()
+
+    @property
+    def done(self) -> bool:
+        return self.returncode is not None
+
+    def __read(self):
+        # progress meter rewrites its line with CR
+        pending = b""
+        stdout = self.process.stdout
         while True:
-            line = p.stdout.readline()
-            if line:
-                try:
-                    out = line.decode('utf-8').rstrip('\n')
-                    # print(out)
-                    yield out
-                except UnicodeDecodeError as e:
-                    print(e)
-                    out = line
-                    yield out
-
-            if not line and p.poll() is not None:
+            chunk = stdout.read1(8192) if hasattr(stdout, 'read1') else stdout.read(8192)
+            if not chunk:
                 break
+            self.nbytes += len(chunk)
+            pending += chunk
+            *segments, pending = re.split(rb"(\r|\n)", pending)
+            for text, sep in zip(segments[::2], segments[1::2]):
+                self.__feed(text.decode('utf-8', 'replace'), sep == b"\n")
+        if pending:
+            self.__feed(pending.decode('utf-8', 'replace'), True)
+
+        returncode = self.process.wait()
+        sub = subcommand_of(self.process.args[1:])
+        wall = time.perf_counter() - self.__start
+        metrics.record_command(sub, self.origin, wall, self.nbytes, returncode)
+        tracer.add("git " + sub, 'git', self.__start, wall, {
+            'origin': self.origin,
+            'bytes': self.nbytes,
+            'returncode': returncode,
+            })
+        self.returncode = returncode
+
+    def __feed(self, text, is_line_end):
+        m = self.PTN_PERCENT.search(text)
+        if m:
+            self.message = text.strip()
+            self.progress = min(int(m.group(1)), 100) / 100
+        if is_line_end and text:
+            self.lines.append(text)
+
+    def cancel(self):
+        if not self.done:
+            self.cancelled = True
+            self.process.terminate()
+
+    def wait(self, timeout=None):
+        self.__thread.join(timeout)
+        return self.returncode
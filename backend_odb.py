@@ -0,0 +1,770 @@
+import os
+import re
+import mmap
+import heapq
+import struct
+import threading
+import zlib
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Generator
+
+
+
+# packed object types
+OBJ_COMMIT      = 1
+OBJ_TREE        = 2
+OBJ_BLOB        = 3
+OBJ_TAG         = 4
+OBJ_OFS_DELTA   = 6
+OBJ_REF_DELTA   = 7
+
+TYPE_NAMES = {
+    OBJ_COMMIT: "commit",
+    OBJ_TREE:   "tree",
+    OBJ_BLOB:   "blob",
+    OBJ_TAG:    "tag",
+    }
+TYPE_IDS = {name.encode(): typ for typ, name in TYPE_NAMES.items()}
+
+PTN_HEX = re.compile(r"[0-9a-f]{4,64}")
+
+
+class MissingObject(LookupError):
+    pass
+
+
+# typed access over read(rev) -> (sha, type, data) | None
+class ObjectReader(ABC):
+    # tree entry modes
+    MODE_TREE       = b"40000"
+    MODE_GITLINK    = b"160000"
+
+    hash_size = 20
+
+    @abstractmethod
+    def read(self, rev) -> '(sha, type, data: bytes) | None':
+        pass
+
+    def read_typed(self, rev, typ) -> 'data: bytes | None':
+        obj = self.read(rev)
+        return obj[2] if obj and obj[1] == typ else None
+
+    def read_head(self, rev, n) -> '(sha, type, data: bytes) | None: data of n bytes at least (all if shorter)':
+        return self.read(rev)
+
+    def commit(self, rev) -> 'headers: dict, message: str':
+        data = self.read_typed(rev, "commit")
+        if data is None:
+            return None, None
+        head, _, message = data.partition(b"\n\n")
+        headers = {}
+        for line in head.split(b"\n"):
+            # continuation line (gpgsig, mergetag)
+            if line.startswith(b" "):
+                continue
+            key, _, value = line.partition(b" ")
+            headers.setdefault(key.decode(), []).append(value.decode('utf-8', 'replace'))
+        return headers, message.decode('utf-8', 'replace')
+
+    def tree(self, rev) -> '[(mode: bytes, name: str, sha: str), ...]':
+        data = self.read_typed(rev, "tree")
+        entries = []
+        if data is None:
+            return entries
+        pos, end = 0, len(data)
+        hash_size = self.hash_size
+        while pos < end:
+            sp = data.index(b" ", pos)
+            nul = data.index(b"\0", sp)
+            mode = data[pos:sp]
+            name = data[sp+1:nul].decode('utf-8', 'surrogateescape')
+            sha = data[nul+1:nul+1+hash_size].hex()
+            entries.append((mode, name, sha))
+            pos = nul + 1 + hash_size
+        return entries
+
+    def walk_blobs(self, tree_rev, prefix="") -> 'Generator[(path, sha)]':
+        for mode, name, sha in self.tree(tree_rev):
+            path = prefix + name
+            if mode == self.MODE_TREE:
+                yield from self.walk_blobs(sha, path + "/")
+            elif mode != self.MODE_GITLINK:
+                yield path, sha
+
+
+def read_varint(data, pos) -> '(pos, value)':
+    # little-endian base 128 of delta header
+    value = shift = 0
+    while True:
+        c = data[pos]
+        pos += 1
+        value |= (c & 0x7f) << shift
+        shift += 7
+        if not c & 0x80:
+            return pos, value
+
+
+def apply_delta(base, delta) -> bytes:
+    pos, src_size = read_varint(delta, 0)
+    pos, dst_size = read_varint(delta, pos)
+    if src_size != len(base):
+        raise ValueError(f"delta base size mismatch: {len(base)} != {src_size}")
+
+    base = memoryview(base)
+    out = bytearray()
+    end = len(delta)
+    while pos < end:
+        cmd = delta[pos]
+        pos += 1
+        if cmd & 0x80:
+            # copy from base: offset / size bytes present by bits
+            offset = size = 0
+            if cmd & 0x01: offset = delta[pos]; pos += 1
+            if cmd & 0x02: offset |= delta[pos] << 8; pos += 1
+            if cmd & 0x04: offset |= delta[pos] << 16; pos += 1
+            if cmd & 0x08: offset |= delta[pos] << 24; pos += 1
+            if cmd & 0x10: size = delta[pos]; pos += 1
+            if cmd & 0x20: size |= delta[pos] << 8; pos += 1
+            if cmd & 0x40: size |= delta[pos] << 16; pos += 1
+            out += base[offset:offset + (size or 0x10000)]
+        elif cmd:
+            # insert literal
+            out += delta[pos:pos + cmd]
+            pos += cmd
+        else:
+            raise ValueError("delta opcode 0 is reserved")
+
+    if len(out) != dst_size:
+        raise ValueError(f"delta result size mismatch: {len(out)} != {dst_size}")
+    return bytes(out)
+
+
+# .pack with its version 2 .idx, both memory-mapped
+class Pack:
+    IDX_MAGIC = b"\377tOc"
+
+    def __init__(self, idx_path, hash_size=20):
+        self.idx_path = idx_path
+        self.pack_path = idx_path[:-4] + ".pack"
+        self.hash_size = hash_size
+
+        self.__idx = self.__map(idx_path)
+        self.__pack = None
+        try:
+            idx = self.__idx
+            if idx[:4] != self.IDX_MAGIC or struct.unpack_from(">I", idx, 4)[0] != 2:
+                raise ValueError(f"unsupported pack index: {idx_path}")
+            self.__fanout = struct.unpack_from(">256I", idx, 8)
+            self.count = self.__fanout[255]
+            self.__names = 8 + 256 * 4
+            self.__offsets = self.__names + self.count * (hash_size + 4)
+            self.__large = self.__offsets + self.count * 4
+
+            self.__pack = self.__map(self.pack_path)
+            if self.__pack[:4] != b"PACK":
+                raise ValueError(f"not a pack: {self.pack_path}")
+            self.view = memoryview(self.__pack)
+        except BaseException:
+            self.close()
+            raise
+
+    @staticmethod
+    def __map(path) -> mmap.mmap:
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        view = getattr(self, 'view', None)
+        if view is not None:
+            view.release()
+            self.view = None
+        for m in (self.__idx, self.__pack):
+            if m is not None:
+                m.close()
+        self.__idx = self.__pack = None
+
+    # index
+
+    def name(self, i) -> bytes:
+        pos = self.__names + i * self.hash_size
+        return self.__idx[pos:pos + self.hash_size]
+
+    def offset(self, i) -> int:
+        offset = struct.unpack_from(">I", self.__idx, self.__offsets + i * 4)[0]
+        if offset & 0x80000000:
+            offset = struct.unpack_from(">Q", self.__idx, self.__large + (offset & 0x7fffffff) * 8)[0]
+        return offset
+
+    def __bisect(self, key: bytes) -> 'int: first index with name >= key':
+        lo = self.__fanout[key[0] - 1] if key[0] else 0
+        hi = self.__fanout[key[0]]
+        idx, names, hash_size = self.__idx, self.__names, self.hash_size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = names + mid * hash_size
+            if idx[pos:pos + hash_size] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, sha: bytes) -> 'int: offset | None':
+        i = self.__bisect(sha)
+        if i < self.count and self.name(i) == sha:
+            return self.offset(i)
+        return None
+
+    def find_prefix(self, prefix: str, limit=2) -> '[(sha, offset), ...]':
+        # odd length: pad the half byte with 0 for the lower bound
+        i = self.__bisect(bytes.fromhex(prefix + "0" * (len(prefix) & 1)))
+        found = []
+        while i < self.count and len(found) < limit:
+            sha = self.name(i).hex()
+            if not sha.startswith(prefix):
+                break
+            found.append((sha, self.offset(i)))
+            i += 1
+        return found
+
+    # pack data
+
+    def header(self, offset) -> '(type, size, data offset)':
+        view = self.view
+        c = view[offset]
+        offset += 1
+        typ = (c >> 4) & 7
+        size = c & 0x0f
+        shift = 4
+        while c & 0x80:
+            c = view[offset]
+            offset += 1
+            size |= (c & 0x7f) << shift
+            shift += 7
+        return typ, size, offset
+
+    def ofs_base(self, offset, pos) -> '(base offset, data offset)':
+        view = self.view
+        c = view[pos]
+        pos += 1
+        distance = c & 0x7f
+        while c & 0x80:
+            c = view[pos]
+            pos += 1
+            distance = ((distance + 1) << 7) | (c & 0x7f)
+        return offset - distance, pos
+
+    def ref_base(self, pos) -> '(base sha, data offset)':
+        end = pos + self.hash_size
+        return self.view[pos:end].hex(), end
+
+    def inflate(self, pos, size) -> bytes:
+        # input is sliced from the mapping, not copied:
+        # deflate adds a few bytes per 16K block at most
+        chunk = size + (size >> 10) + 64
+        try:
+            out = zlib.decompress(self.view[pos:pos + chunk], bufsize=max(size, 1))
+        except zlib.error:
+            out = None
+        if out is not None and len(out) == size:
+            return out
+
+        d = zlib.decompressobj()
+        out = d.decompress(self.view[pos:pos + chunk])
+        while not d.eof:
+            pos += chunk
+            if pos >= len(self.view):
+                raise ValueError(f"truncated object in {self.pack_path}")
+            out += d.decompress(self.view[pos:pos + chunk])
+        if len(out) != size:
+            raise ValueError(f"object size mismatch in {self.pack_path}: {len(out)} != {size}")
+        return out
+
+    def inflate_head(self, pos, n) -> bytes:
+        # at least n bytes (or all) of the inflated data
+        d = zlib.decompressobj()
+        out = []
+        size = 0
+        step = max(256, n >> 2)
+        while size < n and not d.eof:
+            chunk = d.decompress(self.view[pos:pos + step], n - size)
+            out.append(chunk)
+            size += len(chunk)
+            pos += step - len(d.unconsumed_tail)
+            if pos >= len(self.view):
+                break
+        return b"".join(out)
+
+
+# read-only object database of a repository, without spawning git
+class ObjectDatabase(ObjectReader):
+    '''
+    Packs (.idx version 2), loose objects and refs (files and packed-refs)
+    read in-process. Objects of alternates and promisor remotes, and
+    reftable refs are not found: callers fall back to `git cat-file`.
+    '''
+
+    # delta bases kept decompressed
+    BASE_CACHE_BYTES = 32 << 20
+    BASE_CACHE_MAX_OBJECT = 4 << 20
+
+    def __init__(self, gitdir):
+        self.gitdir = gitdir
+        commondir = gitdir
+        try:
+            with open(os.path.join(gitdir, "commondir"), "r") as f:
+                commondir = os.path.normpath(os.path.join(gitdir, f.read().strip()))
+        except OSError:
+            pass
+        self.commondir = commondir
+        self.objects_dir = os.path.join(commondir, "objects")
+
+        config = self.__read_text(os.path.join(commondir, "config")) or ""
+        sha256 = re.search(r"^\s*objectformat\s*=\s*sha256\s*$", config, re.M | re.I)
+        self.hash_size = 32 if sha256 else 20
+        self.hex_size = self.hash_size * 2
+        self.has_refs = not re.search(r"^\s*refstorage\s*=\s*reftable\s*$", config, re.M | re.I)
+
+        self.__lock = threading.RLock()
+        self.__packs = None
+        self.__packs_mtime = None
+        # (stat, {name: sha})
+        self.__packed = (None, {})
+        # {(pack path, offset): (type, data)}
+        self.__bases = OrderedDict()
+        self.__bases_bytes = 0
+
+    @staticmethod
+    def __read_text(path) -> 'str | None':
+        try:
+            with open(path, "r", encoding='utf-8', errors='surrogateescape') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    # packs
+
+    @property
+    def pack_dir(self) -> str:
+        return os.path.join(self.objects_dir, "pack")
+
+    def __pack_dir_mtime(self) -> 'int | None':
+        try:
+            return os.stat(self.pack_dir).st_mtime_ns
+        except OSError:
+            return None
+
+    def __scan(self) -> '[Pack, ...]':
+        packs = []
+        pack_dir = self.pack_dir
+        self.__packs_mtime = self.__pack_dir_mtime()
+        try:
+            names = sorted(os.listdir(pack_dir))
+        except OSError:
+            names = []
+        for name in names:
+            if name.endswith(".idx"):
+                try:
+                    packs.append(Pack(os.path.join(pack_dir, name), self.hash_size))
+                except (OSError, ValueError):
+                    # being written, or of unsupported index version
+                    continue
+        return packs
+
+    @property
+    def packs(self) -> '[Pack, ...]':
+        with self.__lock:
+            if self.__packs is None:
+                self.__packs = self.__scan()
+            return self.__packs
+
+    def refresh(self):
+        '''
+        Unmap packs: repacked / removed packs are not kept open.
+        '''
+        with self.__lock:
+            for pack in self.__packs or ():
+                pack.close()
+            self.__packs = None
+            self.__bases.clear()
+            self.__bases_bytes = 0
+
+    close = refresh
+
+    # lookup
+
+    def __loose_path(self, sha) -> str:
+        return os.path.join(self.objects_dir, sha[:2], sha[2:])
+
+    def __locate(self, sha, rescan=True) -> '(Pack, offset) | (None, loose path) | None':
+        key = bytes.fromhex(sha)
+        for pack in self.packs:
+            offset = pack.find(key)
+            if offset is not None:
+                return pack, offset
+        path = self.__loose_path(sha)
+        if os.path.isfile(path):
+            return None, path
+        # packed since scanned (fetch, gc)
+        if rescan and self.__pack_dir_mtime() != self.__packs_mtime:
+            self.refresh()
+            return self.__locate(sha, False)
+        return None
+
+    def __expand(self, prefix) -> 'str: full sha | None if missing or ambiguous':
+        found = set()
+        try:
+            rest = prefix[2:]
+            for name in os.listdir(os.path.join(self.objects_dir, prefix[:2])):
+                if name.startswith(rest):
+                    found.add(prefix[:2] + name)
+        except OSError:
+            pass
+        for pack in self.packs:
+            found.update(sha for sha, _ in pack.find_prefix(prefix))
+        return found.pop() if len(found) == 1 else None
+
+    def resolve(self, rev) -> 'str: full sha | None':
+        '''
+        Full or abbreviated hash, HEAD or ref name. Revision syntax
+        (^, ~, :) is not supported. Unlike rev-parse, an abbreviated hash
+        wins over a ref of the same name (git warns of it as ambiguous).
+        '''
+        with self.__lock:
+            if PTN_HEX.fullmatch(rev):
+                if len(rev) == self.hex_size:
+                    return rev
+                sha = self.__expand(rev)
+                if sha:
+                    return sha
+            return self.resolve_ref(rev)
+
+    # objects
+
+    def __cache_base(self, key, typ, data):
+        if len(data) > self.BASE_CACHE_MAX_OBJECT:
+            return
+        self.__bases[key] = (typ, data)
+        self.__bases_bytes += len(data)
+        while self.__bases_bytes > self.BASE_CACHE_BYTES:
+            _, (_, old) = self.__bases.popitem(last=False)
+            self.__bases_bytes -= len(old)
+
+    def __unpack(self, pack, offset) -> '(type, data)':
+        # deltas to apply, newest last: [(pack, offset, delta pos, delta size), ...]
+        chain = []
+        while True:
+            cached = self.__bases.get((pack.pack_path, offset))
+            if cached is not None:
+                self.__bases.move_to_end((pack.pack_path, offset))
+                typ, data = cached
+                break
+
+            typ, size, pos = pack.header(offset)
+            if typ == OBJ_OFS_DELTA:
+                base_offset, pos = pack.ofs_base(offset, pos)
+                chain.append((pack, offset, pos, size))
+                offset = base_offset
+                continue
+            if typ == OBJ_REF_DELTA:
+                base, pos = pack.ref_base(pos)
+                chain.append((pack, offset, pos, size))
+                location = self.__locate(base)
+                if location is None:
+                    raise MissingObject(base)
+                if location[0] is None:
+                    typ, data = self.__read_loose(location[1])
+                    break
+                pack, offset = location
+                continue
+            if typ not in TYPE_NAMES:
+                raise ValueError(f"bad object type {typ} in {pack.pack_path}")
+            data = pack.inflate(pos, size)
+            if chain:
+                self.__cache_base((pack.pack_path, offset), typ, data)
+            break
+
+        for i, (pack, offset, pos, size) in enumerate(reversed(chain), 1):
+            data = apply_delta(data, pack.inflate(pos, size))
+            # intermediate results are bases of later lookups in the chain
+            if i < len(chain):
+                self.__cache_base((pack.pack_path, offset), typ, data)
+        return typ, data
+
+    def __packed_info(self, pack, offset) -> '(type, size)':
+        typ, size, pos = pack.header(offset)
+        if typ in (OBJ_OFS_DELTA, OBJ_REF_DELTA):
+            # result size is in the delta header, type is of the base
+            if typ == OBJ_OFS_DELTA:
+                _, pos = pack.ofs_base(offset, pos)
+            else:
+                _, pos = pack.ref_base(pos)
+            head = pack.inflate_head(pos, 20)
+            pos, _ = read_varint(head, 0)
+            _, size = read_varint(head, pos)
+            while typ in (OBJ_OFS_DELTA, OBJ_REF_DELTA):
+                typ, _, pos = pack.header(offset)
+                if typ == OBJ_OFS_DELTA:
+                    offset, _ = pack.ofs_base(offset, pos)
+                elif typ == OBJ_REF_DELTA:
+                    base, _ = pack.ref_base(pos)
+                    location = self.__locate(base)
+                    if location is None:
+                        raise MissingObject(base)
+                    if location[0] is None:
+                        return self.__loose_info(location[1])[0], size
+                    pack, offset = location
+        return typ, size
+
+    def __read_loose(self, path) -> '(type, data)':
+        with open(path, "rb") as f:
+            raw = zlib.decompress(f.read())
+        head, _, data = raw.partition(b"\0")
+        typ, _, size = head.partition(b" ")
+        if int(size) != len(data):
+            raise ValueError(f"object size mismatch: {path}")
+        return self.__type_id(typ), data
+
+    def __loose_info(self, path) -> '(type, size)':
+        d = zlib.decompressobj()
+        with open(path, "rb") as f:
+            head = d.decompress(f.read(256), 64)
+        head = head.partition(b"\0")[0]
+        typ, _, size = head.partition(b" ")
+        return self.__type_id(typ), int(size)
+
+    @staticmethod
+    def __type_id(name: bytes) -> int:
+        typ = TYPE_IDS.get(name)
+        if typ is None:
+            raise ValueError(f"bad object type: {name}")
+        return typ
+
+    def __object(self, rev, read_body) -> '(sha, type id, data | size) | None':
+        with self.__lock:
+            sha = self.resolve(rev)
+            if sha is None:
+                return None
+            location = self.__locate(sha)
+            if location is None:
+                return None
+            pack, where = location
+            if pack is None:
+                if read_body:
+                    return (sha, *self.__read_loose(where))
+                return (sha, *self.__loose_info(where))
+            if read_body:
+                return (sha, *self.__unpack(pack, where))
+            return (sha, *self.__packed_info(pack, where))
+
+    def read_head(self, rev, n) -> '(sha, type, data: bytes) | None: data of n bytes at least (all if shorter)':
+        with self.__lock:
+            sha = self.resolve(rev)
+            location = sha and self.__locate(sha)
+            if not location:
+                return None
+            pack, where = location
+            if pack is None:
+                d = zlib.decompressobj()
+                with open(where, "rb") as f:
+                    raw = b""
+                    while not d.eof:
+                        chunk = f.read(1 << 16)
+                        if not chunk:
+                            break
+                        raw += d.decompress(chunk)
+                        end = raw.find(b"\0")
+                        if end >= 0 and len(raw) - end > n:
+                            break
+                head, _, data = raw.partition(b"\0")
+                return sha, TYPE_NAMES[self.__type_id(head.partition(b" ")[0])], data
+            typ, size, pos = pack.header(where)
+            if typ in (OBJ_OFS_DELTA, OBJ_REF_DELTA):
+                # deltas may copy from anywhere of their base
+                typ, data = self.__unpack(pack, where)
+                return sha, TYPE_NAMES[typ], data
+            if typ not in TYPE_NAMES:
+                raise ValueError(f"bad object type {typ} in {pack.pack_path}")
+            return sha, TYPE_NAMES[typ], pack.inflate_head(pos, min(n, size))
+
+    def info(self, rev) -> '(sha, type, size) | None':
+        obj = self.__object(rev, False)
+        return (obj[0], TYPE_NAMES[obj[1]], obj[2]) if obj else None
+
+    def read(self, rev) -> '(sha, type, data: bytes) | None':
+        obj = self.__object(rev, True)
+        return (obj[0], TYPE_NAMES[obj[1]], obj[2]) if obj else None
+
+    def read_typed(self, rev, typ) -> 'data: bytes | None':
+        # strict: a missing object is not an empty tree
+        obj = self.read(rev)
+        if obj is None:
+            raise MissingObject(rev)
+        return obj[2] if obj[1] == typ else None
+
+    def peel(self, rev) -> 'str: sha of commit (tags followed) | None':
+        sha = self.resolve(rev)
+        while sha:
+            obj = self.read(sha)
+            if obj is None:
+                raise MissingObject(sha)
+            if obj[1] != "tag":
+                return sha if obj[1] == "commit" else None
+            sha = obj[2].split(b"\n", 1)[0].partition(b" ")[2].decode()
+        return None
+
+    # refs
+
+    def __packed_refs(self) -> '{name: sha}':
+        path = os.path.join(self.commondir, "packed-refs")
+        try:
+            st = os.stat(path)
+            stat = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            return {}
+        if self.__packed[0] == stat:
+            return self.__packed[1]
+
+        refs = {}
+        for line in (self.__read_text(path) or "").splitlines():
+            # "# pack-refs with:" header, "^<peeled>" lines
+            if not line or line[0] in "#^":
+                continue
+            sha, _, name = line.partition(" ")
+            refs[name] = sha
+        self.__packed = (stat, refs)
+        return refs
+
+    def __loose_ref(self, name) -> 'str | None: content':
+        # HEAD and other pseudo refs are per worktree
+        base = self.commondir if name.startswith("refs/") else self.gitdir
+        text = self.__read_text(os.path.join(base, *name.split("/")))
+        return text.strip() if text else None
+
+    def read_ref(self, name, depth=5) -> 'str: sha | None':
+        if not self.has_refs:
+            return None
+        value = self.__loose_ref(name)
+        if value is None:
+            value = self.__packed_refs().get(name)
+        if value and value.startswith("ref:"):
+            return self.read_ref(value[4:].strip(), depth - 1) if depth else None
+        return value
+
+    def symbolic_ref(self, name="HEAD") -> 'str: target ref | None':
+        value = self.__loose_ref(name)
+        return value[4:].strip() if value and value.startswith("ref:") else None
+
+    def resolve_ref(self, name) -> 'str: sha | None':
+        # rules of `git rev-parse <name>` (gitrevisions)
+        for fmt in ("{}", "refs/{}", "refs/tags/{}", "refs/heads/{}", "refs/remotes/{}", "refs/remotes/{}/HEAD"):
+            sha = self.read_ref(fmt.format(name))
+            if sha:
+                return sha
+        return None
+
+    def refs(self) -> '{name: sha} of refs/':
+        if not self.has_refs:
+            return {}
+        refs = dict(self.__packed_refs())
+        refs_dir = os.path.join(self.commondir, "refs")
+        for dirpath, _, filenames in os.walk(refs_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = "refs/" + os.path.relpath(path, refs_dir).replace(os.sep, "/")
+                value = self.__read_text(path)
+                if value and not value.startswith("ref:"):
+                    refs[name] = value.strip()
+        return refs
+
+    # history
+
+    def __commit_header(self, sha) -> '(commit time, parents)':
+        data = self.read_typed(sha, "commit")
+        if data is None:
+            raise ValueError(f"not a commit: {sha}")
+        # "tree <sha>\n" ("parent <sha>\n")* "author ...\n" "committer <ident> <time> <tz>\n"
+        hex_size = self.hex_size
+        pos = 6 + hex_size
+        parents = []
+        while data.startswith(b"parent ", pos):
+            parents.append(data[pos + 7:pos + 7 + hex_size].decode())
+            pos += 8 + hex_size
+        start = data.find(b"\ncommitter ", pos)
+        end = data.find(b"\n", start + 1)
+        time = int(data[start:end].rsplit(b" ", 2)[1]) if start >= 0 else 0
+        return time, parents
+
+    def walk(self, revs, max_count=None) -> 'Generator[(sha, parents)]':
+        '''
+        Commits reachable from revs, newest committer date first
+        (default order of `git rev-list`). "--all" is all refs and HEAD,
+        but refs matching "--exclude=<glob>" before it.
+        '''
+        tips = []
+        excludes = []
+        for rev in revs:
+            if rev.startswith("--exclude="):
+                excludes.append(rev[10:])
+            elif rev == "--all":
+                head = self.read_ref("HEAD")
+                # unborn branch
+                if head:
+                    tips.append(("HEAD", head))
+                tips += sorted((name, sha) for name, sha in self.refs().items()
+                               if not any(fnmatchcase(name, glob) for glob in excludes))
+                excludes = []
+            else:
+                tips.append((rev, self.resolve(rev)))
+
+        heap = []
+        seen = set()
+        counter = 0
+
+        def push(sha):
+            nonlocal counter
+            if sha in seen:
+                return
+            seen.add(sha)
+            time, parents = self.__commit_header(sha)
+            heapq.heappush(heap, (-time, counter, sha, parents))
+            counter += 1
+
+        for rev, sha in tips:
+            if sha is None:
+                raise MissingObject(rev)
+            commit = self.peel(sha)
+            # refs of trees / blobs (tags of them) are not walked
+            if commit:
+                push(commit)
+
+        count = 0
+        while heap and (max_count is None or count < max_count):
+            _, _, sha, parents = heapq.heappop(heap)
+            yield sha, parents
+            count += 1
+            for parent in parents:
+                push(parent)
+
+
+# {gitdir: ObjectDatabase}
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(gitdir) -> ObjectDatabase:
+    key = os.path.normcase(os.path.abspath(gitdir))
+    with _databases_lock:
+        odb = _databases.get(key)
+        if odb is None:
+            odb = _databases[key] = ObjectDatabase(key)
+        return odb
+
+
+def shutdown():
+    with _databases_lock:
+        for odb in _databases.values():
+            odb.close()
+        _databases.clear()
@@ -0,0 +1,67 @@
+'''
+Benchmarks of BlendGit reload and parsing paths on synthetic repositories.
+
+    python -m benchmarks --scale small --output result.json
+    python -m benchmarks --scale small --baseline result.json --threshold 0.2
+
+Run from the addon directory. Repositories are generated once per scale
+under --workdir and reused by later runs. Outside Blender the addon runs
+in the headless stand-in of bpy (see headless/), so reload and drawing
+paths are measured too.
+'''
+
+import importlib
+import os
+import sys
+import threading
+import types
+
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_addon(name="blendgit") -> 'module: addon package':
+    '''
+    Addon package without running its __init__ (which needs bpy).
+    Inside Blender the registered addon package is used as is.
+    '''
+    parent = __package__.rpartition(".")[0]
+    if parent and parent in sys.modules:
+        return sys.modules[parent]
+
+    pkg = sys.modules.get(name)
+    if pkg is None:
+        pkg = types.ModuleType(name)
+        pkg.__path__ = [ADDON_DIR]
+        pkg.__file__ = os.path.join(ADDON_DIR, "__init__.py")
+        sys.modules[name] = pkg
+    return pkg
+
+
+def headless_context(rootdir, blend_path, git_execpath="", name="blendgit") -> '(context, headless) | (None, None)':
+    '''
+    Addon registered in the headless stand-in of bpy, with blend_path of
+    rootdir opened. (None, None) inside Blender.
+    '''
+    if ADDON_DIR not in sys.path:
+        sys.path.insert(0, ADDON_DIR)
+    import headless
+    if not headless.install():
+        return None, None
+
+    addon = headless.load_addon(name)
+    context = addon.bpy.context
+    addon.common.get_addon_prefs(context).git_execpath = git_execpath
+    headless.open_mainfile(os.path.join(rootdir, blend_path))
+
+    # initial reload: modal operators, timers and reload threads
+    headless.run()
+    for t in threading.enumerate():
+        if t is not threading.current_thread() and not t.daemon:
+            t.join()
+    return context, headless
+
+
+def import_addon_module(module, name="blendgit"):
+    pkg = load_addon(name)
+    return importlib.import_module(f"{pkg.__name__}.{module}")
@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from . import synth, suite, verify, headless_context
+
+
+def compare(results, baseline, threshold) -> '[(name, ratio), ...] of regressions':
+    regressions = []
+    for name, summary in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base or 'median' not in base or 'median' not in summary:
+            continue
+        ratio = summary['median'] / base['median'] if base['median'] else 1.0
+        summary['baseline'] = base['median']
+        summary['ratio'] = ratio
+        if ratio > 1.0 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("--scale", choices=sorted(synth.SCALES), default='small')
+    for key in synth.SCALES['small']:
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, dest=key,
+                            help=f"override {key} of scale")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "blendgit-bench"),
+                        help="directory of generated repositories")
+    parser.add_argument("--git", default="", help="git executable")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="benchmark names to run")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON of earlier run to compare")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown of median against baseline (0.2 = 20%%)")
+    parser.add_argument("--no-headless", action="store_true",
+                        help="skip benchmarks needing bpy instead of using the headless stand-in")
+    parser.add_argument("--verify", action="store_true",
+                        help="check objects and refs read in-process against the git CLI, then exit")
+    args = parser.parse_args(argv)
+
+    params = synth.params_of(args.scale, **{k: getattr(args, k) for k in synth.SCALES['small']})
+    rootdir = synth.repo_dir(args.workdir, params)
+    synth.generate(rootdir, params, git=args.git or "git")
+
+    if args.verify:
+        env = suite.Env(rootdir, args.git)
+        failures = verify.run(rootdir, env.tempdir, args.git or "git")
+        print(f"{len(failures)} failures")
+        return 1 if failures else 0
+
+    context, headless = None, None
+    if not args.no_headless:
+        context, headless = headless_context(rootdir, synth.BLEND_PATH, args.git)
+
+    env = suite.Env(rootdir, args.git, context, headless)
+    print(f"{env.git.version_string} / {rootdir}")
+    results = suite.run(env, names=args.only, repeat=args.repeat)
+
+    report = {
+        'meta': {
+            'scale': args.scale,
+            'params': params,
+            'git': env.git.version_string,
+            'python': sys.version.split()[0],
+            'headless': headless is not None,
+            'platform': platform.platform(),
+            'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+        'results': results,
+        }
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, ratio in regressions:
+            print(f"REGRESSION {name}: {ratio:.2f}x of baseline", file=sys.stderr)
+        report['regressions'] = [name for name, _ in regressions]
+        status = 1 if regressions else 0
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
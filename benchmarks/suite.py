@@ -0,0 +1,250 @@
+import gc
+import os
+import statistics
+import tempfile
+import time
+
+from . import import_addon_module
+
+
+# name: (function(env), needs)
+# needs: None, 'bpy' (context with addon registered) or 'headless' (stand-in of bpy)
+BENCHMARKS = {}
+
+
+def bench(name, needs=None):
+    def decorator(fn):
+        BENCHMARKS[name] = (fn, needs)
+        return fn
+    return decorator
+
+
+class Env:
+    '''
+    Shared state of one benchmark run.
+    context: bpy context with the addon registered and rootdir loaded.
+    headless: headless module when context is of the stand-in.
+    '''
+
+    def __init__(self, rootdir, git_execpath="", context=None, headless=None):
+        self.backend = import_addon_module("backend_git")
+        self.common = import_addon_module("common")
+
+        self.rootdir = rootdir
+        self.context = context
+        self.headless = headless
+        if context:
+            # session of reload_*: cleared by cold()
+            self.git = self.backend.Git.get(context)
+            self.ops_main = import_addon_module("ops_main")
+            self.ui = import_addon_module("ui")
+            self.log_graph = import_addon_module("log_graph")
+        else:
+            self.git = self.backend.Git(git_execpath, rootdir)
+
+        self.tempdir = tempfile.mkdtemp(prefix="blendgit-bench-")
+
+    def cold(self):
+        # measure without result / object caches
+        self.git.invalidate()
+        self.backend.objects.clear()
+
+    def blend_blob(self) -> str:
+        if not hasattr(self, '_blend_blob'):
+            blobs = self.git.get_blobs(self.git.catfile.info("HEAD")[0])
+            self._blend_blob = blobs.get("scene.blend")
+        return self._blend_blob
+
+
+def measure(fn, env, repeat, warmup=1) -> '[seconds, ...]':
+    for _ in range(warmup):
+        env.cold()
+        fn(env)
+
+    times = []
+    for _ in range(repeat):
+        env.cold()
+        gc.collect()
+        gc.disable()
+        t = time.perf_counter()
+        try:
+            fn(env)
+        finally:
+            times.append(time.perf_counter() - t)
+            gc.enable()
+    return times
+
+
+def summarize(times) -> dict:
+    return {
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+        'min': min(times),
+        'max': max(times),
+        'runs': len(times),
+        }
+
+
+def run(env, names=None, repeat=5, log=print) -> '{name: summary | {"skipped": reason}}':
+    results = {}
+    available = {None, 'bpy' if env.context else None, 'headless' if env.headless else None}
+    for name, (fn, needs) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        if needs not in available:
+            results[name] = {'skipped': f"needs {needs}"}
+            log(f"{name:32s} skipped (needs {needs})")
+            continue
+        summary = summarize(measure(fn, env, repeat))
+        results[name] = summary
+        log(f"{name:32s} {summary['median']*1000:10.2f} ms (min {summary['min']*1000:.2f})")
+    return results
+
+
+# +++++++++++++++++++++++++++++++++++++++++++++
+#
+#   Benchmarks
+#
+# +++++++++++++++++++++++++++++++++++++++++++++
+
+@bench("git.status")
+def _(env):
+    env.git.status()
+
+
+@bench("git.ls_files")
+def _(env):
+    env.backend.parse_nul_list(env.git.output(["ls-files", "-c", "-z"]))
+
+
+@bench("parse.status_v2")
+def _(env):
+    # FileEntry parsing: status records of captured output
+    if not hasattr(env, 'status_bytes'):
+        env.status_bytes = env.git.output(["status", "--porcelain=v2", "-z", "--branch", "--ignored"])
+    env.backend.parse_status_v2(env.status_bytes)
+
+
+@bench("parse.log")
+def _(env):
+    # LogEntry parsing: LogRecords of captured `log --graph --format=LOG_FORMAT` records
+    if not hasattr(env, 'log_records'):
+        env.log_records = env.git.records(
+            ["log", "--graph", "--all", f"--format={env.backend.LOG_FORMAT}"], sep="\x1e"
+            )
+    env.backend.parse_log(env.log_records)
+
+
+@bench("git.log_graph")
+def _(env):
+    for _ in env.git.command("log --graph --oneline --all"):
+        pass
+
+
+@bench("Git.records.log")
+def _(env):
+    env.git.records("log --graph --oneline --all")
+
+
+@bench("Git.log")
+def _(env):
+    env.git.log("log --graph --oneline --all")
+
+
+@bench("Git.stream.ls_files")
+def _(env):
+    for _ in env.git.stream(["ls-files", "-c", "-z"], sep="\0"):
+        pass
+
+
+@bench("git.branch")
+def _(env):
+    for _ in env.git.command(["branch"]):
+        pass
+
+
+@bench("Git.get_blobs")
+def _(env):
+    env.git.get_blobs(env.git.catfile.info("HEAD")[0])
+
+
+@bench("CatFile.get_blobs")
+def _(env):
+    env.git.use_odb = False
+    try:
+        env.git.get_blobs(env.git.catfile.info("HEAD")[0])
+    finally:
+        env.git.use_odb = True
+
+
+@bench("Git.walk")
+def _(env):
+    env.git.walk(list(env.backend.ALL_REFS))
+
+
+@bench("git.rev_list")
+def _(env):
+    env.git.records(["rev-list", *env.backend.ALL_REFS])
+
+
+@bench("Git.backup")
+def _(env):
+    blob = env.blend_blob()
+    if blob:
+        env.git.backup(blob, os.path.join(env.tempdir, "tmp.blend"))
+
+
+@bench("reload_files", needs='bpy')
+def _(env):
+    env.ops_main.reload_files(env.context)
+
+
+@bench("reload_files.full", needs='bpy')
+def _(env):
+    # full status reconciled against filled collection (no watcher token)
+    env.ops_main._files_state.clear()
+    env.ops_main.reload_files(env.context)
+
+
+@bench("reload_files.rebuild", needs='bpy')
+def _(env):
+    # full status into empty collection
+    env.ops_main._files_state.clear()
+    env.common.get_git_context(env.context).files.clear()
+    env.ops_main.reload_files(env.context)
+
+
+@bench("reload_branches", needs='bpy')
+def _(env):
+    env.ops_main.reload_branches(env.context)
+
+
+@bench("reload_stashes", needs='bpy')
+def _(env):
+    env.ops_main.reload_stashes(env.context)
+
+
+@bench("reload_logs", needs='bpy')
+def _(env):
+    env.ops_main.reload_logs(env.context)
+
+
+@bench("op.reload", needs='headless')
+def _(env):
+    # GIT_OT_reload until the timer applied all parts
+    env.ops_main.bpy.ops.git.reload('INVOKE_DEFAULT')
+    env.headless.run()
+
+
+@bench("LaneLayout.extend", needs='bpy')
+def _(env):
+    # lanes of the whole history from parent lists
+    if not hasattr(env, 'log_commits'):
+        env.log_commits = [(r.hash, r.parents) for r in env.git.log("log --all --topo-order")]
+    env.log_graph.LaneLayout().extend(env.log_commits)
+
+
+@bench("ui.draw_panels", needs='headless')
+def _(env):
+    for panel in env.ui.panels:
+        env.headless.draw(panel, env.context)
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import random
+import shutil
+import subprocess
+
+
+# Synthetic repository generator.
+# History is written with `git fast-import`, so 100k commits take seconds.
+
+SCALES = {
+    'small': dict(
+        files=10000,
+        commits=1000,
+        branches=10,
+        stashes=5,
+        blob_mb=10,
+        ignored=1000,
+        ),
+    'medium': dict(
+        files=40000,
+        commits=10000,
+        branches=50,
+        stashes=20,
+        blob_mb=100,
+        ignored=10000,
+        ),
+    'large': dict(
+        files=100000,
+        commits=100000,
+        branches=200,
+        stashes=50,
+        blob_mb=300,
+        ignored=50000,
+        ),
+    }
+
+BLEND_PATH = "scene.blend"
+IGNORED_DIR = "render"
+
+# stamp file of completely generated repository
+STAMP = ".blendgit-bench.json"
+
+IDENT = "Bench <bench@example.com>"
+
+ENV = dict(
+    os.environ,
+    GIT_AUTHOR_NAME="Bench",
+    GIT_AUTHOR_EMAIL="bench@example.com",
+    GIT_COMMITTER_NAME="Bench",
+    GIT_COMMITTER_EMAIL="bench@example.com",
+    )
+
+
+def params_of(scale, **overrides) -> dict:
+    params = dict(SCALES[scale])
+    params.update({k: v for k, v in overrides.items() if v is not None})
+    return params
+
+
+def repo_dir(workdir, params) -> str:
+    key = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+    return os.path.join(workdir, f"repo-{key}")
+
+
+def tracked_path(i) -> str:
+    # 100 files per directory, 3 levels
+    return f"assets/d{i // 10000:02d}/d{i // 100 % 100:02d}/file{i:06d}.txt"
+
+
+class FastImport:
+    def __init__(self, git, rootdir):
+        self.p = subprocess.Popen(
+            [git, "fast-import", "--quiet", "--done"],
+            stdin=subprocess.PIPE,
+            cwd=rootdir,
+            env=ENV
+            )
+        self.w = self.p.stdin
+        self.mark = 0
+        self.time = 1600000000
+
+    def write(self, text):
+        self.w.write(text.encode())
+
+    def data(self, data: bytes):
+        self.write(f"data {len(data)}\n")
+        self.w.write(data)
+        self.write("\n")
+
+    def stream_data(self, size, chunk=1 << 20, seed=0):
+        # incompressible blob like .blend without building it in memory
+        rng = random.Random(seed)
+        self.write(f"data {size}\n")
+        written = 0
+        while written < size:
+            n = min(chunk, size - written)
+            self.w.write(rng.getrandbits(8 * n).to_bytes(n, 'little'))
+            written += n
+        self.write("\n")
+
+    def commit(self, ref, message, changes, parents=()) -> 'mark: int':
+        self.mark += 1
+        self.time += 60
+        self.write(f"commit {ref}\nmark :{self.mark}\n")
+        self.write(f"committer {IDENT} {self.time} +0000\n")
+        self.data(message.encode())
+        for i, parent in enumerate(parents):
+            self.write(f"{'from' if i == 0 else 'merge'} :{parent}\n")
+        for change in changes:
+            change(self)
+        self.write("\n")
+        return self.mark
+
+    def close(self):
+        self.write("done\n")
+        self.w.close()
+        if self.p.wait():
+            raise RuntimeError("git fast-import failed")
+
+
+def generate(rootdir, params, git="git", log=print) -> str:
+    '''
+    Create repository with params at rootdir (skipped when already done).
+    params: files, commits, branches, stashes, blob_mb, ignored
+    '''
+    stamp = os.path.join(rootdir, STAMP)
+    if os.path.isfile(stamp):
+        return rootdir
+    if os.path.isdir(rootdir):
+        shutil.rmtree(rootdir)
+    os.makedirs(rootdir)
+
+    run = lambda *args: subprocess.run([git, *args], cwd=rootdir, env=ENV, check=True,
+                                       stdout=subprocess.DEVNULL)
+    run("init", "-q")
+    run("symbolic-ref", "HEAD", "refs/heads/master")
+    run("config", "core.autocrlf", "false")
+
+    rng = random.Random(0)
+    n_files = params['files']
+    n_commits = max(params['commits'], 1)
+    n_branches = params['branches']
+    blob_size = params['blob_mb'] << 20
+
+    log(f"fast-import: {n_files} files, {n_commits} commits, {n_branches} branches")
+    fi = FastImport(git, rootdir)
+
+    def initial(fi):
+        fi.write(f"M 100644 inline .gitignore\n")
+        fi.data(f"{IGNORED_DIR}/\n".encode())
+        for i in range(n_files):
+            fi.write(f"M 100644 inline {tracked_path(i)}\n")
+            fi.data(f"file {i}\n".encode())
+        fi.write(f"M 100644 inline {BLEND_PATH}\n")
+        fi.stream_data(blob_size)
+
+    def modify(path, text):
+        def change(fi):
+            fi.write(f"M 100644 inline {path}\n")
+            fi.data(text.encode())
+        return change
+
+    head = fi.commit("refs/heads/master", "initial", [initial])
+
+    # side branches fork from master, get a few commits and merge back
+    fork_every = max(n_commits // max(n_branches, 1), 2)
+    side = None
+    for c in range(1, n_commits):
+        path = tracked_path(rng.randrange(n_files)) if n_files else "readme.txt"
+        change = modify(path, f"commit {c}\n")
+
+        if n_branches and c % fork_every == 0 and c // fork_every <= n_branches:
+            b = c // fork_every
+            side = (f"refs/heads/branch-{b:04d}", fi.commit(
+                f"refs/heads/branch-{b:04d}", f"branch {b} work", [change], [head]))
+        elif side and c % fork_every == fork_every // 2:
+            # merge every other branch back: multi-line --graph output
+            ref, mark = side
+            if (int(ref[-4:]) % 2) == 0:
+                head = fi.commit("refs/heads/master", f"merge {ref}", [], [head, mark])
+            side = None
+        else:
+            head = fi.commit("refs/heads/master", f"commit {c}", [change], [head])
+
+    # second revision of the .blend
+    if blob_size:
+        def blend(fi):
+            fi.write(f"M 100644 inline {BLEND_PATH}\n")
+            fi.stream_data(blob_size, seed=1)
+        head = fi.commit("refs/heads/master", "update scene", [blend], [head])
+    fi.close()
+
+    log("checkout worktree")
+    run("checkout", "-q", "-f", "master")
+
+    log(f"stash: {params['stashes']}")
+    for s in range(params['stashes']):
+        path = os.path.join(rootdir, tracked_path(s % max(n_files, 1)) if n_files else "readme.txt")
+        with open(path, "a") as f:
+            f.write(f"stash {s}\n")
+        run("stash", "push", "-q", "-m", f"stash {s}")
+
+    log(f"ignored: {params['ignored']} files")
+    for i in range(params['ignored']):
+        dirpath = os.path.join(rootdir, IGNORED_DIR, f"shot{i // 1000:03d}", f"layer{i // 100 % 10}")
+        os.makedirs(dirpath, exist_ok=True)
+        with open(os.path.join(dirpath, f"frame{i:06d}.png"), "wb") as f:
+            f.write(b"\x89PNG")
+
+    # dirty worktree: modified and untracked entries in status
+    for i in range(0, n_files, max(n_files // 100, 1)):
+        with open(os.path.join(rootdir, tracked_path(i)), "a") as f:
+            f.write("modified\n")
+    for i in range(100):
+        with open(os.path.join(rootdir, f"untracked{i:03d}.txt"), "w") as f:
+            f.write("untracked\n")
+
+    with open(stamp, "w") as f:
+        json.dump(params, f)
+    # keep stamp out of status
+    with open(os.path.join(rootdir, ".git", "info", "exclude"), "a") as f:
+        f.write(STAMP + "\n")
+    return rootdir
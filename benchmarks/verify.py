@@ -0,0 +1,128 @@
+import os
+import random
+import subprocess
+
+from . import import_addon_module, synth
+
+
+# Cross-check of the in-process object database (backend_odb) against the git CLI.
+# Run on the generated repository, and on a bare clone of it whose pack is
+# written by pack-objects (deeper delta chains than fast-import's).
+# The log graph is checked on a path-limited log of the repository.
+
+
+def git_output(git, gitdir, *args) -> bytes:
+    return subprocess.run([git, "--git-dir", gitdir, *args], check=True,
+                          stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout
+
+
+def check(gitdir, git="git", samples=200, log=print) -> '[failure, ...]':
+    odb_module = import_addon_module("backend_odb")
+    odb = odb_module.ObjectDatabase(gitdir)
+    failures = []
+
+    def expect(name, actual, expected):
+        if actual != expected:
+            failures.append(name)
+            log(f"FAIL {name}")
+
+    try:
+        # refs
+        expected = {}
+        for line in git_output(git, gitdir, "for-each-ref", "--format=%(objectname) %(refname)").decode().splitlines():
+            sha, name = line.split(" ", 1)
+            expected[name] = sha
+        expect("refs", odb.refs(), expected)
+        expect("HEAD", odb.read_ref("HEAD"), git_output(git, gitdir, "rev-parse", "HEAD").decode().strip())
+        for name in list(expected)[:samples]:
+            expect(f"resolve {name}", odb.resolve(name), expected[name])
+
+        # history
+        commits = git_output(git, gitdir, "rev-list", "--all").decode().split()
+        expect("walk --all", [sha for sha, _ in odb.walk(["--all"])], commits)
+        expect("walk --exclude=refs/notes/* --all", [sha for sha, _ in odb.walk(["--exclude=refs/notes/*", "--all"])],
+               git_output(git, gitdir, "rev-list", "--exclude=refs/notes/*", "--all").decode().split())
+        expect("walk HEAD -n 100", [sha for sha, _ in odb.walk(["HEAD"], 100)],
+               git_output(git, gitdir, "rev-list", "-n", "100", "HEAD").decode().split())
+
+        # objects: every commit and tree, sampled blobs
+        lines = git_output(git, gitdir, "cat-file", "--batch-check", "--batch-all-objects").decode().splitlines()
+        objects = [line.split() for line in lines]
+        rng = random.Random(0)
+        blobs = [o for o in objects if o[1] == "blob"]
+        picked = [o for o in objects if o[1] != "blob"] + rng.sample(blobs, min(samples, len(blobs)))
+        log(f"{len(commits)} commits, {len(objects)} objects ({len(picked)} read) in {gitdir}")
+
+        for sha, typ, size in picked:
+            expect(f"info {sha}", odb.info(sha), (sha, typ, int(size)))
+        batch = "\n".join(sha for sha, _, _ in picked[:samples]).encode() + b"\n"
+        out = subprocess.run([git, "--git-dir", gitdir, "cat-file", "--batch"], input=batch, check=True,
+                             stdout=subprocess.PIPE).stdout
+        pos = 0
+        for sha, _, _ in picked[:samples]:
+            header_end = out.index(b"\n", pos)
+            _, typ, size = out[pos:header_end].decode().split()
+            data = out[header_end + 1:header_end + 1 + int(size)]
+            pos = header_end + 1 + int(size) + 1
+            expect(f"read {sha}", odb.read(sha), (sha, typ, data))
+
+        # abbreviated hashes as in `log --oneline`
+        for sha in commits[:samples]:
+            expect(f"resolve {sha[:7]}", odb.resolve(sha[:7]),
+                   git_output(git, gitdir, "rev-parse", "--verify", "-q", sha[:7]).decode().strip() or None)
+
+        # trees of commits
+        for sha in rng.sample(commits, min(10, len(commits))):
+            expected = {}
+            for entry in git_output(git, gitdir, "ls-tree", "-r", "-z", sha).split(b"\0")[:-1]:
+                meta, path = entry.split(b"\t", 1)
+                mode, typ, blob = meta.decode().split()
+                if typ == "blob":
+                    expected[path.decode('utf-8', 'surrogateescape')] = blob
+            tree = odb.commit(sha)[0]["tree"][0]
+            expect(f"walk_blobs {sha}", dict(odb.walk_blobs(tree)), expected)
+    finally:
+        odb.close()
+    return failures
+
+
+def check_log_graph(rootdir, path, git="git", log=print) -> '[failure, ...]':
+    '''
+    Parents of commits in a path-limited log are listed in it (rewritten as
+    --graph does), so every lane of LaneLayout ends at a listed commit.
+    '''
+    import headless
+    headless.install()
+    backend = import_addon_module("backend_git")
+    log_graph = import_addon_module("log_graph")
+    failures = []
+
+    def expect(name, actual, expected):
+        if actual != expected:
+            failures.append(name)
+            log(f"FAIL {name}: {actual!r} != {expected!r}")
+
+    pager = backend.Git(git if git != "git" else "", rootdir).log_pages(
+        ["log", "--graph", "--all", "--", path], size=100, graph_text=False
+        )
+    records = []
+    while not pager.done:
+        records += pager.next_page()
+    listed = {r.hash for r in records}
+    expect(f"log -- {path}: parents listed", {p for r in records for p in r.parents} - listed, set())
+
+    rows = log_graph.LaneLayout().extend([(r.hash, r.parents) for r in records])
+    expect(f"log -- {path}: lanes open after last commit", rows[-1].down if rows else (), ())
+    log(f"{len(records)} commits, {max((len(r.up) for r in rows), default=0)} lanes at most in log -- {path}")
+    return failures
+
+
+def run(rootdir, tempdir, git="git", log=print) -> '[failure, ...]':
+    failures = check(os.path.join(rootdir, ".git"), git, log=log)
+    # a directory of tracked files: changed by some commits of each branch
+    failures += check_log_graph(rootdir, os.path.dirname(synth.tracked_path(532)), git, log=log)
+
+    clone = os.path.join(tempdir, "verify.git")
+    subprocess.run([git, "clone", "-q", "--bare", "--no-local", rootdir, clone], check=True)
+    failures += check(clone, git, log=log)
+    return failures
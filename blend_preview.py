@@ -0,0 +1,478 @@
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import traceback
+import zlib
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import backend_odb
+from .backend_git import ALL_REFS
+from .thumbnail_store import LEVELS, Thumb
+
+try:
+    # Python 3.14
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+
+# Previews saved in .blend files as thumbnails of commits, read from the head of
+# git blobs: the preview ("TEST" block) is written right after the header and
+# render info, so the rest of the file is never inflated or loaded in Blender.
+# A commit gets the preview of the .blend it changed.
+
+
+# bytes of blob read first: header, render info and a 128 px preview
+HEAD_BYTES = 1 << 17
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class Truncated(ValueError):
+    '''More of the file is needed.'''
+
+
+def decompress_head(data, n) -> 'bytes: n bytes at least of the file (all if shorter)':
+    if data.startswith(GZIP_MAGIC):
+        try:
+            return zlib.decompressobj(31).decompress(data, n)
+        except zlib.error:
+            raise Truncated("broken gzip stream")
+    if data.startswith(ZSTD_MAGIC):
+        if zstd is None:
+            return b""
+        try:
+            return zstd.ZstdDecompressor().decompress(data, n)
+        except zstd.ZstdError:
+            raise Truncated("broken zstd stream")
+    return data
+
+
+def read_preview(data) -> 'Thumb | None: None if the file has no preview':
+    '''
+    data: head of a .blend file, compressed or not.
+    Raises Truncated when the preview is beyond data.
+    '''
+    data = decompress_head(data, HEAD_BYTES)
+    if not data.startswith(b"BLENDER"):
+        return None
+
+    if data[7:9].isdigit():
+        # "BLENDER17-01v0500": header size, format version, endian, version (Blender 5.0)
+        header = int(data[7:9])
+        endian = "<" if data[12:13] == b"v" else ">"
+        # code, SDNAnr, old pointer, len, nr
+        bhead = struct.Struct(endian + "4siQqq")
+        fields = lambda head: (head[0], head[3])
+    else:
+        # "BLENDER-v300": pointer size, endian, version
+        header = 12
+        endian = "<" if data[8:9] == b"v" else ">"
+        pointer = "Q" if data[7:8] == b"-" else "I"
+        # code, len, old pointer, SDNAnr, nr
+        bhead = struct.Struct(endian + "4si" + pointer + "ii")
+        fields = lambda head: (head[0], head[1])
+
+    pos = header
+    while True:
+        if pos + bhead.size > len(data):
+            raise Truncated("block header beyond data")
+        code, length = fields(bhead.unpack_from(data, pos))
+        pos += bhead.size
+        if code == b"TEST":
+            break
+        # preview is written before any data block
+        if code not in (b"REND",) or length < 0:
+            return None
+        pos += length
+
+    if pos + length > len(data):
+        raise Truncated("preview beyond data")
+    width, height = struct.unpack_from(endian + "ii", data, pos)
+    if width <= 0 or height <= 0 or 8 + width * height * 4 > length:
+        return None
+    # rows bottom up as ImBuf
+    start = pos + 8
+    return Thumb(width, height, bytes(data[start:start + width * height * 4]))
+
+
+def extract(reader, blob) -> 'Thumb | None':
+    obj = reader.read_head(blob, HEAD_BYTES)
+    if not obj or obj[1] != "blob":
+        return None
+    try:
+        return read_preview(obj[2])
+    except Truncated:
+        obj = reader.read(blob)
+    try:
+        return read_preview(obj[2])
+    except Truncated:
+        return None
+
+
+def blend_changes(git, prefer="") -> '{commit_hash: (path, blob_hash)}':
+    '''
+    .blend blobs added or modified by commits of all refs.
+    Of commits changing some, the one at path prefer is taken, or the first.
+    '''
+    records = git.records([
+        "log", *ALL_REFS, "--format=%x1e%H", "--raw", "--no-abbrev", "--no-renames",
+        "--diff-filter=AM", "--", "*.blend",
+        ], sep="\x1e")
+    changes = {}
+    for record in records:
+        commit, *lines = record.strip("\n").split("\n")
+        blobs = {}
+        for line in lines:
+            # ":100644 100644 <old> <new> M\t<path>"
+            meta, _, path = line.partition("\t")
+            meta = meta.split()
+            if len(meta) == 5 and path:
+                blobs[path] = meta[3]
+        if blobs:
+            path = prefer if prefer in blobs else min(blobs)
+            changes[commit] = (path, blobs[path])
+    return changes
+
+
+def put_thumb(store, thumbnails, commit_hash, thumb):
+    # a failed write is reported, other commits go on
+    try:
+        store.put(commit_hash, thumb)
+    except Exception:
+        print(f"BlendGit: thumbnail of {commit_hash} not stored", file=sys.stderr)
+        traceback.print_exc()
+        return
+    thumbnails.written(commit_hash)
+
+
+class PreviewExtractor:
+    '''
+    Previews of .blend files changed by commits, extracted on a pool of
+    workers and written into the thumbnail store. Each worker reads with
+    its own ObjectDatabase so packs are inflated in parallel.
+    Commits with a thumbnail already, or tried before in the session, are skipped.
+    History is scanned again only when refs change: reloads on save do not.
+    '''
+
+    workers = 4
+
+    def __init__(self):
+        self.__generation = 0
+        # (store key, prefer, repository fingerprint) of the last scan
+        self.__scan = None
+        # commits tried in this session
+        self.__tried = set()
+        self.__lock = threading.Lock()
+        # (done, total) of the running extraction
+        self.progress = (0, 0)
+
+    @property
+    def running(self) -> bool:
+        return self.progress[0] < self.progress[1]
+
+    def start(self, git, store, thumbnails, prefer=""):
+        '''Extract in the background unless refs are as scanned last; called on main thread.'''
+        scan = (store.key, prefer, git.cache.fingerprint())
+        with self.__lock:
+            if scan == self.__scan:
+                return
+            self.__scan = scan
+            self.__generation += 1
+            generation = self.__generation
+        thumbnails.begin_writes()
+        threading.Thread(
+            target=self.__run, args=(generation, git, store, thumbnails, prefer),
+            name="blendgit-previews", daemon=True
+            ).start()
+
+    def cancel(self):
+        with self.__lock:
+            self.__generation += 1
+            self.__scan = None
+            self.progress = (0, 0)
+
+    def reset(self):
+        self.cancel()
+        self.__tried.clear()
+
+    def __current(self, generation) -> bool:
+        return generation == self.__generation
+
+    def __report(self, generation, progress):
+        # a cancelled run does not overwrite progress of a newer one
+        with self.__lock:
+            if self.__current(generation):
+                self.progress = progress
+
+    def __run(self, generation, git, store, thumbnails, prefer):
+        try:
+            changes = blend_changes(git, prefer)
+            skip = store.commits() | self.__tried
+            # {blob: [commit, ...]}: same .blend of several commits read once
+            blobs = {}
+            for commit, (_, blob) in changes.items():
+                if commit not in skip:
+                    blobs.setdefault(blob, []).append(commit)
+            self.__extract(generation, git, store, thumbnails, blobs)
+        except Exception:
+            print("BlendGit: previews of history not extracted", file=sys.stderr)
+            traceback.print_exc()
+            with self.__lock:
+                if self.__current(generation):
+                    self.__scan = None
+        finally:
+            thumbnails.end_writes()
+
+    def __extract(self, generation, git, store, thumbnails, blobs):
+        gitdir = git.cache.gitdir
+        local = threading.local()
+        databases = []
+
+        def work(blob):
+            if not self.__current(generation):
+                return None
+            reader = getattr(local, 'reader', None)
+            if reader is None:
+                if git.use_odb and gitdir:
+                    reader = local.reader = backend_odb.ObjectDatabase(gitdir)
+                    databases.append(reader)
+                else:
+                    reader = local.reader = git.catfile
+            try:
+                return extract(reader, blob)
+            except (LookupError, ValueError, OSError, zlib.error):
+                # not in packs or loose objects (alternates, promisor remotes)
+                return extract(git.catfile, blob)
+
+        self.__report(generation, (0, len(blobs)))
+        try:
+            with ThreadPoolExecutor(self.workers, thread_name_prefix="blendgit-preview") as pool:
+                futures = {pool.submit(work, blob): commits for blob, commits in blobs.items()}
+                for done, future in enumerate(as_completed(futures), 1):
+                    if not self.__current(generation):
+                        for f in futures:
+                            f.cancel()
+                        break
+                    thumb = future.result()
+                    for commit in futures[future]:
+                        self.__tried.add(commit)
+                        if thumb is not None:
+                            put_thumb(store, thumbnails, commit, thumb)
+                    self.__report(generation, (done, len(blobs)))
+        finally:
+            self.__report(generation, (0, 0))
+            for odb in databases:
+                odb.close()
+
+
+# +++++++++++++++++++++++++++++++++++++++++++++
+#
+#   Rendered thumbnails
+#
+# +++++++++++++++++++++++++++++++++++++++++++++
+
+# run by `blender -b <file> --python-expr RENDER_SCRIPT -- <out> <size> <engine>`:
+# renders the scene camera, or a camera fit to visible objects, and writes
+# width, height and RGBA 8-bit rows bottom up into out
+RENDER_SCRIPT = '''
+import bpy, struct, sys
+from array import array
+from mathutils import Vector
+out, size, engine = sys.argv[sys.argv.index("--") + 1:][:3]
+size = int(size)
+scene = bpy.context.scene
+render = scene.render
+engines = {e.identifier for e in render.bl_rna.properties["engine"].enum_items}
+if engine == "EEVEE":
+    render.engine = "BLENDER_EEVEE_NEXT" if "BLENDER_EEVEE_NEXT" in engines else "BLENDER_EEVEE"
+    scene.eevee.taa_render_samples = 16
+else:
+    render.engine = "BLENDER_WORKBENCH"
+scale = size / max(render.resolution_x, render.resolution_y, 1)
+render.resolution_x = max(round(render.resolution_x * scale), 1)
+render.resolution_y = max(round(render.resolution_y * scale), 1)
+render.resolution_percentage = 100
+if scene.camera is None:
+    camera = bpy.data.objects.new("blendgit", bpy.data.cameras.new("blendgit"))
+    scene.collection.objects.link(camera)
+    camera.rotation_euler = (1.1, 0.0, 0.8)
+    scene.camera = camera
+    coords = [c for o in scene.objects if o.type in {"MESH", "CURVE", "SURFACE", "META", "FONT"} and o.visible_get()
+              for corner in o.bound_box for c in o.matrix_world @ Vector(corner)]
+    if coords:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        camera.location = camera.camera_fit_coords(depsgraph, coords)[0]
+render.image_settings.file_format = "PNG"
+render.image_settings.color_mode = "RGBA"
+render.filepath = out + ".png"
+bpy.ops.render.render(write_still=True)
+image = bpy.data.images.load(out + ".png")
+width, height = image.size
+pixels = array("f", bytes(4 * width * height * 4))
+image.pixels.foreach_get(pixels)
+with open(out, "wb") as f:
+    f.write(struct.pack(">II", width, height))
+    f.write(bytes(min(max(round(v * 255), 0), 255) for v in pixels))
+'''
+
+RENDER_HEADER = struct.Struct(">II")
+
+
+class RenderPool:
+    '''
+    Thumbnails rendered by `blender -b` processes for .blend files without
+    a preview, a job per blob. Jobs run on a pool of workers apart from
+    operators and panels, results are written into the thumbnail store.
+    '''
+
+    workers = 2
+    engine = 'WORKBENCH'
+    # pixels of the longest side, as the POPUP level
+    size = LEVELS['POPUP']
+    # seconds per render at most
+    timeout = 300.0
+
+    def __init__(self):
+        self.__generation = 0
+        self.__lock = threading.Lock()
+        self.__processes = set()
+        self.running = False
+        # (done, total) of the running jobs
+        self.progress = (0, 0)
+
+    def start(self, git, store, thumbnails, binary_path, prefer=""):
+        '''Render in the background; called on main thread.'''
+        with self.__lock:
+            self.__generation += 1
+            generation = self.__generation
+        self.running = True
+        self.progress = (0, 0)
+        thumbnails.begin_writes()
+        threading.Thread(
+            target=self.__run, args=(generation, git, store, thumbnails, binary_path, prefer),
+            name="blendgit-renders", daemon=True
+            ).start()
+
+    def cancel(self):
+        with self.__lock:
+            self.__generation += 1
+            for process in self.__processes:
+                process.kill()
+            self.progress = (0, 0)
+        self.running = False
+
+    def __current(self, generation) -> bool:
+        return generation == self.__generation
+
+    def __report(self, generation, progress):
+        with self.__lock:
+            if self.__current(generation):
+                self.progress = progress
+
+    def __run(self, generation, git, store, thumbnails, binary_path, prefer):
+        tempdir = tempfile.mkdtemp(prefix="blendgit-render-")
+        try:
+            changes = blend_changes(git, prefer)
+            stored = store.commits()
+            # {(path, blob): [commit, ...]}: newest first, as logged
+            jobs = {}
+            for commit, (path, blob) in changes.items():
+                if commit not in stored:
+                    jobs.setdefault((path, blob), []).append(commit)
+            self.__render(generation, git, store, thumbnails, binary_path, tempdir, jobs)
+        except Exception:
+            print("BlendGit: thumbnails of history not rendered", file=sys.stderr)
+            traceback.print_exc()
+        finally:
+            shutil.rmtree(tempdir, ignore_errors=True)
+            if self.__current(generation):
+                self.running = False
+            thumbnails.end_writes()
+
+    def __render(self, generation, git, store, thumbnails, binary_path, tempdir, jobs):
+        def work(n, path, blob) -> 'Thumb | None':
+            if not self.__current(generation):
+                return None
+            # previews are read, not rendered
+            try:
+                thumb = extract(git.odb or git.catfile, blob)
+            except (LookupError, ValueError, OSError, zlib.error):
+                thumb = extract(git.catfile, blob)
+            if thumb is not None:
+                return thumb
+            dirpath = os.path.join(tempdir, str(n))
+            os.mkdir(dirpath)
+            filepath = os.path.join(dirpath, os.path.basename(path))
+            if not git.backup(blob, filepath):
+                return None
+            return self.__render_file(generation, binary_path, filepath, os.path.join(dirpath, "thumbnail"))
+
+        self.__report(generation, (0, len(jobs)))
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="blendgit-render") as pool:
+            futures = {
+                pool.submit(work, n, path, blob): commits
+                for n, ((path, blob), commits) in enumerate(jobs.items())
+                }
+            for done, future in enumerate(as_completed(futures), 1):
+                if not self.__current(generation):
+                    for f in futures:
+                        f.cancel()
+                    break
+                try:
+                    thumb = future.result()
+                except (OSError, ValueError) as e:
+                    print("BlendGit:", e, file=sys.stderr)
+                    thumb = None
+                if thumb is not None:
+                    for commit in futures[future]:
+                        put_thumb(store, thumbnails, commit, thumb)
+                self.__report(generation, (done, len(jobs)))
+
+    def __render_file(self, generation, binary_path, filepath, out) -> 'Thumb | None':
+        cmd = [
+            binary_path, "-b", "--factory-startup", filepath,
+            "--python-exit-code", "1", "--python-expr", RENDER_SCRIPT,
+            "--", out, str(self.size), self.engine,
+            ]
+        with self.__lock:
+            if not self.__current(generation):
+                return None
+            process = subprocess.Popen(
+                cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                cwd=os.path.dirname(filepath)
+                )
+            self.__processes.add(process)
+        try:
+            _, err = process.communicate(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            print(f"BlendGit: rendering timed out: {filepath}", file=sys.stderr)
+            return None
+        finally:
+            with self.__lock:
+                self.__processes.discard(process)
+        if process.returncode != 0 or not os.path.isfile(out):
+            if self.__current(generation):
+                print(f"BlendGit: rendering failed: {filepath}", err.decode(errors="replace")[-2000:], file=sys.stderr)
+            return None
+        with open(out, "rb") as f:
+            data = f.read()
+        width, height = RENDER_HEADER.unpack_from(data)
+        return Thumb(width, height, data[RENDER_HEADER.size:])
+
+
+extractor = PreviewExtractor()
+renderer = RenderPool()
+
+
+def unregister():
+    renderer.cancel()
+    extractor.reset()
@@ -47,4 +47,17 @@ def get_archive_path(context):
     return dirpath
 
 
+def get_blend_path(context) -> 'str: path of the open file in the repository, "" if out of it':
+    filepath = context.blend_data.filepath
+    rootdir = get_git_context(context).rootdir
+    if not filepath or not rootdir:
+        return ""
+    try:
+        path = os.path.relpath(filepath, rootdir)
+    except ValueError:
+        # on another drive
+        return ""
+    return "" if path.startswith(os.pardir) else path.replace(os.sep, "/")
+
+
 __all__ = []
\ No newline at end of file
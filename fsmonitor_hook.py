@@ -0,0 +1,41 @@
+'''
+core.fsmonitor hook (protocol version 2) answered by the watcher of a running BlendGit:
+
+    git -c core.fsmonitor='"<python>" "<this file>" "<socket>"' status
+
+git appends <version> <token>. Exits with 1 when the watcher is not reachable,
+so git scans the worktree itself.
+'''
+
+import socket
+import sys
+
+
+def main(argv) -> int:
+    if len(argv) < 3 or argv[2] != "2":
+        return 1
+    socket_path, token = argv[1], argv[3] if len(argv) > 3 else ""
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(5.0)
+            s.connect(socket_path)
+            s.sendall(token.encode('utf-8', 'surrogateescape') + b"\n")
+            chunks = []
+            while True:
+                chunk = s.recv(1 << 16)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+    except OSError:
+        return 1
+
+    response = b"".join(chunks)
+    if not response:
+        return 1
+    sys.stdout.buffer.write(response)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,141 @@
+'''
+Headless stand-in of the Blender API used by BlendGit.
+
+The addon, its operators and panels run outside Blender, so the git layer
+can be profiled and load tested on a machine without Blender:
+
+    import headless
+    headless.load_addon()
+    context = headless.open_mainfile("/path/to/repo/scene.blend")
+
+    import bpy
+    bpy.ops.git.stage(target_ref="scene.blend")
+    headless.run()      # modal operators and timers until idle
+
+    python -m headless --stats 30 /path/to/repo/scene.blend git.reload
+
+The stand-in modules (bpy, gpu, bgl, gpu_extras, mathutils) in modules/ are put on
+sys.path only when the real bpy can not be imported. They cover what the
+addon uses: properties with defaults, clamping, get/set and update
+callbacks, PropertyGroup and CollectionProperty, WindowManager.git_context,
+bpy.data images and textures, operator poll / invoke / modal / report,
+app handlers and timers, and UI layouts recording what panels draw.
+Nothing is rendered (offscreens read back zeros) and .blend files are neither
+read nor written.
+Dialogs are confirmed at once.
+'''
+
+import importlib.util
+import os
+import sys
+import time
+
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "modules")
+
+
+def install() -> 'bool: stand-in is used':
+    if MODULES_DIR in sys.path:
+        return True
+    if importlib.util.find_spec("bpy") is not None:
+        return False
+    sys.path.insert(0, MODULES_DIR)
+    return True
+
+
+def load_addon(name="blendgit") -> 'module: registered addon':
+    '''
+    Import the addon as package `name` and register it.
+    '''
+    install()
+    module = sys.modules.get(name)
+    if module is not None and getattr(module, '_headless_registered', False):
+        return module
+
+    spec = importlib.util.spec_from_file_location(
+        name,
+        os.path.join(ADDON_DIR, "__init__.py"),
+        submodule_search_locations=[ADDON_DIR]
+        )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+
+    module.register()
+    module._headless_registered = True
+    return module
+
+
+def unload_addon(name="blendgit"):
+    module = sys.modules.get(name)
+    if module is not None and getattr(module, '_headless_registered', False):
+        module.unregister()
+        module._headless_registered = False
+
+
+def open_mainfile(filepath) -> 'bpy.types.Context':
+    '''
+    Open .blend as Blender would: load handlers run (git.reload for the addon).
+    The file itself is not read and need not be a .blend.
+    '''
+    import bpy
+    bpy.ops.wm.open_mainfile(filepath=filepath)
+    return bpy.context
+
+
+def process_events() -> 'bool: modal operators or timers remain':
+    import bpy
+    wm = bpy.context.window_manager
+    now = time.monotonic()
+
+    for _ in range(wm._due_timers(now)):
+        wm._handle(bpy.types.Event('TIMER'))
+    bpy.app.timers._run_due(now)
+
+    return bool(wm._handlers or bpy.app.timers._timers)
+
+
+def send_event(type, value='PRESS', **attrs):
+    '''
+    Event to modal operators, e.g. send_event('ESC') to cancel a git command.
+    '''
+    import bpy
+    bpy.context.window_manager._handle(bpy.types.Event(type, value, **attrs))
+
+
+def run(timeout=None, interval=0.005) -> 'bool: became idle':
+    '''
+    Process events until no modal operator or timer remains, or timeout.
+    '''
+    end = None if timeout is None else time.monotonic() + timeout
+    while process_events():
+        if end is not None and time.monotonic() > end:
+            return False
+        time.sleep(interval)
+    return True
+
+
+def draw(cls, context=None) -> 'UILayout | None: None if poll failed':
+    '''
+    Draw Panel / Menu / Header / Operator class once, as a redraw would.
+    '''
+    import bpy
+    context = context or bpy.context
+    if hasattr(cls, 'poll') and not cls.poll(context):
+        return None
+
+    obj = cls()
+    obj.layout = bpy.types.UILayout()
+    if hasattr(obj, 'draw_header'):
+        obj.draw_header(context)
+    obj.draw(context)
+    return obj.layout
+
+
+def reports(clear=False) -> '[(bl_idname, {type}, message), ...]':
+    import bpy
+    result = list(bpy.types._reports)
+    if clear:
+        bpy.types._reports.clear()
+    return result
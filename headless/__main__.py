@@ -0,0 +1,83 @@
+import argparse
+import ast
+import cProfile
+import pstats
+import sys
+import time
+
+from . import load_addon, open_mainfile, run, reports
+
+
+def parse_operator(text) -> '(idname, {property: value})':
+    '''
+    "git.stage:target_ref=scene.blend,..." -> ("git.stage", {"target_ref": "scene.blend"})
+    Values are Python literals, or strings otherwise.
+    '''
+    idname, _, args = text.partition(":")
+    properties = {}
+    for arg in filter(None, args.split(",")):
+        key, _, value = arg.partition("=")
+        try:
+            properties[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            properties[key] = value
+    return idname, properties
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m headless",
+        description="Open a file of a repository with the addon outside Blender and run operators."
+        )
+    parser.add_argument("filepath", help="file in the repository, opened as the main .blend")
+    parser.add_argument("operators", nargs="*", metavar="OPERATOR",
+                        help="e.g. git.reload, git.stage:target_ref=scene.blend (invoked)")
+    parser.add_argument("--addon", default="blendgit", help="package name of the addon")
+    parser.add_argument("--exec", action="store_true", help="EXEC_DEFAULT instead of INVOKE_DEFAULT")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="seconds to wait for modal operators and timers")
+    parser.add_argument("--profile", help="write cProfile stats to file")
+    parser.add_argument("--stats", type=int, default=0, help="print top N functions by cumulative time")
+    args = parser.parse_args(argv)
+
+    load_addon(args.addon)
+    import bpy
+
+    profile = cProfile.Profile() if args.profile or args.stats else None
+    if profile:
+        profile.enable()
+
+    t = time.perf_counter()
+    open_mainfile(args.filepath)
+    run(args.timeout)
+    print(f"open_mainfile: {(time.perf_counter() - t) * 1000:.1f} ms")
+
+    status = 0
+    for text in args.operators:
+        idname, properties = parse_operator(text)
+        module, _, name = idname.partition(".")
+        op = getattr(getattr(bpy.ops, module), name)
+
+        t = time.perf_counter()
+        result = op('EXEC_DEFAULT' if args.exec else 'INVOKE_DEFAULT', **properties)
+        idle = run(args.timeout)
+        print(f"{idname}: {sorted(result)} {(time.perf_counter() - t) * 1000:.1f} ms"
+              + ("" if idle else " (timeout)"))
+        if 'CANCELLED' in result or not idle:
+            status = 1
+
+    if profile:
+        profile.disable()
+
+    for idname, type, message in reports():
+        print(f"{'/'.join(sorted(type))}: {idname}: {message}")
+
+    if args.profile:
+        profile.dump_stats(args.profile)
+    if args.stats:
+        pstats.Stats(profile).sort_stats('cumulative').print_stats(args.stats)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
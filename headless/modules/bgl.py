@@ -0,0 +1,18 @@
+'''
+Headless stand-in of Blender's bgl module: calls do nothing.
+'''
+
+GL_BLEND = 0x0BE2
+GL_DEPTH_TEST = 0x0B71
+GL_LINE_SMOOTH = 0x0B20
+GL_RGBA = 0x1908
+GL_UNSIGNED_BYTE = 0x1401
+GL_FLOAT = 0x1406
+
+
+def glEnable(cap):
+    pass
+
+
+def glDisable(cap):
+    pass
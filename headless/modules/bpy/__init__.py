@@ -0,0 +1,9 @@
+'''
+Headless stand-in of Blender's bpy module, see headless/__init__.py.
+'''
+
+from . import types, props, utils, app, ops, path
+
+
+data = types.BlendData()
+context = types.Context(data)
@@ -0,0 +1,13 @@
+import os
+import tempfile
+
+from . import handlers, timers
+
+
+version = (2, 83, 0)
+version_string = "2.83.0 (headless)"
+background = True
+binary_path = ""
+debug = False
+
+tempdir = tempfile.gettempdir() + os.sep
@@ -0,0 +1,32 @@
+def persistent(function):
+    # kept on file load
+    function._bpy_persistent = True
+    return function
+
+
+load_pre = []
+load_post = []
+save_pre = []
+save_post = []
+undo_pre = []
+undo_post = []
+redo_pre = []
+redo_post = []
+depsgraph_update_pre = []
+depsgraph_update_post = []
+frame_change_pre = []
+frame_change_post = []
+
+
+def _all():
+    return [value for name, value in globals().items() if type(value) is list and not name.startswith('_')]
+
+
+def _run(handlers, arg):
+    for function in list(handlers):
+        function(arg)
+
+
+def _clear_not_persistent():
+    for handlers in _all():
+        handlers[:] = [f for f in handlers if getattr(f, '_bpy_persistent', False)]
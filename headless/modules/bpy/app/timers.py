@@ -0,0 +1,45 @@
+import time
+
+
+# [[due, function, persistent], ...]
+_timers = []
+
+
+def register(function, first_interval=0, persistent=False):
+    _timers.append([time.monotonic() + first_interval, function, persistent])
+
+
+def unregister(function):
+    for timer in _timers:
+        if timer[1] is function:
+            _timers.remove(timer)
+            return
+    raise ValueError("Error: function is not registered")
+
+
+def is_registered(function) -> bool:
+    return any(timer[1] is function for timer in _timers)
+
+
+def _run_due(now) -> int:
+    '''Call due timer functions. Returns number of called.'''
+    count = 0
+    for timer in [t for t in _timers if t[0] <= now]:
+        if timer not in _timers:
+            continue
+        count += 1
+        interval = timer[1]()
+        if interval is None:
+            if timer in _timers:
+                _timers.remove(timer)
+        else:
+            timer[0] = time.monotonic() + interval
+    return count
+
+
+def _next_due() -> 'float | None':
+    return min((t[0] for t in _timers), default=None)
+
+
+def _clear_not_persistent():
+    _timers[:] = [t for t in _timers if t[2]]
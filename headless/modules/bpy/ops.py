@@ -0,0 +1,128 @@
+'''
+bpy.ops.<module>.<name>(exec_context, **properties)
+Registered operators run through poll, invoke or execute as in Blender.
+Of Blender's own operators, only main file operators are provided:
+they run the app handlers, .blend files are not read or written.
+'''
+
+import os
+
+from . import types
+from .app import handlers, timers
+
+
+# bl_idname: function(**properties) -> {result}
+_builtins = {}
+
+
+def _builtin(idname):
+    def decorator(function):
+        _builtins[idname] = function
+        return function
+    return decorator
+
+
+def _load(filepath):
+    from . import data
+    handlers._run(handlers.load_pre, filepath)
+    handlers._clear_not_persistent()
+    timers._clear_not_persistent()
+    data.reset()
+    data.filepath = filepath
+    data.is_dirty = False
+    handlers._run(handlers.load_post, filepath)
+
+
+@_builtin("wm.open_mainfile")
+def _(filepath="", load_ui=True, use_scripts=True):
+    if not os.path.isfile(filepath):
+        raise RuntimeError(f"Error: Cannot read file '{filepath}': No such file or directory")
+    _load(os.path.abspath(filepath))
+    return {'FINISHED'}
+
+
+@_builtin("wm.revert_mainfile")
+def _(use_scripts=True):
+    from . import data
+    if not data.filepath:
+        raise RuntimeError("Operator bpy.ops.wm.revert_mainfile.poll() failed, context is incorrect")
+    _load(data.filepath)
+    return {'FINISHED'}
+
+
+@_builtin("wm.save_mainfile")
+def _(filepath="", check_existing=True):
+    from . import data
+    filepath = os.path.abspath(filepath) if filepath else data.filepath
+    if not filepath:
+        raise RuntimeError("Error: Unable to save an unsaved file with an empty or unset \"filepath\" property")
+    handlers._run(handlers.save_pre, filepath)
+    data.filepath = filepath
+    data.is_dirty = False
+    handlers._run(handlers.save_post, filepath)
+    return {'FINISHED'}
+
+
+@_builtin("wm.url_open")
+def _(url=""):
+    return {'FINISHED'}
+
+
+class _BPyOpsSubModOp:
+    def __init__(self, module, func):
+        self.idname = f"{module}.{func}"
+
+    def __repr__(self):
+        return f"bpy.ops.{self.idname}()"
+
+    def __operator(self):
+        cls = types._operators.get(self.idname)
+        if cls is None and self.idname not in _builtins:
+            raise AttributeError(f'Calling operator "bpy.ops.{self.idname}" error, could not be found')
+        return cls
+
+    def poll(self, *args) -> bool:
+        from . import context
+        cls = self.__operator()
+        return cls is None or not hasattr(cls, 'poll') or bool(cls.poll(context))
+
+    def __call__(self, *args, **properties):
+        from . import context
+        exec_context = next((arg for arg in args if isinstance(arg, str)), 'EXEC_DEFAULT')
+
+        cls = self.__operator()
+        if cls is None:
+            return _builtins[self.idname](**properties)
+
+        op = cls()
+        for name, value in properties.items():
+            if types.rna_property(cls, name) is None:
+                raise TypeError(
+                    f'Converting py args to operator properties: : keyword "{name}" unrecognized'
+                    )
+            setattr(op, name, value)
+
+        if hasattr(cls, 'poll') and not cls.poll(context):
+            raise RuntimeError(f"Operator bpy.ops.{self.idname}.poll() failed, context is incorrect")
+
+        if exec_context.startswith('INVOKE') and hasattr(op, 'invoke'):
+            return op.invoke(context, types.Event())
+        if hasattr(op, 'execute'):
+            return op.execute(context)
+        raise RuntimeError(f"Operator bpy.ops.{self.idname}.poll() failed, context is incorrect")
+
+
+class _BPyOpsSubMod:
+    def __init__(self, module):
+        self.__module = module
+
+    def __getattr__(self, func):
+        if func.startswith("__"):
+            raise AttributeError(func)
+        return _BPyOpsSubModOp(self.__module, func)
+
+
+def __getattr__(module):
+    if module.startswith("__"):
+        raise AttributeError(module)
+    return _BPyOpsSubMod(module)
@@ -0,0 +1,38 @@
+import os
+
+
+def abspath(path, start=None, library=None) -> str:
+    if path.startswith("//"):
+        if start is None:
+            from . import data
+            start = os.path.dirname(data.filepath)
+        path = os.path.join(start, path[2:])
+    return path
+
+
+def relpath(path, start=None) -> str:
+    if not path.startswith("//"):
+        if start is None:
+            from . import data
+            start = os.path.dirname(data.filepath)
+        if start:
+            path = "//" + os.path.relpath(path, start)
+    return path
+
+
+def basename(path) -> str:
+    return os.path.basename(path[2:] if path.startswith("//") else path)
+
+
+def native_pathsep(path) -> str:
+    return path.replace("/", os.sep).replace("\\", os.sep)
+
+
+def ensure_ext(filepath, ext, case_sensitive=False) -> str:
+    if (filepath if case_sensitive else filepath.lower()).endswith(ext if case_sensitive else ext.lower()):
+        return filepath
+    return filepath + ext
+
+
+def clean_name(name, replace="_") -> str:
+    return "".join(c if c.isalnum() or c in "-." else replace for c in name)
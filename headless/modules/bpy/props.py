@@ -0,0 +1,75 @@
+'''
+Property definitions.
+Resolved into RNA properties of the class by bpy.utils.register_class,
+or on assignment to a class attribute (e.g. WindowManager.git_context).
+'''
+
+
+class _PropertyDeferred:
+    __slots__ = ('function', 'keywords')
+
+    def __init__(self, function, keywords):
+        self.function = function
+        self.keywords = keywords
+
+    def __repr__(self):
+        return f"<_PropertyDeferred {self.function.__name__} {self.keywords}>"
+
+
+def BoolProperty(**keywords):
+    return _PropertyDeferred(BoolProperty, keywords)
+
+
+def BoolVectorProperty(**keywords):
+    return _PropertyDeferred(BoolVectorProperty, keywords)
+
+
+def IntProperty(**keywords):
+    return _PropertyDeferred(IntProperty, keywords)
+
+
+def IntVectorProperty(**keywords):
+    return _PropertyDeferred(IntVectorProperty, keywords)
+
+
+def FloatProperty(**keywords):
+    return _PropertyDeferred(FloatProperty, keywords)
+
+
+def FloatVectorProperty(**keywords):
+    return _PropertyDeferred(FloatVectorProperty, keywords)
+
+
+def StringProperty(**keywords):
+    return _PropertyDeferred(StringProperty, keywords)
+
+
+def EnumProperty(**keywords):
+    return _PropertyDeferred(EnumProperty, keywords)
+
+
+def PointerProperty(**keywords):
+    return _PropertyDeferred(PointerProperty, keywords)
+
+
+def CollectionProperty(**keywords):
+    return _PropertyDeferred(CollectionProperty, keywords)
+
+
+def RemoveProperty(cls, attr):
+    delattr(cls, attr)
+
+
+__all__ = (
+    'BoolProperty',
+    'BoolVectorProperty',
+    'IntProperty',
+    'IntVectorProperty',
+    'FloatProperty',
+    'FloatVectorProperty',
+    'StringProperty',
+    'EnumProperty',
+    'PointerProperty',
+    'CollectionProperty',
+    'RemoveProperty',
+    )
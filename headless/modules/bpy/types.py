@@ -0,0 +1,1061 @@
+'''
+RNA structs of the stand-in.
+Properties behave like Blender's: defaults, clamping, enum validation,
+get/set functions and update callbacks. PropertyGroups and IDs refuse
+unknown attributes as RNA structs do; operators and UI classes do not.
+'''
+
+import fnmatch
+import os
+import struct
+import sys
+import time
+
+from collections import deque
+
+from .props import _PropertyDeferred, StringProperty
+
+
+def _context():
+    return sys.modules['bpy'].context
+
+
+def _image_size(filepath) -> '(width, height): (0, 0) if unknown':
+    try:
+        with open(filepath, "rb") as f:
+            head = f.read(24)
+    except OSError:
+        return (0, 0)
+    if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+        return struct.unpack(">II", head[16:24])
+    return (0, 0)
+
+
+# registered classes
+_registered = set()
+_operators = {}     # bl_idname: Operator subclass
+_ui_classes = {}    # bl_idname: Panel / Menu / UIList / Header subclass
+
+# (bl_idname, {type}, message) of Operator.report
+_reports = deque(maxlen=10000)
+
+
+# +++++++++++++++++++++++++++++++++++++++++++++
+#
+#   Properties
+#
+# +++++++++++++++++++++++++++++++++++++++++++++
+
+class RNAProperty:
+    '''
+    Descriptor of one property, made from bpy.props.*Property().
+    Values are kept in the instance __dict__ under the identifier.
+    '''
+
+    VECTORS = {
+        'BoolVectorProperty': bool,
+        'IntVectorProperty': int,
+        'FloatVectorProperty': float,
+        }
+
+    def __init__(self, identifier, deferred):
+        self.identifier = identifier
+        self.kind = deferred.function.__name__
+        self.keywords = kw = deferred.keywords
+        self.getter = kw.get('get')
+        self.setter = kw.get('set')
+        self.update = kw.get('update')
+        self.type = kw.get('type')
+        self.is_flag = 'ENUM_FLAG' in kw.get('options', ())
+        self.is_group = self.kind == 'CollectionProperty' or (
+            self.kind == 'PointerProperty' and issubclass(self.type, PropertyGroup)
+            )
+
+    def __repr__(self):
+        return f"<RNAProperty {self.kind} {self.identifier}>"
+
+    def enum_items(self, obj) -> '[(identifier, name, description, ...), ...]':
+        items = self.keywords.get('items', ())
+        if callable(items):
+            items = items(obj, _context()) or ()
+        return [item for item in items if item]
+
+    def default(self):
+        kind, kw = self.kind, self.keywords
+        if kind in self.VECTORS:
+            return tuple(kw.get('default', (self.VECTORS[kind](),) * kw.get('size', 3)))
+        elif kind == 'BoolProperty':
+            return kw.get('default', False)
+        elif kind == 'IntProperty':
+            return kw.get('default', 0)
+        elif kind == 'FloatProperty':
+            return float(kw.get('default', 0.0))
+        elif kind == 'StringProperty':
+            return kw.get('default', "")
+        elif kind == 'EnumProperty':
+            if self.is_flag:
+                return set(kw.get('default', ()))
+            if 'default' in kw:
+                return kw['default']
+            items = kw.get('items', ())
+            # dynamic items are resolved on access
+            return "" if callable(items) or not items else items[0][0]
+        elif kind == 'PointerProperty':
+            return self.type() if self.is_group else None
+        elif kind == 'CollectionProperty':
+            return bpy_prop_collection(self.type)
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return self
+        if self.getter:
+            return self.getter(obj)
+
+        values = obj.__dict__
+        try:
+            value = values[self.identifier]
+        except KeyError:
+            value = values[self.identifier] = self.default()
+
+        if self.kind == 'EnumProperty' and not self.is_flag and callable(self.keywords.get('items')):
+            ids = [item[0] for item in self.enum_items(obj)]
+            if value not in ids:
+                value = ids[0] if ids else ""
+        return value
+
+    def __set__(self, obj, value):
+        if self.is_group or (self.getter and not self.setter):
+            raise AttributeError(
+                f'bpy_struct: attribute "{self.identifier}" from "{type(obj).__name__}" is read-only'
+                )
+        value = self.coerce(obj, value)
+        if self.setter:
+            self.setter(obj, value)
+        else:
+            obj.__dict__[self.identifier] = value
+        if self.update:
+            self.update(obj, _context())
+
+    def __delete__(self, obj):
+        obj.__dict__.pop(self.identifier, None)
+
+    def __error(self, obj, message):
+        return TypeError(f"bpy_struct: item.attr = val: {type(obj).__name__}.{self.identifier} {message}")
+
+    def clamp(self, value):
+        kw = self.keywords
+        if 'min' in kw:
+            value = max(kw['min'], value)
+        if 'max' in kw:
+            value = min(kw['max'], value)
+        return value
+
+    def coerce(self, obj, value):
+        kind = self.kind
+
+        if kind == 'BoolProperty':
+            if not isinstance(value, int):
+                raise self.__error(obj, f"expected True/False or 0/1, not {type(value).__name__}")
+            return bool(value)
+
+        elif kind == 'IntProperty':
+            if not isinstance(value, int):
+                raise self.__error(obj, f"expected an int type, not {type(value).__name__}")
+            return self.clamp(int(value))
+
+        elif kind == 'FloatProperty':
+            if not isinstance(value, (int, float)):
+                raise self.__error(obj, f"expected a float type, not {type(value).__name__}")
+            return self.clamp(float(value))
+
+        elif kind == 'StringProperty':
+            if not isinstance(value, str):
+                raise self.__error(obj, f"expected a string type, not {type(value).__name__}")
+            return value
+
+        elif kind == 'EnumProperty':
+            ids = [item[0] for item in self.enum_items(obj)]
+            if self.is_flag:
+                value = set(value)
+                missing = value.difference(ids)
+                if missing:
+                    raise self.__error(obj, f"enum {missing} not found in {tuple(ids)}")
+                return value
+            if value not in ids:
+                raise self.__error(obj, f'enum "{value}" not found in {tuple(ids)}')
+            return value
+
+        elif kind in self.VECTORS:
+            value = tuple(self.clamp(self.VECTORS[kind](v)) for v in value)
+            size = self.keywords.get('size', 3)
+            if len(value) != size:
+                raise ValueError(
+                    f"bpy_struct: item.attr = val: sequences of dimension 0 should contain {size} items, not {len(value)}"
+                    )
+            return value
+
+        elif kind == 'PointerProperty':
+            if value is not None and not isinstance(value, self.type):
+                raise self.__error(obj, f"expected a {self.type.__name__} type, not {type(value).__name__}")
+            return value
+
+        return value
+
+
+def rna_property(cls, identifier) -> 'RNAProperty | None':
+    prop = getattr(cls, identifier, None)
+    return prop if isinstance(prop, RNAProperty) else None
+
+
+def rna_properties(cls) -> '{identifier: RNAProperty}':
+    props = {}
+    for klass in reversed(cls.__mro__):
+        for name, value in klass.__dict__.items():
+            if isinstance(value, RNAProperty):
+                props[name] = value
+    return props
+
+
+def deferred_properties(cls) -> '{identifier: _PropertyDeferred} of annotations':
+    props = {}
+    for klass in reversed(cls.__mro__):
+        for name, value in klass.__dict__.get('__annotations__', {}).items():
+            if isinstance(value, _PropertyDeferred):
+                props[name] = value
+    return props
+
+
+class RNAMeta(type):
+    def __setattr__(cls, name, value):
+        # WindowManager.git_context = PointerProperty(...)
+        if isinstance(value, _PropertyDeferred):
+            value = RNAProperty(name, value)
+        super().__setattr__(name, value)
+
+
+class bpy_struct(metaclass=RNAMeta):
+    # refuse attributes which are not defined on the class
+    _strict = False
+
+    def __setattr__(self, name, value):
+        if self._strict and not name.startswith('_') and not hasattr(type(self), name):
+            raise AttributeError(
+                f'bpy_struct: attribute "{name}" from "{type(self).__name__}" is read-only'
+                )
+        object.__setattr__(self, name, value)
+
+    @classmethod
+    def is_registered(cls) -> bool:
+        return cls in _registered
+
+
+class bpy_prop_collection:
+    def __init__(self, type):
+        self._type = type
+        self._items = []
+
+    def __repr__(self):
+        return f"bpy_prop_collection[{len(self._items)}] of {self._type.__name__}"
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            for item in self._items:
+                if item.name == key:
+                    return item
+            raise KeyError(f'bpy_prop_collection[key]: key "{key}" not found')
+        if isinstance(key, slice):
+            return self._items[key]
+        try:
+            return self._items[key]
+        except IndexError:
+            raise IndexError(
+                f"bpy_prop_collection[index]: index {key} out of range, size {len(self._items)}"
+                ) from None
+
+    def __contains__(self, key):
+        if not isinstance(key, str):
+            raise TypeError("bpy_prop_collection.__contains__: expected a string or a tuple of strings")
+        return any(item.name == key for item in self._items)
+
+    def get(self, key, default=None):
+        for item in self._items:
+            if item.name == key:
+                return item
+        return default
+
+    def find(self, key) -> 'index: int, -1 if not found':
+        for i, item in enumerate(self._items):
+            if item.name == key:
+                return i
+        return -1
+
+    def keys(self):
+        return [item.name for item in self._items]
+
+    def values(self):
+        return list(self._items)
+
+    def items(self):
+        return [(item.name, item) for item in self._items]
+
+    def __check_size(self, name, seq):
+        if len(seq) != len(self._items):
+            raise TypeError(
+                f"{name}(attr, sequence) sequence length mismatch given {len(seq)}, needed {len(self._items)}"
+                )
+
+    def foreach_get(self, attr, seq):
+        self.__check_size('foreach_get', seq)
+        for i, item in enumerate(self._items):
+            seq[i] = getattr(item, attr)
+
+    def foreach_set(self, attr, seq):
+        # raw write: no update callbacks, as in Blender
+        self.__check_size('foreach_set', seq)
+        prop = rna_property(self._type, attr)
+        if prop is None:
+            raise AttributeError(f'foreach_set(attr, sequence): attr "{attr}" not found')
+        for item, value in zip(self._items, seq):
+            item.__dict__[attr] = prop.coerce(item, value)
+
+    # collection of PropertyGroup
+    def add(self):
+        item = self._type()
+        self._items.append(item)
+        return item
+
+    def remove(self, index):
+        del self._items[index]
+
+    def move(self, from_index, to_index):
+        self._items.insert(to_index, self._items.pop(from_index))
+
+    def clear(self):
+        self._items.clear()
+
+
+class PropertyGroup(bpy_struct):
+    _strict = True
+
+PropertyGroup.name = StringProperty()
+
+
+# +++++++++++++++++++++++++++++++++++++++++++++
+#
+#   ID
+#
+# +++++++++++++++++++++++++++++++++++++++++++++
+
+class ID(bpy_struct):
+    _strict = True
+
+    users = 0
+    use_fake_user = False
+    library = None
+    is_evaluated = False
+
+    def __repr__(self):
+        return f"bpy.data.{type(self).__name__.lower()}s['{self.name}']"
+
+    def user_clear(self):
+        self.users = 0
+
+ID.name = StringProperty()
+
+
+class _Pixels:
+    '''Image.pixels: transparent black, files are not decoded.'''
+
+    def __init__(self, image):
+        self._image = image
+
+    def __len__(self):
+        w, h = self._image.size
+        return w * h * self._image.channels
+
+    def __getitem__(self, index):
+        return ([0.0] * len(self))[index]
+
+    def foreach_get(self, seq):
+        for i in range(len(self)):
+            seq[i] = 0.0
+
+
+class Image(ID):
+    filepath = ""
+    source = 'FILE'
+    size = (0, 0)
+    channels = 4
+    has_data = False
+
+    @property
+    def pixels(self):
+        return _Pixels(self)
+
+    def reload(self):
+        self.size = _image_size(self.filepath)
+        self.has_data = self.size != (0, 0)
+
+    def scale(self, width, height):
+        self.size = (width, height)
+
+
+class Texture(ID):
+    type = 'NONE'
+
+
+class ImageTexture(Texture):
+    type = 'IMAGE'
+    image = None
+    extension = 'REPEAT'
+    crop_min_x = 0.0
+    crop_min_y = 0.0
+    crop_max_x = 1.0
+    crop_max_y = 1.0
+
+
+class Library(ID):
+    filepath = ""
+
+
+class Object(ID):
+    type = 'EMPTY'
+
+
+class Text(ID):
+    _body = ""
+
+    def write(self, text):
+        self._body += text
+
+    def clear(self):
+        self._body = ""
+
+    def from_string(self, string):
+        self._body = string
+
+    def as_string(self):
+        return self._body
+
+
+class IDList(list):
+    def link(self, id):
+        if id in self:
+            raise RuntimeError(f"Object '{id.name}' already in collection")
+        self.append(id)
+
+    def unlink(self, id):
+        self.remove(id)
+
+
+class Collection(ID):
+    def __init__(self):
+        self.objects = IDList()
+        self.children = IDList()
+
+    objects = ()
+    children = ()
+
+
+class ViewSettings(bpy_struct):
+    view_transform = 'Filmic'
+    look = 'None'
+    exposure = 0.0
+    gamma = 1.0
+
+
+class RenderSettings(bpy_struct):
+    filepath = "/tmp/"
+    resolution_x = 1920
+    resolution_y = 1080
+    resolution_percentage = 100
+    engine = 'BLENDER_EEVEE'
+
+
+class Scene(ID):
+    def __init__(self):
+        self.collection = Collection()
+        self.collection.name = "Scene Collection"
+        self.view_settings = ViewSettings()
+        self.render = RenderSettings()
+
+    collection = None
+    view_settings = None
+    render = None
+    camera = None
+    use_nodes = False
+    node_tree = None
+    frame_current = 1
+
+
+class BlendDataCollection(bpy_prop_collection):
+    def _unique(self, name) -> str:
+        names = set(self.keys())
+        if name not in names:
+            return name
+        i = 1
+        while f"{name}.{i:03d}" in names:
+            i += 1
+        return f"{name}.{i:03d}"
+
+    def _add(self, name, type=None):
+        id = (type or self._type)()
+        id.name = self._unique(name)
+        self._items.append(id)
+        return id
+
+    def new(self, name):
+        return self._add(name)
+
+    def remove(self, id, do_unlink=True):
+        self._items.remove(id)
+
+
+class BlendDataImages(BlendDataCollection):
+    def new(self, name, width, height, alpha=False, float_buffer=False):
+        img = self._add(name)
+        img.source = 'GENERATED'
+        img.size = (width, height)
+        return img
+
+    def load(self, filepath, check_existing=False):
+        if check_existing:
+            for img in self._items:
+                if img.filepath == filepath:
+                    return img
+        if not os.path.isfile(filepath):
+            raise RuntimeError(f"Error: Cannot read image: {filepath}")
+        img = self._add(os.path.basename(filepath))
+        img.filepath = filepath
+        img.reload()
+        return img
+
+
+class BlendDataTextures(BlendDataCollection):
+    def new(self, name, type):
+        return self._add(name, ImageTexture if type == 'IMAGE' else Texture)
+
+
+class BlendDataLibraries(BlendDataCollection):
+    def load(self, filepath, link=False, relative=False):
+        raise RuntimeError(f"headless: .blend files are not read: {filepath}")
+
+
+class BlendData(bpy_struct):
+    '''bpy.data: emptied by file load, like Blender.'''
+
+    def __init__(self):
+        self.filepath = ""
+        self.is_dirty = False
+        self.reset()
+
+    def reset(self):
+        self.images = BlendDataImages(Image)
+        self.textures = BlendDataTextures(Texture)
+        self.libraries = BlendDataLibraries(Library)
+        self.collections = BlendDataCollection(Collection)
+        self.texts = BlendDataCollection(Text)
+        self.objects = BlendDataCollection(Object)
+        self.scenes = BlendDataCollection(Scene)
+        self.scenes.new("Scene")
+
+    @property
+    def is_saved(self) -> bool:
+        return bool(self.filepath)
+
+
+# +++++++++++++++++++++++++++++++++++++++++++++
+#
+#   Window Manager / Context
+#
+# +++++++++++++++++++++++++++++++++++++++++++++
+
+class Event(bpy_struct):
+    def __init__(self, type='NONE', value='NOTHING', **attrs):
+        self.type = type
+        self.value = value
+        self.mouse_x = self.mouse_y = 0
+        self.mouse_region_x = self.mouse_region_y = 0
+        self.shift = self.ctrl = self.alt = self.oskey = False
+        self.is_repeat = False
+        for k, v in attrs.items():
+            setattr(self, k, v)
+
+
+class Timer(bpy_struct):
+    def __init__(self, time_step):
+        self.time_step = time_step
+        self.time_duration = 0.0
+        self.time_delta = 0.0
+        self._start = self._last = time.monotonic()
+
+
+class WindowManager(ID):
+    '''
+    Modal handlers receive events from headless.process_events().
+    Dialogs are confirmed at once: drawn, then executed.
+    '''
+
+    def __init__(self):
+        self.name = "WinMan"
+        self._timers = []
+        self._handlers = []
+        self._uilists = {}
+
+    windows = ()
+    progress = None
+    clipboard = ""
+
+    def event_timer_add(self, time_step, window=None):
+        timer = Timer(time_step)
+        self._timers.append(timer)
+        return timer
+
+    def event_timer_remove(self, timer):
+        if timer in self._timers:
+            self._timers.remove(timer)
+
+    def modal_handler_add(self, operator):
+        # last added gets events first
+        self._handlers.insert(0, operator)
+        return True
+
+    def progress_begin(self, min, max):
+        self.progress = min
+
+    def progress_update(self, value):
+        self.progress = value
+
+    def progress_end(self):
+        self.progress = None
+
+    def __draw(self, operator):
+        if hasattr(operator, 'draw'):
+            operator.layout = UILayout()
+            operator.draw(_context())
+
+    def invoke_props_dialog(self, operator, width=300):
+        self.__draw(operator)
+        return operator.execute(_context())
+
+    def invoke_props_popup(self, operator, event):
+        return self.invoke_props_dialog(operator)
+
+    def invoke_confirm(self, operator, event):
+        return operator.execute(_context())
+
+    def invoke_popup(self, operator, width=300):
+        self.__draw(operator)
+        return {'RUNNING_MODAL'}
+
+    def invoke_search_popup(self, operator):
+        return {'RUNNING_MODAL'}
+
+    def fileselect_add(self, operator):
+        # file browser confirmed with current properties
+        operator.execute(_context())
+
+    def popup_menu(self, draw_func, title="", icon='NONE'):
+        menu = Menu()
+        menu.layout = UILayout()
+        draw_func(menu, _context())
+
+    # headless event loop
+    def _due_timers(self, now) -> int:
+        count = 0
+        for timer in list(self._timers):
+            if now - timer._last >= timer.time_step:
+                timer.time_delta = now - timer._last
+                timer.time_duration = now - timer._start
+                timer._last = now
+                count += 1
+        return count
+
+    def _handle(self, event):
+        context = _context()
+        for operator in list(self._handlers):
+            result = operator.modal(context, event)
+            if not result & {'RUNNING_MODAL', 'PASS_THROUGH'}:
+                self._handlers.remove(operator)
+            if 'PASS_THROUGH' not in result:
+                break
+
+
+class Workspace(ID):
+    status_text = None
+
+    def status_text_set(self, text):
+        self.status_text = text
+
+
+class Screen(ID):
+    def __init__(self):
+        self.areas = []
+
+    areas = ()
+
+
+class Window(bpy_struct):
+    def __init__(self, screen, workspace, scene):
+        self.screen = screen
+        self.workspace = workspace
+        self.scene = scene
+        self.width = 1920
+        self.height = 1080
+
+
+class Addon(bpy_struct):
+    def __init__(self, module, preferences):
+        self.name = self.module = module
+        self.preferences = preferences
+
+
+class PreferencesFilePaths(bpy_struct):
+    temporary_directory = ""
+    render_output_directory = ""
+
+
+class Preferences(bpy_struct):
+    def __init__(self):
+        self.addons = bpy_prop_collection(Addon)
+        self.filepaths = PreferencesFilePaths()
+
+
+class Context(bpy_struct):
+    def __init__(self, data):
+        self.blend_data = data
+        self.preferences = Preferences()
+        self.window_manager = WindowManager()
+        screen = Screen()
+        screen.name = "Layout"
+        workspace = Workspace()
+        workspace.name = "Layout"
+        self.window = Window(screen, workspace, None)
+        self.window_manager.windows = [self.window]
+        self.area = None
+        self.region = None
+        self.space_data = None
+
+    @property
+    def screen(self):
+        return self.window.screen
+
+    @property
+    def workspace(self):
+        return self.window.workspace
+
+    @property
+    def scene(self):
+        return self.window.scene or self.blend_data.scenes[0]
+
+    def copy(self) -> dict:
+        return {k: getattr(self, k) for k in ('window_manager', 'window', 'screen', 'workspace', 'scene', 'area', 'region')}
+
+
+# +++++++++++++++++++++++++++++++++++++++++++++
+#
+#   Operator / UI
+#
+# +++++++++++++++++++++++++++++++++++++++++++++
+
+class Operator(bpy_struct):
+    bl_idname = ""
+    bl_label = ""
+    bl_description = ""
+    bl_options = {'REGISTER'}
+
+    layout = None
+
+    @property
+    def properties(self):
+        return self
+
+    def report(self, type, message):
+        _reports.append((self.bl_idname, set(type), message))
+
+    def as_keywords(self, ignore=()) -> dict:
+        return {
+            name: getattr(self, name)
+            for name in rna_properties(type(self)) if name not in ignore
+            }
+
+
+class OperatorProperties(bpy_struct):
+    '''Returned by UILayout.operator(): only properties of the operator are accepted.'''
+
+    def __init__(self, idname):
+        object.__setattr__(self, '_operator', _operators.get(idname))
+
+    def __setattr__(self, name, value):
+        cls = self._operator
+        if cls is not None:
+            prop = rna_property(cls, name)
+            if prop is None:
+                raise AttributeError(f'bpy_struct: attribute "{name}" from "{cls.bl_idname}" is read-only')
+            value = prop.coerce(self, value)
+        object.__setattr__(self, name, value)
+
+
+class AddonPreferences(bpy_struct):
+    _strict = True
+    bl_idname = ""
+    layout = None
+
+
+class Panel(bpy_struct):
+    bl_idname = ""
+    bl_label = ""
+    bl_space_type = 'EMPTY'
+    bl_region_type = 'WINDOW'
+    bl_options = set()
+    layout = None
+
+
+class Menu(bpy_struct):
+    bl_idname = ""
+    bl_label = ""
+    layout = None
+
+
+class Header(bpy_struct):
+    bl_idname = ""
+    bl_space_type = 'EMPTY'
+    layout = None
+
+
+class TOPBAR_HT_upper_bar(Header):
+    bl_space_type = 'TOPBAR'
+
+    def draw(self, context):
+        self.draw_left(context)
+        self.draw_right(context)
+
+    def draw_left(self, context):
+        pass
+
+    def draw_right(self, context):
+        pass
+
+
+class UIList(bpy_struct):
+    bl_idname = ""
+    layout_type = 'DEFAULT'
+    list_id = ""
+    bitflag_filter_item = 1 << 30
+    filter_name = ""
+    use_filter_show = False
+    use_filter_invert = False
+    use_filter_sort_alpha = False
+    use_filter_sort_reverse = False
+    use_filter_sort_lock = False
+
+    # first visible row, kept across redraws
+    _scroll = 0
+
+
+class UI_UL_list(UIList):
+    @staticmethod
+    def filter_items_by_name(pattern, bitflag, items, propname="name", flags=None, reverse=False):
+        if not pattern or not items:
+            return []
+        if flags is None:
+            flags = [0] * len(items)
+        pattern = "*" + pattern + "*"
+        for i, item in enumerate(items):
+            name = getattr(item, propname, None)
+            if bool(name and fnmatch.fnmatch(name, pattern)) is not bool(reverse):
+                flags[i] |= bitflag
+        return flags
+
+    @staticmethod
+    def sort_items_helper(sort_data, key, reverse=False):
+        sort_data.sort(key=key, reverse=reverse)
+        neworder = [None] * len(sort_data)
+        for newidx, (orgidx, *_) in enumerate(sort_data):
+            neworder[orgidx] = newidx
+        return neworder
+
+    @classmethod
+    def sort_items_by_name(cls, items, propname="name"):
+        _sort = [(idx, getattr(it, propname, "")) for idx, it in enumerate(items)]
+        return cls.sort_items_helper(_sort, lambda e: e[1].lower())
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        layout.prop(item, "name", text="", emboss=False)
+
+
+class UILayout(bpy_struct):
+    '''
+    Records what is drawn: (kind, value) tuples and child layouts in items.
+    Values of drawn properties are read, so getters run as in Blender.
+    '''
+
+    def __init__(self, kind='layout'):
+        self.kind = kind
+        self.items = []
+        self.active = True
+        self.enabled = True
+        self.alert = False
+        self.scale_x = 1.0
+        self.scale_y = 1.0
+        self.ui_units_x = 0.0
+        self.ui_units_y = 0.0
+        self.use_property_split = False
+        self.use_property_decorate = True
+        self.alignment = 'EXPAND'
+        self.operator_context = 'INVOKE_DEFAULT'
+        self.emboss = 'NORMAL'
+
+    def __repr__(self):
+        return f"<UILayout {self.kind} {len(self.items)} items>"
+
+    def __child(self, kind):
+        child = UILayout(kind)
+        self.items.append(child)
+        return child
+
+    def walk(self) -> '(kind, value), ...':
+        for item in self.items:
+            if isinstance(item, UILayout):
+                yield from item.walk()
+            else:
+                yield item
+
+    def row(self, align=False, heading="", heading_ctxt="", translate=True):
+        return self.__child('row')
+
+    def column(self, align=False, heading="", heading_ctxt="", translate=True):
+        return self.__child('column')
+
+    def box(self):
+        return self.__child('box')
+
+    def split(self, factor=0.0, align=False):
+        return self.__child('split')
+
+    def grid_flow(self, row_major=False, columns=0, even_columns=False, even_rows=False, align=False):
+        return self.__child('grid_flow')
+
+    def column_flow(self, columns=0, align=False):
+        return self.__child('column_flow')
+
+    def menu_pie(self):
+        return self.__child('menu_pie')
+
+    def label(self, text="", text_ctxt="", translate=True, icon='NONE', icon_value=0):
+        self.items.append(('label', text))
+
+    def separator(self, factor=1.0):
+        self.items.append(('separator', None))
+
+    def separator_spacer(self):
+        self.items.append(('separator', None))
+
+    def __read(self, data, property) -> bool:
+        try:
+            getattr(data, property)
+        except AttributeError:
+            self.items.append(('label', f"property not found: {type(data).__name__}.{property}"))
+            return False
+        return True
+
+    def prop(self, data, property, text="", **options):
+        if self.__read(data, property):
+            self.items.append(('prop', property))
+
+    def prop_enum(self, data, property, value, text="", **options):
+        self.prop(data, property)
+
+    def props_enum(self, data, property):
+        self.prop(data, property)
+
+    def prop_menu_enum(self, data, property, text="", **options):
+        if self.__read(data, property):
+            prop = rna_property(type(data), property)
+            if prop is not None and prop.kind == 'EnumProperty':
+                prop.enum_items(data)
+            self.items.append(('prop_menu_enum', property))
+
+    def prop_search(self, data, property, search_data, search_property, text="", **options):
+        self.prop(data, property)
+
+    def operator(self, operator, text="", **options) -> OperatorProperties:
+        self.items.append(('operator', operator))
+        return OperatorProperties(operator)
+
+    def operator_menu_enum(self, operator, property, text="", **options) -> OperatorProperties:
+        self.items.append(('operator_menu_enum', operator))
+        return OperatorProperties(operator)
+
+    def menu(self, menu, text="", **options):
+        self.items.append(('menu', menu))
+
+    def popover(self, panel, text="", **options):
+        self.items.append(('popover', panel))
+
+    def context_pointer_set(self, name, data):
+        pass
+
+    def template_ID(self, data, property, **options):
+        self.prop(data, property)
+
+    def template_icon(self, icon_value, scale=1.0):
+        self.items.append(('icon', icon_value))
+
+    def template_preview(self, id, show_buttons=True, **options):
+        self.items.append(('preview', id.name if id else None))
+
+    def template_list(self, listtype_name, list_id, dataptr, propname, active_dataptr, active_propname,
+                      item_dyntip_propname="", rows=5, maxrows=5, type='DEFAULT', columns=9,
+                      sort_reverse=False, sort_lock=False):
+        '''
+        Filter items and draw the rows in view, scrolled to show the active
+        item like Blender's list.
+        '''
+        context = _context()
+        uilists = context.window_manager._uilists
+        key = (listtype_name, list_id)
+        uilist = uilists.get(key)
+        if uilist is None:
+            uilist = uilists[key] = _ui_classes.get(listtype_name, UI_UL_list)()
+            uilist.list_id = list_id
+
+        items = getattr(dataptr, propname)
+        active = getattr(active_dataptr, active_propname)
+
+        flags, order = [], []
+        if hasattr(uilist, 'filter_items'):
+            flags, order = uilist.filter_items(context, dataptr, propname)
+        bitflag = uilist.bitflag_filter_item
+        visible = [i for i in range(len(items)) if not flags or flags[i] & bitflag]
+        if order:
+            visible.sort(key=order.__getitem__)
+
+        rows = max(rows, 1)
+        start = uilist._scroll
+        if active in visible:
+            pos = visible.index(active)
+            if pos < start:
+                start = pos
+            elif pos >= start + rows:
+                start = pos - rows + 1
+        start = uilist._scroll = max(0, min(start, len(visible) - rows))
+
+        box = self.__child('template_list')
+        for index in visible[start:start + rows]:
+            item = items[index]
+            if item_dyntip_propname:
+                getattr(item, item_dyntip_propname)
+            uilist.draw_item(context, box.row(), dataptr, item, 0, active_dataptr, active_propname, index)
+
+
+__all__ = [
+    name for name, value in globals().items()
+    if isinstance(value, type) and value.__module__ == __name__ and not name.startswith('_')
+    ]
@@ -0,0 +1,47 @@
+from .. import types
+from ..props import _PropertyDeferred
+
+from . import previews
+
+
+def register_class(cls):
+    if cls in types._registered:
+        raise ValueError(f"register_class(...): already registered as a subclass '{cls.__name__}'")
+
+    # annotations into RNA properties
+    for name, deferred in types.deferred_properties(cls).items():
+        setattr(cls, name, deferred)
+
+    if issubclass(cls, types.Operator):
+        if "." not in cls.bl_idname:
+            raise ValueError(f"register_class(...): invalid bl_idname '{cls.bl_idname}' of {cls.__name__}")
+        types._operators[cls.bl_idname] = cls
+
+    elif issubclass(cls, (types.Panel, types.Menu, types.UIList, types.Header)):
+        types._ui_classes[cls.bl_idname or cls.__name__] = cls
+
+    elif issubclass(cls, types.AddonPreferences):
+        from .. import context
+        addons = context.preferences.addons
+        addons._items.append(types.Addon(cls.bl_idname, cls()))
+
+    types._registered.add(cls)
+
+
+def unregister_class(cls):
+    if cls not in types._registered:
+        raise RuntimeError(f"unregister_class(...): missing bl_rna attribute from '{cls.__name__}'")
+    types._registered.discard(cls)
+
+    if issubclass(cls, types.Operator):
+        types._operators.pop(cls.bl_idname, None)
+
+    elif issubclass(cls, (types.Panel, types.Menu, types.UIList, types.Header)):
+        types._ui_classes.pop(cls.bl_idname or cls.__name__, None)
+
+    elif issubclass(cls, types.AddonPreferences):
+        from .. import context
+        addons = context.preferences.addons
+        index = addons.find(cls.bl_idname)
+        if index != -1:
+            addons.remove(index)
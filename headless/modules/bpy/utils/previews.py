@@ -0,0 +1,42 @@
+import itertools
+
+from ..types import _image_size
+
+
+_icon_ids = itertools.count(1000)
+
+
+class ImagePreview:
+    def __init__(self, filepath=""):
+        self.icon_id = next(_icon_ids)
+        self.image_size = self.icon_size = _image_size(filepath) if filepath else (0, 0)
+        self.image_pixels = ()
+        self.is_image_custom = bool(filepath)
+
+
+class ImagePreviewCollection(dict):
+    def __repr__(self):
+        return f"<ImagePreviewCollection {len(self)} previews>"
+
+    def new(self, name):
+        if name in self:
+            raise KeyError(f"key {name!r} already exists")
+        preview = self[name] = ImagePreview()
+        return preview
+
+    def load(self, name, filepath, filetype, force_reload=False):
+        if name in self:
+            raise KeyError(f"key {name!r} already exists")
+        preview = self[name] = ImagePreview(filepath)
+        return preview
+
+    def close(self):
+        self.clear()
+
+
+def new() -> ImagePreviewCollection:
+    return ImagePreviewCollection()
+
+
+def remove(pcoll):
+    pcoll.close()
@@ -0,0 +1,5 @@
+'''
+Headless stand-in of Blender's gpu module: nothing is drawn.
+'''
+
+from . import types, shader, state, matrix
@@ -0,0 +1,31 @@
+from contextlib import contextmanager
+
+
+@contextmanager
+def push_pop():
+    yield
+
+
+@contextmanager
+def push_pop_projection():
+    yield
+
+
+def load_matrix(matrix):
+    pass
+
+
+def load_projection_matrix(matrix):
+    pass
+
+
+def load_identity():
+    pass
+
+
+def translate(offset):
+    pass
+
+
+def scale(scale):
+    pass
@@ -0,0 +1,5 @@
+from .types import GPUShader
+
+
+def from_builtin(shader_name) -> GPUShader:
+    return GPUShader(shader_name)
@@ -0,0 +1,15 @@
+def blend_set(mode):
+    pass
+
+
+def line_width_set(width):
+    pass
+
+
+def point_size_set(size):
+    pass
+
+
+def active_framebuffer_get():
+    from .types import GPUFrameBuffer
+    return GPUFrameBuffer._active or GPUFrameBuffer(0, 0)
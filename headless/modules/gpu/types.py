@@ -0,0 +1,73 @@
+from contextlib import contextmanager
+
+
+class GPUShader:
+    def __init__(self, name=""):
+        self.name = name
+
+    def bind(self):
+        pass
+
+    def uniform_float(self, name, value):
+        pass
+
+    def uniform_int(self, name, value):
+        pass
+
+    def uniform_sampler(self, name, texture):
+        pass
+
+
+class GPUBatch:
+    def __init__(self, type, buf=None, elem=None):
+        self.type = type
+
+    def program_set(self, shader):
+        pass
+
+    def draw(self, program=None):
+        pass
+
+
+class Buffer(list):
+    '''Pixels read back: all zero, nothing is drawn.'''
+    dimensions = 0
+
+
+class GPUFrameBuffer:
+    _active = None
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+    def clear(self, color=None, depth=None, stencil=None):
+        pass
+
+    def read_color(self, x, y, xsize, ysize, channels, slot, format, data=None) -> Buffer:
+        buffer = Buffer([0.0 if format == 'FLOAT' else 0] * (xsize * ysize * channels))
+        buffer.dimensions = [ysize, xsize, channels]
+        return buffer
+
+
+class GPUOffScreen:
+    def __init__(self, width, height, format='RGBA8'):
+        self.width = width
+        self.height = height
+        self.__framebuffer = GPUFrameBuffer(width, height)
+
+    @contextmanager
+    def bind(self):
+        previous = GPUFrameBuffer._active
+        GPUFrameBuffer._active = self.__framebuffer
+        try:
+            yield self
+        finally:
+            GPUFrameBuffer._active = previous
+
+    def draw_view3d(self, scene, view_layer, view3d, region, view_matrix, projection_matrix,
+                    do_color_management=False, draw_background=True):
+        pass
+
+    def free(self):
+        pass
@@ -0,0 +1,5 @@
+from gpu.types import GPUBatch
+
+
+def batch_for_shader(shader, type, content, indices=None) -> GPUBatch:
+    return GPUBatch(type)
@@ -0,0 +1,9 @@
+'''
+Headless stand-in of Blender's mathutils module: the parts the addon uses.
+'''
+
+
+class Matrix(list):
+    @classmethod
+    def Identity(cls, size):
+        return cls([[float(i == j) for j in range(size)] for i in range(size)])
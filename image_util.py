@@ -1,7 +1,16 @@
 import bpy
 import bpy.utils.previews
+import gpu
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from array import array
+import sys
+import queue
+import traceback
 
 from .common import get_subpath
+from .thumbnail_store import LEVELS, Thumb, fit, downscale, unpack
 
 
 preview_collections = {}
@@ -16,6 +25,309 @@ def get_icon(name: str) -> 'icon_id: int':
     return image.icon_id if image else 0
 
 
+def thumb_of_image(img, size=LEVELS['POPUP']) -> 'Thumb | None':
+    '''Pixels of img scaled down to size. img is scaled in place.'''
+    width, height = img.size
+    if not width * height:
+        return None
+    width, height = fit(width, height, size)
+    if (width, height) != tuple(img.size):
+        img.scale(width, height)
+    pixels = array('f', bytes(4 * width * height * 4))
+    img.pixels.foreach_get(pixels)
+    return Thumb(width, height, bytes(min(int(v * 255.0 + 0.5), 255) for v in pixels))
+
+
+def thumb_of_file(path) -> 'Thumb | None':
+    img = bpy.data.images.load(path)
+    try:
+        return thumb_of_image(img)
+    finally:
+        bpy.data.images.remove(img)
+
+
+def view_pixels(context, camera=None, size=LEVELS['POPUP']) -> '(width, height, rgba: bytes) | None':
+    '''
+    The 3D view drawn into an offscreen at thumbnail size, through camera if given.
+    None without a 3D view in the screen.
+    '''
+    area = context.area
+    if area is None or area.type != 'VIEW_3D':
+        area = next((a for a in context.screen.areas if a.type == 'VIEW_3D'), None)
+    if area is None:
+        return None
+    region = next(r for r in area.regions if r.type == 'WINDOW')
+    space = area.spaces.active
+    scene = context.scene
+
+    if camera is None:
+        width, height = fit(region.width, region.height, size)
+        view_matrix = space.region_3d.view_matrix
+        projection_matrix = space.region_3d.window_matrix
+    else:
+        render = scene.render
+        width, height = fit(
+            render.resolution_x * render.pixel_aspect_x, render.resolution_y * render.pixel_aspect_y, size
+            )
+        view_matrix = camera.matrix_world.inverted()
+        projection_matrix = camera.calc_matrix_camera(context.evaluated_depsgraph_get(), x=width, y=height)
+
+    offscreen = gpu.types.GPUOffScreen(width, height)
+    try:
+        offscreen.draw_view3d(
+            scene, context.view_layer, space, region, view_matrix, projection_matrix,
+            do_color_management=True
+            )
+        with offscreen.bind():
+            fb = gpu.state.active_framebuffer_get()
+            buffer = fb.read_color(0, 0, width, height, 4, 0, 'UBYTE')
+    finally:
+        offscreen.free()
+    buffer.dimensions = width * height * 4
+    return width, height, bytes(buffer)
+
+
+class Canvas:
+    '''
+    RGBA 8-bit pixels of a rectangle of the window, rows bottom up,
+    pasted from the framebuffers of regions it covers.
+    '''
+
+    def __init__(self, x, y, width, height):
+        self.x, self.y = x, y
+        self.width, self.height = width, height
+        self.pixels = bytearray(width * height * 4)
+
+    def intersect(self, x, y, width, height) -> '(x, y, width, height) | None: relative to canvas':
+        x0, y0 = max(x, self.x), max(y, self.y)
+        x1, y1 = min(x + width, self.x + self.width), min(y + height, self.y + self.height)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return x0 - self.x, y0 - self.y, x1 - x0, y1 - y0
+
+    def paste(self, x, y, width, height, rgba):
+        src = memoryview(rgba)
+        stride = width * 4
+        for row in range(height):
+            start = ((y + row) * self.width + x) * 4
+            self.pixels[start:start + stride] = src[row * stride:(row + 1) * stride]
+
+    def thumb(self, size=LEVELS['POPUP']) -> Thumb:
+        '''Pixels averaged down to size (nearest pixels without NumPy), opaque.'''
+        w, h = self.width, self.height
+        # regions may be drawn with alpha
+        self.pixels[3::4] = b"\xff" * (w * h)
+        try:
+            import numpy as np
+        except ImportError:
+            return downscale(Thumb(w, h, bytes(self.pixels)), size)
+
+        k = -(-max(w, h) // size)
+        if k <= 1:
+            return Thumb(w, h, bytes(self.pixels))
+        kx, ky = min(k, w), min(k, h)
+        tw, th = w // kx, h // ky
+        a = np.frombuffer(self.pixels, dtype=np.uint8).reshape(h, w, 4)
+        # rows summed first, contiguous: k < 257 fits in uint16
+        a = a[:th * ky, :tw * kx].astype(np.uint16).reshape(th, ky, tw * kx * 4).sum(axis=1, dtype=np.uint16)
+        a = a.reshape(th, tw, kx, 4).sum(axis=2, dtype=np.uint32)
+        return Thumb(tw, th, (a // (kx * ky)).astype(np.uint8).tobytes())
+
+
+class Thumbnails:
+    '''
+    Thumbnails of commits as previews, without image datablocks.
+    Packed thumbnails of a log page are read from the store at once by reload
+    workers, a preview is made only when a row or popup draws it.
+    Least recently drawn previews are released beyond the budget.
+    '''
+
+    # bytes of preview pixels kept
+    budget = 64 << 20
+    # seconds between checks for written thumbnails
+    interval = 0.1
+
+    def __init__(self):
+        # DatabaseStore | NotesStore of the repository
+        self.store = None
+        # {commit_hash: packed LIST thumb | None (no thumbnail)} of loaded pages
+        self.__packed = {}
+        # {commit_hash: [bytes, (width, height) of POPUP | None]}, least recently drawn first
+        self.__entries = OrderedDict()
+        self.__bytes = 0
+
+        # put_later: worker, commit hashes written (None: end of writes), writes not ended
+        self.__writer = None
+        self.__written = queue.Queue()
+        self.__writing = 0
+        # same function object to register / unregister
+        self.__timer = self.__tick
+
+    def set_store(self, store):
+        if getattr(store, 'key', None) != getattr(self.store, 'key', None):
+            self.invalidate()
+        self.store = store
+        # written meanwhile by other sessions, pages read again
+        self.__packed.clear()
+
+    def prime(self, hashes, found):
+        '''found: {commit_hash: packed LIST thumb} of hashes, read by a worker.'''
+        packed = self.__packed
+        for h in hashes:
+            packed[h] = found.get(h)
+
+    def __read(self, commit_hash, level) -> 'packed thumb | None':
+        if self.store is None:
+            return None
+        return self.store.get_many([commit_hash], level).get(commit_hash)
+
+    def __preview(self, commit_hash) -> 'ImagePreview':
+        pcoll = preview_collections["thumbnails"]
+        preview = pcoll.get(commit_hash)
+        return preview or pcoll.new(commit_hash)
+
+    def icon(self, commit_hash) -> 'int: icon_id, 0 without thumbnail':
+        entry = self.__entries.get(commit_hash)
+        if entry is not None:
+            self.__entries.move_to_end(commit_hash)
+            return self.__preview(commit_hash).icon_id
+
+        packed = self.__packed.get(commit_hash, ...)
+        if packed is ...:
+            packed = self.__packed[commit_hash] = self.__read(commit_hash, 'LIST')
+        if packed is None or "thumbnails" not in preview_collections:
+            return 0
+        thumb = unpack(packed)
+        preview = self.__preview(commit_hash)
+        preview.icon_size = (thumb.width, thumb.height)
+        preview.icon_pixels = array('i', thumb.rgba)
+        self.__entries[commit_hash] = [len(thumb.rgba), None]
+        self.__bytes += len(thumb.rgba)
+        self.__evict()
+        return preview.icon_id
+
+    def image(self, commit_hash) -> '(icon_id, (width, height)) | None: None without thumbnail':
+        icon_id = self.icon(commit_hash)
+        if not icon_id:
+            return None
+        entry = self.__entries[commit_hash]
+        if entry[1] is None:
+            packed = self.__read(commit_hash, 'POPUP')
+            if packed is None:
+                return None
+            thumb = unpack(packed)
+            preview = self.__preview(commit_hash)
+            preview.image_size = (thumb.width, thumb.height)
+            preview.image_pixels = array('i', thumb.rgba)
+            entry[0] += len(thumb.rgba)
+            entry[1] = (thumb.width, thumb.height)
+            self.__bytes += len(thumb.rgba)
+            self.__evict()
+        return icon_id, entry[1]
+
+    def __evict(self):
+        entries = self.__entries
+        pcoll = preview_collections["thumbnails"]
+        # the last drawn one is kept
+        while self.__bytes > self.budget and len(entries) > 1:
+            commit_hash, (nbytes, _) = entries.popitem(last=False)
+            self.__bytes -= nbytes
+            # del releases the preview, pop would not
+            del pcoll[commit_hash]
+
+    def put(self, commit_hash, thumb):
+        '''Store thumb of commit, shown when drawn next.'''
+        if self.store is not None:
+            self.store.put(commit_hash, thumb)
+        self.invalidate(commit_hash)
+
+    def put_later(self, commit_hash, thumb):
+        '''Store thumb of commit on a worker, shown when written.'''
+        store = self.store
+        if store is None:
+            return
+        if self.__writer is None:
+            # one worker: writes of a commit stay in order
+            self.__writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="blendgit-thumbnail")
+        self.begin_writes()
+        self.__writer.submit(self.__write, store, commit_hash, thumb)
+
+    def __write(self, store, commit_hash, thumb):
+        try:
+            store.put(commit_hash, thumb)
+            self.written(commit_hash)
+        except Exception:
+            print(f"BlendGit: thumbnail of {commit_hash} not stored", file=sys.stderr)
+            traceback.print_exc()
+        self.end_writes()
+
+    def begin_writes(self):
+        '''Thumbnails will be written by a worker: shown as written until end_writes().'''
+        self.__writing += 1
+        if not bpy.app.timers.is_registered(self.__timer):
+            bpy.app.timers.register(self.__timer, first_interval=self.interval, persistent=True)
+
+    def written(self, commit_hash):
+        '''Thumbnail of commit stored. Called by workers.'''
+        self.__written.put(commit_hash)
+
+    def end_writes(self):
+        '''Called by workers.'''
+        self.__written.put(None)
+
+    def __tick(self) -> 'float | None: seconds to next call, None when written all':
+        written = False
+        while True:
+            try:
+                commit_hash = self.__written.get_nowait()
+            except queue.Empty:
+                break
+            if commit_hash is None:
+                self.__writing -= 1
+                continue
+            self.invalidate(commit_hash)
+            written = True
+        if written:
+            for window in bpy.context.window_manager.windows:
+                for area in window.screen.areas:
+                    area.tag_redraw()
+        return self.interval if self.__writing else None
+
+    def shutdown(self):
+        if self.__writer is not None:
+            self.__writer.shutdown(wait=True)
+            self.__writer = None
+        if bpy.app.timers.is_registered(self.__timer):
+            bpy.app.timers.unregister(self.__timer)
+
+    def delete(self, commit_hash):
+        if self.store is not None:
+            self.store.delete([commit_hash])
+        self.invalidate(commit_hash)
+
+    def invalidate(self, commit_hash=None):
+        '''Read the thumbnail of commit (all if None) again when drawn.'''
+        hashes = list(self.__entries) if commit_hash is None else [commit_hash]
+        pcoll = preview_collections.get("thumbnails")
+        for h in hashes:
+            self.__packed.pop(h, None)
+            entry = self.__entries.pop(h, None)
+            if entry is not None:
+                self.__bytes -= entry[0]
+                if pcoll is not None and h in pcoll:
+                    del pcoll[h]
+        if commit_hash is None:
+            self.__packed.clear()
+
+    def clear(self):
+        self.__packed.clear()
+        self.__entries.clear()
+        self.__bytes = 0
+
+
+thumbnails = Thumbnails()
+
+
 def register():
     pcoll = bpy.utils.previews.new()
     preview_collections["blendgit"] = pcoll
@@ -25,8 +337,12 @@ def register():
         abspath = get_subpath("icons", filename)
         pcoll.load(name, abspath, 'IMAGE')
 
+    preview_collections["thumbnails"] = bpy.utils.previews.new()
+
 
 def unregister():
+    thumbnails.shutdown()
+    thumbnails.clear()
     for pcoll in preview_collections.values():
         bpy.utils.previews.remove(pcoll)
-    preview_collections.clear()
\ No newline at end of file
+    preview_collections.clear()
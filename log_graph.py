@@ -0,0 +1,254 @@
+import bpy
+import bpy.utils.previews
+import gpu
+from gpu_extras.batch import batch_for_shader
+from mathutils import Matrix
+
+from array import array
+from collections import namedtuple
+
+
+# Commit graph of the log, laid out from parent lists instead of `--graph` text.
+# Lanes are assigned commit by commit as pages load (LaneLayout, plain Python:
+# runs on reload workers). Each page is drawn once with gpu into an offscreen
+# and cut into square row icons for GIT_UL_log (GraphIcons).
+
+
+# lane: of the commit, color: index of its lane color
+# up: ((lane at top, lane at center, color), ...) lines into the row
+# down: ((lane at center, lane at bottom, color), ...) lines out of the row
+GraphRow = namedtuple('GraphRow', ('lane', 'color', 'up', 'down'))
+
+
+class LaneLayout:
+    '''
+    Lanes of commits listed children first, as `git log` does.
+    extend() continues where the previous page ended.
+    '''
+
+    def __init__(self):
+        # commit expected next per lane, None if free
+        self.__lanes = []
+        # color index per lane
+        self.__colors = []
+        self.__next_color = 0
+
+    def __open(self, sha) -> 'int: lane':
+        lanes = self.__lanes
+        try:
+            lane = lanes.index(None)
+        except ValueError:
+            lane = len(lanes)
+            lanes.append(None)
+            self.__colors.append(0)
+        lanes[lane] = sha
+        self.__colors[lane] = self.__next_color
+        self.__next_color += 1
+        return lane
+
+    def extend(self, commits) -> '[GraphRow, ...]':
+        '''commits: [(hash, [parent hash, ...]), ...]'''
+        lanes = self.__lanes
+        colors = self.__colors
+        rows = []
+        for sha, parents in commits:
+            # lanes expecting this commit end at it, a branch tip opens one
+            tip = sha not in lanes
+            lane = self.__open(sha) if tip else lanes.index(sha)
+            up = tuple(
+                (j, lane if h == sha else j, colors[j])
+                for j, h in enumerate(lanes)
+                if h is not None and not (tip and j == lane)
+                )
+            for j, h in enumerate(lanes):
+                if h == sha:
+                    lanes[j] = None
+            color = colors[lane]
+
+            # lanes to parents start at this commit,
+            # lanes expecting a parent already go on beside
+            joined = set()
+            started = set()
+            for i, parent in enumerate(parents):
+                if parent in lanes:
+                    joined.add(lanes.index(parent))
+                elif i == 0:
+                    lanes[lane] = parent
+                    started.add(lane)
+                else:
+                    started.add(self.__open(parent))
+            down = []
+            for j, h in enumerate(lanes):
+                if h is None:
+                    continue
+                if j in joined or j in started:
+                    down.append((lane, j, colors[j]))
+                if j not in started:
+                    down.append((j, j, colors[j]))
+
+            while lanes and lanes[-1] is None:
+                lanes.pop()
+                colors.pop()
+            rows.append(GraphRow(lane, color, up, tuple(down)))
+        return rows
+
+
+# lane colors, cycled by color index
+COLORS = (
+    (0.30, 0.62, 0.96, 1.0),
+    (0.96, 0.55, 0.20, 1.0),
+    (0.40, 0.80, 0.35, 1.0),
+    (0.90, 0.35, 0.45, 1.0),
+    (0.70, 0.50, 0.95, 1.0),
+    (0.95, 0.85, 0.30, 1.0),
+    (0.35, 0.85, 0.85, 1.0),
+    )
+
+
+class GraphIcons:
+    '''
+    Row icons of the graph, one batch of lines and points drawn per page.
+    Icons of a page are kept until released, and drawn again only when
+    the rows of the page differ (refs moved, history rewritten).
+    '''
+
+    # pixels of a square icon, lanes in one icon
+    tile = 32
+    lanes_per_tile = 3
+    # icons per row at most, lanes further right are clipped
+    max_tiles = 4
+
+    def __init__(self):
+        self.__previews = None
+        # {page: (rows, [[icon_id, ...] per row])}
+        self.__pages = {}
+
+    def icons(self, page, row) -> '[icon_id, ...] | None: None if page is not drawn':
+        entry = self.__pages.get(page)
+        if entry is None or row >= len(entry[1]):
+            return None
+        return entry[1][row]
+
+    @property
+    def pages(self) -> set:
+        return set(self.__pages)
+
+    def build(self, page, rows):
+        entry = self.__pages.get(page)
+        if entry is not None and entry[0] == rows:
+            return
+        self.release(page)
+        if rows:
+            self.__pages[page] = (rows, self.__draw(page, rows))
+
+    def release(self, page):
+        entry = self.__pages.pop(page, None)
+        if entry is not None and self.__previews is not None:
+            # del releases the preview, pop would not
+            for r in range(len(entry[1])):
+                for t in range(len(entry[1][r])):
+                    del self.__previews[f"{page}:{r}:{t}"]
+
+    def clear(self):
+        self.__pages.clear()
+        if self.__previews is not None:
+            bpy.utils.previews.remove(self.__previews)
+            self.__previews = None
+
+    def __draw(self, page, rows) -> '[[icon_id, ...] per row]':
+        size = self.tile
+        lane_width = size / self.lanes_per_tile
+        used = max(max((l for seg in r.up + r.down for l in seg[:2]), default=0) for r in rows)
+        used = max(used, max(r.lane for r in rows)) + 1
+        tiles = min((used + self.lanes_per_tile - 1) // self.lanes_per_tile, self.max_tiles)
+        width, height = tiles * size, len(rows) * size
+
+        # pixels -> normalized device coordinates
+        x = lambda lane: (lane + 0.5) * lane_width / width * 2 - 1
+        y = lambda px: px / height * 2 - 1
+
+        lines, line_colors, points, point_colors = [], [], [], []
+        for i, r in enumerate(rows):
+            top = height - i * size
+            center = top - size / 2
+            for a, b, c in r.up:
+                lines += [(x(a), y(top)), (x(b), y(center))]
+                line_colors += [COLORS[c % len(COLORS)]] * 2
+            for a, b, c in r.down:
+                lines += [(x(a), y(center)), (x(b), y(top - size))]
+                line_colors += [COLORS[c % len(COLORS)]] * 2
+            points.append((x(r.lane), y(center)))
+            point_colors.append(COLORS[r.color % len(COLORS)])
+
+        shader = builtin_shader('FLAT_COLOR', '2D_FLAT_COLOR')
+        point_shader = builtin_shader('POINT_FLAT_COLOR', '2D_FLAT_COLOR')
+        offscreen = gpu.types.GPUOffScreen(width, height)
+        try:
+            with offscreen.bind():
+                fb = gpu.state.active_framebuffer_get()
+                fb.clear(color=(0.0, 0.0, 0.0, 0.0))
+                with gpu.matrix.push_pop(), gpu.matrix.push_pop_projection():
+                    gpu.matrix.load_matrix(Matrix.Identity(4))
+                    gpu.matrix.load_projection_matrix(Matrix.Identity(4))
+                    gpu.state.blend_set('ALPHA')
+                    gpu.state.line_width_set(2.0)
+                    if lines:
+                        batch_for_shader(shader, 'LINES', {"pos": lines, "color": line_colors}).draw(shader)
+                    gpu.state.point_size_set(size * 0.3)
+                    batch_for_shader(point_shader, 'POINTS', {"pos": points, "color": point_colors}).draw(point_shader)
+                    gpu.state.blend_set('NONE')
+                buffer = fb.read_color(0, 0, width, height, 4, 0, 'UBYTE')
+        finally:
+            offscreen.free()
+        buffer.dimensions = width * height * 4
+        tile_pixels = tiles_of(bytes(buffer), len(rows), tiles, size)
+
+        if self.__previews is None:
+            self.__previews = bpy.utils.previews.new()
+        icons = []
+        for i in range(len(rows)):
+            row_icons = []
+            for t in range(tiles):
+                preview = self.__previews.new(f"{page}:{i}:{t}")
+                preview.icon_size = (size, size)
+                # rows of the page top down, pixel blocks bottom up
+                preview.icon_pixels = array('i', tile_pixels(len(rows) - 1 - i, t))
+                row_icons.append(preview.icon_id)
+            icons.append(row_icons)
+        return icons
+
+
+def tiles_of(rgba, count, tiles, size) -> 'fn(block, tile) -> bytes: RGBA rows bottom up':
+    '''
+    Square tiles of size cut from RGBA 8-bit pixels of count blocks of rows,
+    tiles wide, rows bottom up.
+    '''
+    try:
+        import numpy as np
+    except ImportError:
+        view = memoryview(rgba)
+        stride = tiles * size * 4
+        def tile(block, t):
+            start = block * size * stride + t * size * 4
+            return b"".join(view[start + y * stride:start + y * stride + size * 4] for y in range(size))
+        return tile
+
+    # (block, pixel row, tile, pixel) -> (block, tile, pixel row, pixel), one copy
+    a = np.frombuffer(rgba, dtype=np.uint32).reshape(count, size, tiles, size)
+    a = np.ascontiguousarray(a.transpose(0, 2, 1, 3))
+    return lambda block, t: a[block, t].tobytes()
+
+
+def builtin_shader(name, fallback):
+    # names of Blender 4.0, "2D_" variants of older versions
+    try:
+        return gpu.shader.from_builtin(name)
+    except ValueError:
+        return gpu.shader.from_builtin(fallback)
+
+
+graph_icons = GraphIcons()
+
+
+def unregister():
+    graph_icons.clear()
@@ -0,0 +1,254 @@
+import threading
+import time
+import json
+import os
+
+from collections import deque
+from contextlib import contextmanager
+
+
+# Runtime statistics of git subprocesses and operators.
+#
+# origin of a call:
+#   'user': operator invoke / execute / modal (default)
+#   'draw': panel / popup / UIList drawing
+#   'poll': operator poll
+
+
+class Stat:
+    __slots__ = ('count', 'wall', 'wall_max', 'nbytes', 'failures', 'returncode')
+
+    def __init__(self):
+        self.count = 0
+        self.wall = 0.0
+        self.wall_max = 0.0
+        self.nbytes = 0
+        self.failures = 0
+        self.returncode = 0
+
+    def add(self, wall, nbytes, returncode):
+        self.count += 1
+        self.wall += wall
+        self.wall_max = max(self.wall_max, wall)
+        self.nbytes += nbytes
+        self.returncode = returncode
+        if returncode:
+            self.failures += 1
+
+
+class Metrics:
+    # number of redraws kept for "spawns per redraw"
+    window = 60
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self.__lock:
+            # {('git', subcommand, origin) | ('op', bl_idname, origin): Stat}
+            self.stats = {}
+            self.spawns = 0
+            self.passive_spawns = 0
+            self.redraws = 0
+            self.__spawns_at_redraw = 0
+            self.spawns_per_redraw = deque(maxlen=self.window)
+
+    # origin
+
+    @property
+    def origin(self) -> str:
+        return getattr(self.__local, 'origin', 'user')
+
+    @contextmanager
+    def scope(self, origin):
+        old = self.origin
+        self.__local.origin = origin
+        try:
+            yield
+        finally:
+            self.__local.origin = old
+
+    # recording
+
+    def __add(self, key, wall, nbytes, returncode):
+        stat = self.stats.get(key)
+        if stat is None:
+            stat = self.stats[key] = Stat()
+        stat.add(wall, nbytes, returncode)
+
+    def record_command(self, subcommand, origin, wall, nbytes, returncode, spawned=True):
+        with self.__lock:
+            self.__add(('git', subcommand, origin), wall, nbytes, returncode)
+            if spawned:
+                self.spawns += 1
+                if origin != 'user':
+                    self.passive_spawns += 1
+
+    def record_operator(self, bl_idname, origin, wall, result):
+        # result: {'FINISHED'} / {'CANCELLED'} / ...
+        failed = 1 if 'CANCELLED' in result else 0
+        with self.__lock:
+            self.__add(('op', bl_idname, origin), wall, 0, failed)
+
+    def redraw(self):
+        # called once per drawn Git region / popup
+        with self.__lock:
+            self.redraws += 1
+            self.spawns_per_redraw.append(self.passive_spawns - self.__spawns_at_redraw)
+            self.__spawns_at_redraw = self.passive_spawns
+
+    @contextmanager
+    def command(self, subcommand, spawned=True):
+        # measure block as one git call, yields [nbytes, returncode] to fill
+        origin = self.origin
+        t = time.perf_counter()
+        result = [0, 0]
+        try:
+            yield result
+        finally:
+            wall = time.perf_counter() - t
+            self.record_command(subcommand, origin, wall, *result, spawned=spawned)
+            tracer.add("git " + subcommand, 'git', t, wall, {
+                'origin': origin,
+                'bytes': result[0],
+                'returncode': result[1],
+                })
+
+    # reading
+
+    def top(self, kind, n=10) -> '[(name, origin, Stat), ...] sorted by total wall time':
+        with self.__lock:
+            items = [(k[1], k[2], s) for k, s in self.stats.items() if k[0] == kind]
+        items.sort(key=lambda i: i[2].wall, reverse=True)
+        return items[:n]
+
+    @property
+    def average_spawns_per_redraw(self) -> float:
+        history = self.spawns_per_redraw
+        return sum(history) / len(history) if history else 0.0
+
+
+# Chrome Trace Event recorder (chrome://tracing, Perfetto)
+class Tracer:
+    # max events kept (oldest are dropped)
+    capacity = 500000
+
+    def __init__(self):
+        self.enabled = False
+        self.events = deque(maxlen=self.capacity)
+        self.__threads = {}
+
+    def start(self):
+        self.events.clear()
+        self.__threads.clear()
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+    @contextmanager
+    def span(self, name, cat, **args):
+        if not self.enabled:
+            yield args
+            return
+        t = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.add(name, cat, t, time.perf_counter() - t, args)
+
+    def add(self, name, cat, start, duration, args=None):
+        # start, duration: seconds of perf_counter
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        self.__threads[thread.ident] = thread.name
+        self.events.append({
+            'name': name,
+            'cat': cat,
+            'ph': 'X',
+            'ts': start * 1e6,
+            'dur': duration * 1e6,
+            'pid': os.getpid(),
+            'tid': thread.ident,
+            'args': args or {},
+            })
+
+    def write(self, dirpath) -> 'filepath: str':
+        pid = os.getpid()
+        meta = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in self.__threads.items()
+            ]
+        filename = time.strftime("blendgit-trace-%Y%m%d-%H%M%S.json")
+        filepath = os.path.join(dirpath, filename)
+        with open(filepath, "w") as f:
+            json.dump({'traceEvents': meta + list(self.events), 'displayTimeUnit': 'ms'}, f)
+        return filepath
+
+
+tracer = Tracer()
+
+metrics = Metrics()
+
+
+def traced(cat, name=None):
+    # decorator: record fn call as trace span
+    def decorator(fn):
+        label = name or fn.__name__
+        def wrapper(*args, **kwargs):
+            with tracer.span(label, cat):
+                return fn(*args, **kwargs)
+        wrapper.__name__ = fn.__name__
+        wrapper.__doc__ = fn.__doc__
+        return wrapper
+    return decorator
+
+
+def drawing(fn):
+    # decorator: git calls in fn are counted as 'draw'
+    name = fn.__qualname__
+    def wrapper(*args, **kwargs):
+        with metrics.scope('draw'), tracer.span(name, 'draw'):
+            return fn(*args, **kwargs)
+    wrapper.__name__ = fn.__name__
+    wrapper.__doc__ = fn.__doc__
+    return wrapper
+
+
+def measured(fn, bl_idname_of):
+    '''
+    Wrap Operator.invoke / execute to record wall time.
+    Blender checks argument count of registered methods: keep explicit signature.
+    '''
+    def run(self, args):
+        t = time.perf_counter()
+        result = {'CANCELLED'}
+        try:
+            result = fn(self, *args)
+            return result
+        finally:
+            metrics.record_operator(bl_idname_of(self), metrics.origin, time.perf_counter() - t, result)
+
+    if fn.__code__.co_argcount == 3:
+        def wrapper(self, context, event):
+            return run(self, (context, event))
+    else:
+        def wrapper(self, context):
+            return run(self, (context,))
+    wrapper.__name__ = fn.__name__
+    wrapper.__doc__ = fn.__doc__
+    return wrapper
+
+
+def subcommand_of(args) -> str:
+    # args without executable: skip global options (-c key=value, -C dir, ...)
+    it = iter(args)
+    for a in it:
+        if a in ("-c", "-C", "--git-dir", "--work-tree"):
+            next(it, None)
+        elif not a.startswith("-"):
+            return a
+    return ""
@@ -1,12 +1,11 @@
 import bpy
 from bpy.types import Operator
 from bpy.props import *
-import bgl
 import gpu
 from gpu_extras.batch import batch_for_shader
 
-import shutil
 import os
+import time
 import zipfile
 
 from .backend_git import Git
@@ -15,12 +14,15 @@ from .common import (
     get_git_context as g,
     get_addon_prefs as p
     )
-from .image_util import get_icon
+from .image_util import get_icon, thumbnails, thumb_of_file, Canvas
+from .log_graph import builtin_shader
+from .metrics import metrics, tracer
+from .thumbnail_store import collect_garbage
+from .blend_preview import renderer
 
 from .ops_main import (
     reload_files,
-    get_thumbnail_path,
-    update_thumbnail,
+    ModalCommand,
     GitOperator,
     FileOperator,
     LogOperator
@@ -52,7 +54,10 @@ from .ui import panels
 # GIT_OT_show
 # GIT_OT_thumbnail_edit
 # GIT_OT_thumbnail_snipping
+# GIT_OT_thumbnail_gc
 # GIT_OT_checkout_file
+# GIT_OT_metrics_reset
+# GIT_OT_trace_write
 # GIT_OT_pick_library
 # GIT_OT_archive
 
@@ -115,6 +120,7 @@ class GIT_OT_panel_popup(GitOperator):
                 layout.separator()
 
         layout = self.layout
+        metrics.redraw()
 
         gcon = g(context)
         row = layout.row()
@@ -288,67 +294,37 @@ class GIT_OT_write_ignore(FileOperator):
         return {'FINISHED'}
 
 
-# restore_stack[cls]: bool(restoring)
-restore_stack = {}
-
-class StandardColor:
+class ThumbnailView:
     '''
-    For displaying thumbnail with standard color,
-    need to prevent ImageTexture to be view-trarnsformed.
+    For displaying thumbnail of log in popups.
     '''
 
-    def __init__(self):
-        self.old_vt = ""
-
-    def cancel(self, context):
-        self.restore(context)
-
-    def normalize(self, context):
-        # for display imagetexture standard color
-        sc = context.scene
-        self.old_vt = sc.view_settings.view_transform
-        sc.view_settings.view_transform = 'Standard'
-        restore_stack[self.__class__] = False
-
-    def restore(self, context):
-        restore_stack[self.__class__] = True
-        if all(restore_stack.values()):
-            context.scene.view_settings.view_transform = self.old_vt
-            restore_stack.clear()
-
     def draw_thumbnail(self, context, layout, log, popup_width=0):
-        thumbnail = log.thumbnail
-        if thumbnail and thumbnail.image:
+        entry = thumbnails.image(log.full_hash)
+        if entry:
             prefs = p(context)
 
-            (x, y) = thumbnail.image.size
+            icon_id, (x, y) = entry
             w = popup_width or prefs.popup_width
-            h = 16*9
-            # template_preview default ui_units_y?
-
-            col = layout.column()
+            # template_icon scale: in units of 20 px
+            unit = 20
 
             ext = prefs.thumbnail_extension
-            if y > w:
-                ext = 'fill'
             if ext == 'none':
-                col.scale_x = min(1, x / w)
-                col.scale_y = y / h
-            elif ext == 'fill':
-                col.scale_y = w*y / (h*x)
+                scale = min(x, w) / unit
+            else:
+                scale = w / unit
 
-            col.template_preview(thumbnail, show_buttons=False)
+            layout.template_icon(icon_value=icon_id, scale=scale)
 
 
-class GIT_OT_show(LogOperator, StandardColor):
+class GIT_OT_show(LogOperator, ThumbnailView):
     bl_idname = "git.show"
     bl_label = "Show Commit"
     bl_description = "$git show <commit>"
     bl_options = GitOperator.popup_options
 
     def invoke(self, context, event):
-        self.normalize(context)
-
         wm = context.window_manager
         prefs = p(context)
         return wm.invoke_popup(self, width=prefs.popup_width)
@@ -357,7 +333,8 @@ class GIT_OT_show(LogOperator, StandardColor):
         log = self.get_entry()
         c_hash = log.commit_hash
 
-        self.command(["show", c_hash])
+        with metrics.scope('draw'):
+            self.command(["show", c_hash])
 
         col = self.layout.column(align=True)
         col.label(text = f'$git show {c_hash}')
@@ -372,7 +349,7 @@ class GIT_OT_show(LogOperator, StandardColor):
         return {'INTERFACE'}
 
 
-class GIT_OT_thumbnail_edit(LogOperator, StandardColor):
+class GIT_OT_thumbnail_edit(LogOperator, ThumbnailView):
     bl_idname = "git.thumbnail_edit"
     bl_label = "Edit Thumbnail"
     bl_description = "Edit thumbnail of active log"
@@ -389,8 +366,6 @@ class GIT_OT_thumbnail_edit(LogOperator, StandardColor):
 
 
     def invoke(self, context, event):
-        self.normalize(context)
-
         wm = context.window_manager
         return wm.invoke_props_dialog(self)
 
@@ -406,45 +381,42 @@ class GIT_OT_thumbnail_edit(LogOperator, StandardColor):
 
     def execute(self, context):
         log = self.get_entry()
-        thumbnail_path = get_thumbnail_path(
-            context,
-            log.commit_hash
-            )
-
-        dirpath = ".git/.git_thumbnails"
-        if not os.path.isdir(dirpath):
-            os.makedirs(dirpath, exist_ok=True)
 
         if self.source == 'none':
-            img = log.thumbnail.image
-            if img:
-                os.remove(img.filepath)
-                bpy.data.images.remove(img)
-                self.report({'INFO'}, f"Remove thumbnail from {log.commit_hash}")
+            thumbnails.delete(log.full_hash)
+            self.report({'INFO'}, f"Remove thumbnail from {log.commit_hash}")
         elif self.source == 'snip':
-            bpy.ops.git.thumbnail_snipping('INVOKE_DEFAULT', filepath=thumbnail_path)
+            bpy.ops.git.thumbnail_snipping('INVOKE_DEFAULT')
         elif self.source == 'file':
             if not self.filepath:
                 context.window_manager.fileselect_add(self)
                 return {'RUNNING_MODAL'}
             else:
-                if os.path.isfile(self.filepath):
-                    shutil.copy(self.filepath, thumbnail_path)
-
-                    update_thumbnail(context, log)
+                thumb = os.path.isfile(self.filepath) and thumb_of_file(self.filepath)
+                if thumb:
+                    try:
+                        thumbnails.put(log.full_hash, thumb)
+                    except OSError as e:
+                        self.report({'ERROR'}, f"Can not store thumbnail: {e}")
+                        return {'CANCELLED'}
                     self.report({'INFO'}, f"Set thumbnail for {log.commit_hash}")
+                else:
+                    self.report({'ERROR'}, f"Can not read image: {self.filepath}")
 
-        self.restore(context)
         return {'FINISHED'}
 
 
 
-class GIT_OT_thumbnail_snipping(LogOperator, StandardColor):
+class GIT_OT_thumbnail_snipping(LogOperator):
     bl_idname = "git.thumbnail_snipping"
     bl_label = "Snipping for thumbnail"
     bl_description = "Take a snipped screenshot for thumbnail"
 
-    filepath: StringProperty(subtype='FILE_PATH')
+    # seconds waited for regions to be drawn into the snip
+    capture_timeout = 0.5
+
+    # (shader, batch of unit square): shared by all overlays, made on first draw
+    __overlay = None
 
     def __init__(self):
         super().__init__()
@@ -457,6 +429,13 @@ class GIT_OT_thumbnail_snipping(LogOperator, StandardColor):
 
         self.pressed = False
 
+        # pixels read back from regions after release
+        self.__canvas = None
+        # regions to be read yet
+        self.__pending = set()
+        self.__timer = None
+        self.__captured_at = 0.0
+
     def is_running(self):
         return bool(self.__handles)
 
@@ -486,65 +465,97 @@ class GIT_OT_thumbnail_snipping(LogOperator, StandardColor):
                     area.spaces[0].draw_handler_remove(hndl, region.type)
                     area.tag_redraw()
             self.__handles.clear()
+        if self.__timer is not None:
+            context.window_manager.event_timer_remove(self.__timer)
+            self.__timer = None
+
+    @classmethod
+    def overlay(cls) -> '(GPUShader, GPUBatch)':
+        if cls.__overlay is None:
+            shader = builtin_shader('UNIFORM_COLOR', '2D_UNIFORM_COLOR')
+            batch = batch_for_shader(shader, 'TRI_FAN', {"pos": ((0, 0), (1, 0), (1, 1), (0, 1))})
+            cls.__overlay = (shader, batch)
+        return cls.__overlay
 
     def __draw(self, context, region):
-        
-        shader = gpu.shader.from_builtin('2D_UNIFORM_COLOR')
-        indices = [[0, 1, 2], [2, 3, 0]]
-        def batch_draw(data, color):
-            bgl.glEnable(bgl.GL_BLEND)
-            batch = batch_for_shader(shader, 'TRIS', data, indices=indices)
-            shader.bind()
-            shader.uniform_float("color", color)
-            batch.draw(shader)
-            bgl.glDisable(bgl.GL_BLEND)
-
-        data = {}
+        if self.__canvas is not None:
+            self.__read(region)
+            return
+
+        shader, batch = self.overlay()
+        def rect_draw(x, y, w, h, color):
+            with gpu.matrix.push_pop():
+                gpu.matrix.translate((x, y))
+                gpu.matrix.scale((w, h))
+                shader.uniform_float("color", color)
+                batch.draw(shader)
+
+        gpu.state.blend_set('ALPHA')
+        shader.bind()
 
         # draw disactive area
-        data["pos"] = [
-            [0, 0],
-            [region.width, 0],
-            [region.width, region.height],
-            [0, region.height]
-            ]
         color = [0.0, 0.0, 0.0, 0.5]  # black
-        batch_draw(data, color)
+        rect_draw(0, 0, region.width, region.height, color)
 
         # draw snipping region
         (x0, y0), (x1, y1) = self.get_rect()
-        (rx0, ry0) = (x0 - region.x, y0 - region.y)
-        (rx1, ry1) = (x1 - region.x, y1 - region.y)
-        data["pos"] = [
-            [rx0, ry0],
-            [rx0, ry1],
-            [rx1, ry1],
-            [rx1, ry0]
-            ]
         color = [1.0, 0.0, 0.0, 0.1]  # red
-        batch_draw(data, color)
+        rect_draw(x0 - region.x, y0 - region.y, x1 - x0, y1 - y0, color)
+
+        gpu.state.blend_set('NONE')
+
+    def __read(self, region):
+        # part of the snip drawn by region, from its framebuffer
+        self.__pending.discard(region)
+        part = self.__canvas.intersect(region.x, region.y, region.width, region.height)
+        if part is None:
+            return
+        x, y, w, h = part
+        fb = gpu.state.active_framebuffer_get()
+        buffer = fb.read_color(
+            self.__canvas.x + x - region.x, self.__canvas.y + y - region.y, w, h, 4, 0, 'UBYTE'
+            )
+        buffer.dimensions = w * h * 4
+        self.__canvas.paste(x, y, w, h, bytes(buffer))
 
+    def capture(self, context) -> bool:
+        '''Read the snip back from regions on their next redraw.'''
+        (x0, y0), (x1, y1) = self.get_rect()
+        x, y = min(x0, x1), min(y0, y1)
+        w, h = abs(x1 - x0), abs(y1 - y0)
+        if not w * h:
+            return False
+
+        self.__canvas = Canvas(x, y, w, h)
+        self.__pending = {
+            region
+            for handles in self.__handles.values() for region in handles
+            if self.__canvas.intersect(region.x, region.y, region.width, region.height)
+            }
+        self.__captured_at = time.perf_counter()
+        self.__timer = context.window_manager.event_timer_add(0.02, window=context.window)
+        for area in self.__handles:
+            area.tag_redraw()
+        return True
 
     def invoke(self, context, event):
-        self.normalize(context)
-
-        if not self.filepath:
-            self.filepath = get_thumbnail_path(
-                context,
-                self.get_entry().commit_hash
-                )
-
         self.handle_add(context)
 
         context.window_manager.modal_handler_add(self)
 
-        print('Start Modal')
-
         return {'RUNNING_MODAL'}
 
 
     def modal(self, context, event):
 
+        if self.__canvas is not None:
+            # regions are drawn without overlay, then read back
+            waited = time.perf_counter() - self.__captured_at
+            if event.type == 'TIMER' and (not self.__pending or waited > self.capture_timeout):
+                self.handle_remove(context)
+                return self.execute(context)
+            return {'RUNNING_MODAL'}
+
         # mouse events
         if event.type == 'LEFTMOUSE':
 
@@ -552,18 +563,17 @@ class GIT_OT_thumbnail_snipping(LogOperator, StandardColor):
                 self.plot(0, event.mouse_x, event.mouse_y)
                 self.plot(1, event.mouse_x, event.mouse_y)
                 self.pressed = True
-                print('PRESS', self.get_rect()[0])
 
             elif event.value == 'RELEASE':
-                print('RELEASE', self.get_rect()[1])
-                self.handle_remove(context)
-                return self.execute(context)
+                if not self.capture(context):
+                    self.handle_remove(context)
+                    return {'CANCELLED'}
+                return {'RUNNING_MODAL'}
 
         elif self.pressed and event.type == 'MOUSEMOVE':
             self.plot(1, event.mouse_x, event.mouse_y)
 
         elif event.type in {'RIGHTMOUSE', 'ESC'}:
-            print('CANCELLED')
             self.handle_remove(context)
             return {'CANCELLED'}
 
@@ -575,59 +585,92 @@ class GIT_OT_thumbnail_snipping(LogOperator, StandardColor):
 
 
     def execute(self, context):
+        if self.__canvas is None:
+            return {'CANCELLED'}
 
-        # 1. take SS /w "temppath"
-        # 2. background composition /w "filepath"
-
-        # take SS
-        tempdir = context.preferences.filepaths.temporary_directory
-        temppath = tempdir+"image0001.png"
-        bpy.ops.screen.screenshot(filepath=temppath, check_existing=False)
-
+        log = self.get_entry()
+        canvas, self.__canvas = self.__canvas, None
+        try:
+            with tracer.span("snip", 'thumbnail'):
+                thumbnails.put(log.full_hash, canvas.thumb())
+        except OSError as e:
+            self.report({'ERROR'}, f"Can not store thumbnail: {e}")
+            return {'CANCELLED'}
 
-        # compose SS and output file
-        sc = context.scene
-        old_setting = sc.use_nodes
-        sc.use_nodes = True
+        self.report({'INFO'}, f"Snipping screen for {log.commit_hash}")
+        return {'FINISHED'}
 
-        node_tree = sc.node_tree
-        nodes = node_tree.nodes
-        links = node_tree.links
 
-        # image -> crop -> file
-        img = nodes.new(type='CompositorNodeImage')
-        img.image = bpy.data.images.load(temppath)
+class GIT_OT_thumbnail_gc(GitOperator):
+    bl_idname = "git.thumbnail_gc"
+    bl_label = "Clean Up Thumbnails"
+    bl_description = "Pack thumbnail files of older versions, " \
+                     "remove thumbnails of commits not reachable from refs or reflogs"
 
-        crop = nodes.new(type='CompositorNodeCrop')
-        crop.use_crop_size = True
-        ((x0, y0), (x1, y1)) = self.get_rect()
-        crop.min_x = min(x0, x1)
-        crop.min_y = min(y0, y1)
-        crop.max_x = max(x0, x1)
-        crop.max_y = max(y0, y1)
+    def execute(self, context):
+        git = self.git
+        store = thumbnails.store
+        if store is None:
+            self.report({'WARNING'}, "Not a git repository")
+            return {'CANCELLED'}
 
-        file = nodes.new(type='CompositorNodeOutputFile')
-        file.base_path = tempdir
+        # .git/.git_thumbnails/<abbreviated hash>.png of older versions
+        packed = 0
+        dirpath = os.path.join(git.cache.gitdir, ".git_thumbnails")
+        if os.path.isdir(dirpath):
+            for name in sorted(os.listdir(dirpath)):
+                stem, ext = os.path.splitext(name)
+                if ext != ".png":
+                    continue
+                path = os.path.join(dirpath, name)
+                info = git.catfile.info(stem)
+                thumb = info and info[1] == 'commit' and thumb_of_file(path)
+                if thumb:
+                    thumbnails.put(info[0], thumb)
+                    packed += 1
+                os.remove(path)
+            if not os.listdir(dirpath):
+                os.rmdir(dirpath)
+
+        removed = collect_garbage(git, store)
+        thumbnails.invalidate()
+        if removed is None:
+            self.report({'WARNING'}, f"Packed {packed} thumbnail files, "
+                                     "none removed: reachable commits could not be listed")
+            return {'FINISHED'}
 
-        links.new(img.outputs[0], crop.inputs[0])
-        links.new(crop.outputs[0], file.inputs[0])
+        self.report({'INFO'}, f"Packed {packed} thumbnail files, removed {removed} thumbnails")
+        return {'FINISHED'}
 
-        bpy.ops.render.render()
 
-        shutil.move(temppath, self.filepath)
+class GIT_OT_thumbnail_render(GitOperator):
+    bl_idname = "git.thumbnail_render"
+    bl_label = "Generate Thumbnails for History"
+    bl_description = "Render thumbnails of commits changing .blend files without a preview, " \
+                     "by Blender processes in the background"
 
-        # clean up
-        for n in (img, crop, file):
-            nodes.remove(n)
+    cancel: BoolProperty(options={'SKIP_SAVE'})
 
-        sc.use_nodes = old_setting
+    @classmethod
+    def poll(cls, context):
+        return super().poll(context) and bool(bpy.app.binary_path)
 
-        # set thumbnail
-        update_thumbnail(context, self.get_entry())
-        self.restore(context)
+    def execute(self, context):
+        if self.cancel:
+            renderer.cancel()
+            self.report({'INFO'}, "Cancelled thumbnail rendering")
+            return {'FINISHED'}
 
+        store = thumbnails.store
+        if store is None:
+            self.report({'WARNING'}, "Not a git repository")
+            return {'CANCELLED'}
 
-        self.report({'INFO'}, f"Snipping screen to {self.filepath}")
+        prefs = p(context)
+        renderer.workers = prefs.render_workers
+        renderer.engine = prefs.render_engine
+        renderer.start(self.git, store, thumbnails, bpy.app.binary_path, prefer=common.get_blend_path(context))
+        self.report({'INFO'}, "Rendering thumbnails in background...")
         return {'FINISHED'}
 
 
@@ -640,8 +683,17 @@ class GIT_OT_checkout_file(LogOperator):
         ref = bpy.path.abspath(g(context).rootdir)
         self.discarding = self.file == ref
 
+    def file_items(self, context):
+        cls = __class__
+        git = cls.get_git()
+        c_hash = cls.get_entry().commit_hash
+        return git.cached(
+            'checkout_items', c_hash,
+            lambda: [(f, f, "") for f in git.tree_names(c_hash)]
+            )
+
     file: EnumProperty(
-        items=lambda s,c: [(f, f, "") for f in __class__.get_results(str).split('\n')],
+        items=file_items,
         update=update_file
         )
     discarding: BoolProperty(options={'HIDDEN'})
@@ -650,9 +702,6 @@ class GIT_OT_checkout_file(LogOperator):
         discarding = False
 
     def invoke(self, context, event):
-        log = self.get_entry()
-        self.command(["ls-tree", "-r", "--name-only", log.commit_hash])
-
         wm = context.window_manager
         return wm.invoke_props_dialog(self)
 
@@ -677,6 +726,35 @@ class GIT_OT_checkout_file(LogOperator):
         return {'FINISHED'}
 
 
+class GIT_OT_metrics_reset(Operator):
+    bl_idname = "git.metrics_reset"
+    bl_label = "Reset Metrics"
+    bl_description = "Reset git call / operator statistics"
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+        metrics.reset()
+        Git.get(context).cache.reset_stats()
+        return {'FINISHED'}
+
+
+class GIT_OT_trace_write(Operator):
+    bl_idname = "git.trace_write"
+    bl_label = "Write Trace"
+    bl_description = "Write recorded trace as Chrome Trace Event JSON into .git directory"
+    bl_options = {'INTERNAL'}
+
+    @classmethod
+    def poll(cls, context):
+        return bool(tracer.events)
+
+    def execute(self, context):
+        dirpath = Git.get(context).cache.gitdir or bpy.app.tempdir
+        filepath = tracer.write(dirpath)
+        self.report({'INFO'}, f"Write trace: {filepath}")
+        return {'FINISHED'}
+
+
 # for git.pick_library / git.archive
 class GIT_PR_pickable(bpy.types.PropertyGroup):
     pick: BoolProperty()
@@ -690,21 +768,32 @@ class GIT_OT_pick_library(LogOperator):
     bl_description = "Pick library data from old file"
 
     def file_items(self, context):
-        items = []
-        log = __class__.get_entry()
-        for name, blobnr in Git(context).get_blobs(log.commit_hash).items():
-            if name.endswith(".blend"):
-                items.append((blobnr, name, ""))
-        return items
+        git = Git.get(context)
+        c_hash = __class__.get_entry().commit_hash
+
+        def factory():
+            blobs = git.get_blobs(c_hash)
+            return [(blobnr, name, "") for name, blobnr in blobs.items() if name.endswith(".blend")]
+        return git.cached('pick_items', c_hash, factory) or []
 
     def file_update(self, context):
         tmppath = common.get_subpath("tmp.blend")
-        Git(context).backup(
-            self.file,
-            tmppath
-            )
+
+        wm = context.window_manager
+        wm.progress_begin(0, 100)
+        try:
+            extracted = Git.get(context).backup(
+                self.file,
+                tmppath,
+                progress=lambda written, size: wm.progress_update(100 * written // max(size, 1))
+                )
+        finally:
+            wm.progress_end()
+
         # load data
         self.libraries.clear()
+        if not extracted:
+            return
         with bpy.data.libraries.load(tmppath) as (data_from, data_to):
             cls = __class__
             for attr in dir(data_to):
@@ -801,7 +890,7 @@ class GIT_OT_pick_library(LogOperator):
         return {'FINISHED'}
 
 
-class GIT_OT_archive(LogOperator):
+class GIT_OT_archive(ModalCommand, LogOperator):
     bl_idname = "git.archive"
     bl_label = "Archive"
     bl_description = "$git archive"
@@ -816,17 +905,15 @@ class GIT_OT_archive(LogOperator):
 
     def invoke(self, context, event):
         log = self.get_entry()
-        self.command(["ls-tree", "-r", "--name-only", log.commit_hash])
         self.files.clear()
-        for line in self.get_results():
+        for name in self.git.tree_names(log.commit_hash):
             f = self.files.add()
-            f.name = line
+            f.name = name
 
-        self.command(["ls-files", "-o"])
         self.others.clear()
-        for line in self.get_results():
+        for path in self.git.records(["ls-files", "-o", "-z"], sep="\0"):
             f = self.others.add()
-            f.name = line
+            f.name = path
 
         wm = context.window_manager
         # return wm.invoke_confirm(self, event)
@@ -867,9 +954,29 @@ class GIT_OT_archive(LogOperator):
             if os.path.basename(dirpath) == "archive":
                 self.git.write_ignore(dirpath)
 
-        filename = f"{dirpath}\\{c_hash}.zip"
+        self.filename = os.path.join(dirpath, f"{c_hash}.zip")
+
+        # -v: list archived paths to stderr as progress
+        return self.start_command(context, ["archive", "-v", c_hash, "-o", self.filename])
+
+    def progress(self, job):
+        return min(len(job.lines) / max(len(self.files), 1), 1.0)
 
-        self.command(["archive", c_hash, "-o", filename])
+    def result_lines(self, job):
+        # archived paths listed by -v are progress, not results
+        return [l for l in job.lines if l.startswith(("fatal:", "error:", "warning:"))]
+
+    def cancel_command(self, context):
+        if os.path.isfile(self.filename):
+            os.remove(self.filename)
+
+    def fail_command(self, context, job):
+        self.cancel_command(context)
+        return {'CANCELLED'}
+
+    def finish_command(self, context, job):
+        c_hash = self.get_entry().commit_hash
+        filename = self.filename
         self.report({'INFO'}, "Archived: "+filename)
 
         # add log to zip file
@@ -884,7 +991,7 @@ class GIT_OT_archive(LogOperator):
                 if o.pick:
                     z.write(o.name)
 
-        reload_files(self, context)
+        reload_files(context)
         return {'FINISHED'}
 
 
@@ -897,7 +1004,11 @@ classes = (
     GIT_OT_show,
     GIT_OT_thumbnail_edit,
     GIT_OT_thumbnail_snipping,
+    GIT_OT_thumbnail_gc,
+    GIT_OT_thumbnail_render,
     GIT_OT_checkout_file,
+    GIT_OT_metrics_reset,
+    GIT_OT_trace_write,
     GIT_PR_pickable,  # for git.pick_library / git.archive
     GIT_OT_pick_library,
     GIT_OT_archive
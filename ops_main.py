@@ -3,10 +3,21 @@ from bpy.types import Operator
 from bpy.props import *
 
 from threading import Thread
+from collections import namedtuple, deque
+from functools import partial
 import os
-
-from .backend_git import Git
-from . import common
+import sys
+import time
+import queue
+import traceback
+
+from .backend_git import Git, StatusRecord, parse_nul_list, literal_pathspecs
+from .metrics import metrics, tracer, traced, measured
+from .log_graph import LaneLayout, graph_icons
+from .image_util import thumbnails, view_pixels
+from .thumbnail_store import Thumb, get_store
+from .blend_preview import extractor
+from . import common, watcher
 from .common import (
     alert,
     get_git_context as g,
@@ -20,99 +31,523 @@ from .common import (
 # 
 # +++++++++++++++++++++++++++++++++++++++++++++
 
-def __reload_entries(context, name, cmd):
-    results = Git(context).command(cmd)
+# rows written into a collection between checks of the time slice
+APPLY_ROWS = 256
 
-    entries = getattr(g(context), name)
-    entries.clear()
-    for line in results:
-        entries.add().logline = line
 
+# last reload of files, to reload only changed paths next time
+# token: of watcher, fingerprint: of repository, tracked_dirs: {"dir/": None},
+# collapsed: {untracked / ignored "dir/"}, count: len(files) after reload
+FilesState = namedtuple('FilesState', ('token', 'fingerprint', 'tracked_dirs', 'collapsed', 'count'))
+
+# {rootdir: FilesState}
+_files_state = {}
+
+
+def tracked_dirs_of(paths) -> '{"dir/": None, ...} with all ancestors, "" for root':
+    dirs = dict.fromkeys(p[:p.rfind("/") + 1] for p in paths)
+    for d in list(dirs):
+        while d:
+            d = d[:d.rfind("/", 0, -1) + 1]
+            if d in dirs:
+                break
+            dirs[d] = None
+    return dirs
+
+
+def changed_pathspecs(paths, collapsed, tracked_dirs) -> '[path, ...] | None: None if all need status':
+    '''
+    Paths for a limited status listing them as the full status would.
+    Below an untracked / ignored directory shown as one entry ("dir/"),
+    that entry is listed again. Other paths outside tracked directories
+    would be listed one by one instead of collapsed: everything needs status.
+    '''
+    specs = set()
+    for path in paths:
+        parts = path.rstrip("/").split("/")
+        for i in range(1, len(parts)):
+            d = "/".join(parts[:i]) + "/"
+            # or below a new directory listed already
+            if d in collapsed or d in specs:
+                specs.add(d)
+                break
+        else:
+            parent = path[:path.rfind("/", 0, -1) + 1]
+            if parent not in tracked_dirs:
+                return None
+            specs.add(path)
+    return sorted(specs)
+
+
+def reconcile_files(gcon, records, covered=None) -> 'generator, returns int: rows written':
+    '''
+    Update gcon.files to records in place: vanished paths are removed,
+    new paths appended, status and name written only where they differ.
+    covered(ref): entries the records are complete for (all if None).
+    Row order and the active file are kept, so the list does not jump.
+    Yields every APPLY_ROWS rows, see ReloadPipeline.
+    '''
+    files = gcon.files
+    fresh = {r.path: r for r in records}
+    refs = [f.ref for f in files]
+
+    active = gcon.active_file
+    active_ref = refs[active] if 0 <= active < len(refs) else None
+
+    vanished = [
+        i for i, ref in enumerate(refs)
+        if ref not in fresh and (covered is None or covered(ref))
+        ]
+    for n, i in enumerate(reversed(vanished), 1):
+        files.remove(i)
+        if not n % APPLY_ROWS:
+            yield
+    if vanished:
+        gone = set(vanished)
+        refs = [ref for i, ref in enumerate(refs) if i not in gone]
+    # path -> index
+    index = {ref: i for i, ref in enumerate(refs)}
+
+    statuses = [0] * len(files)
+    files.foreach_get('status', statuses)
+    yield
+
+    written = len(vanished)
+    added = []
+    for n, (path, r) in enumerate(fresh.items(), 1):
+        if not n % APPLY_ROWS:
+            yield
+        i = index.get(path)
+        if i is None:
+            added.append(r)
+            continue
+        status = Git.status_from_xy(r.xy)
+        name = r.xy.replace('.', ' ') + " " + path
+        if statuses[i] != status or files[i].name != name:
+            entry = files[i]
+            entry.status = status
+            entry.name = name
+            written += 1
+
+    # append in one batch
+    start = len(files)
+    for _ in added:
+        files.add()
+    if start == 0:
+        files.foreach_set('status', [Git.status_from_xy(r.xy) for r in added])
+    for i, r in enumerate(added, start):
+        if not (i - start + 1) % APPLY_ROWS:
+            yield
+        entry = files[i]
+        if start:
+            entry.status = Git.status_from_xy(r.xy)
+        entry.name = r.xy.replace('.', ' ') + " " + r.path
+        entry.ref = r.path
+    written += len(added)
+
+    # same file stays active
+    if active_ref is not None:
+        i = index.get(active_ref)
+        if i is None:
+            i = max(min(active, len(files) - 1), 0)
+        if i != active:
+            gcon.active_file = i
+    return written
+
+
+def __status_records(git, paths=(), fsmonitor="") -> '([StatusRecord, ...], [tracked path, ...])':
+    with tracer.span("status", 'reload'):
+        _, records = git.status(paths, fsmonitor)
+
+    # unmodified files
+    with tracer.span("ls-files", 'reload'):
+        changed = {r.path for r in records}
+        pathspecs = literal_pathspecs(paths) if paths else []
+        tracked = parse_nul_list(git.output(["ls-files", "-c", "-z", *pathspecs]))
+        for path in tracked:
+            if path not in changed:
+                records.append(StatusRecord("H.", path, "", "", ()))
+    return records, tracked
+
+
+# +++ reload parts
+# prepare(context) on main thread -> collect(), run on a worker: git and parsing only, no bpy
+# apply(context, result) on main thread: generator writing the result into GitContext
+
+def prepare_files(context):
+    git = Git.get(context)
+    state = _files_state.get(git.rootdir)
+    # collection changed since (e.g. file loaded): nothing to compare to
+    if state and state.count != len(g(context).files):
+        state = None
+    return partial(collect_files, git, watcher.get(git.rootdir), state)
+
+
+def collect_files(git, w, state) -> '(records | None: unchanged, covered(ref) | None, FilesState)':
+    fingerprint = git.cache.fingerprint()
+    token, paths = w.changed_since(state and state.token) if w else (None, None)
+
+    # index / HEAD changed: status of any path may be changed
+    specs = None
+    if paths is not None and state and state.fingerprint == fingerprint:
+        with tracer.span("pathspecs", 'reload', count=len(paths)):
+            specs = changed_pathspecs(paths, state.collapsed, state.tracked_dirs)
+
+    if specs is None:
+        records, tracked = __status_records(git, fsmonitor=w.hook_command if w else "")
+        covered = None
+        tracked_dirs = tracked_dirs_of(tracked)
+        collapsed = set()
+
+    else:
+        tracked_dirs = state.tracked_dirs
+        dirs = {p for p in specs if p.endswith("/")}
+        specs = set(specs)
+        covered = lambda ref: ref in specs or any(
+            ref.startswith(d) for d in dirs
+            )
+        collapsed = {d for d in state.collapsed if not covered(d)}
+        records = __status_records(git, sorted(specs))[0] if specs else None
+
+    if records:
+        collapsed.update(r.path for r in records if r.path.endswith("/"))
+    # status and ls-files refresh the index: fingerprint after them
+    return records, covered, FilesState(token, git.cache.fingerprint(), tracked_dirs, collapsed, 0)
 
-def reload_files(context):
-    __reload_entries(context, 'files', ["status", "-s", "--ignored"])
 
-    # reload unmodified files
+def apply_files(context, result):
+    records, covered, state = result
     gcon = g(context)
-    results = Git(context).command(["ls-files", "-c"])
-    files = [f.ref for f in gcon.files]
-    for file in results:
-        if file not in files:
-            gcon.files.add().logline = "H  " + file
+    if records is not None:
+        yield from reconcile_files(gcon, records, covered)
+    _files_state[Git.get(context).rootdir] = state._replace(count=len(gcon.files))
 
 
-def reload_branches(context):
-    __reload_entries(context, 'branches', ["branch"])
+def prepare_entries(cmd):
+    # stderr is not an entry
+    return lambda context: partial(Git.get(context).records, cmd)
 
 
-def reload_stashes(context):
-    __reload_entries(context, 'stashes', ["stash", "list"])
+def apply_entries(name):
+    def apply(context, lines):
+        entries = getattr(g(context), name)
+        entries.clear()
+        for n, line in enumerate(lines, 1):
+            entries.add().logline = line
+            if not n % APPLY_ROWS:
+                yield
+    return apply
 
 
-def reload_logs(context):
-    # update logs
-    prefs = p(context)
-    cmd = prefs.log_command or "log --graph --oneline --all"
-    __reload_entries(context, 'logs', cmd)
+def prepare_logs(context):
+    git = Git.get(context)
+    cmd = p(context).log_command or "log --graph --oneline --all"
+    # lanes drawn by log_graph instead of `--graph` text
+    layout = LaneLayout() if "--graph" in (git.parse_args(cmd) or ()) else None
+    return partial(collect_logs, git, cmd, layout, thumbnails.store)
+
+
+def collect_logs(git, cmd, layout, store) -> 'LogPage':
+    with tracer.span("log", 'reload'):
+        pager = git.log_pages(cmd, LogPages.size, graph_text=layout is None)
+        return read_log_page(pager, layout, store)
+
+
+# thumbs: {commit_hash: packed LIST thumbnail} of records with one
+LogPage = namedtuple('LogPage', ('pager', 'layout', 'records', 'rows', 'thumbs'))
+
+
+def read_log_page(pager, layout, store) -> LogPage:
+    records = pager.next_page()
+    rows = layout.extend((r.hash, r.parents) for r in records) if layout else []
+    thumbs = store.get_many([r.hash for r in records], 'LIST') if store else {}
+    return LogPage(pager, layout, records, rows, thumbs)
+
+
+def logline_of(record) -> str:
+    # as --oneline shows it, with refs
+    first, *below = record.graph.split("\n")
+    refs = f"({record.refs}) " if record.refs else ""
+    return "\n".join([f"{first}{record.abbrev} {refs}{record.subject}", *below])
+
+
+def append_logs(logs, records):
+    for n, r in enumerate(records, 1):
+        log = logs.add()
+        log.name = log.logline = logline_of(r)
+        log.commit_hash = r.abbrev
+        log.full_hash = r.hash
+        log.parents = " ".join(r.parents)
+        log.author = r.author
+        log.date = r.date
+        log.refs = r.refs
+        log.subject = r.subject
+        log.graph = r.graph
+        if not n % APPLY_ROWS:
+            yield
+
+
+def apply_logs(context, result):
+    log_pages.reset(result.pager, result.layout)
+    log_pages.rows += result.rows
+    thumbnails.prime([r.hash for r in result.records], result.thumbs)
 
-    # combine multilines
     gcon = g(context)
-    for i, log in enumerate(gcon.logs):
+    gcon.logs.clear()
+    yield from append_logs(gcon.logs, result.records)
+    gcon.active_log = 0
+
+    yield from log_pages.update(context)
+
+
+def apply_log_page(context, result):
+    if result.pager is not log_pages.pager:
+        return
+    log_pages.rows += result.rows
+    thumbnails.prime([r.hash for r in result.records], result.thumbs)
+    yield from append_logs(g(context).logs, result.records)
+    log_pages.pending = False
+    yield from log_pages.update(context)
+
+
+class LogPages:
+    '''
+    Log loaded page by page. The next page is read as GIT_UL_log shows rows
+    near the end or is filtered. Graph icons are kept for pages near the viewed
+    one and the active log, released for far-off pages.
+    '''
+
+    # commits per page
+    size = 200
+    # pages before / after the viewed one kept
+    keep = 2
+
+    def __init__(self):
+        self.pager = None
+        # lanes of the log when drawn by log_graph
+        self.layout = None
+        # GraphRow per log
+        self.rows = []
+        # next page is being read
+        self.pending = False
+        # page of the last drawn row
+        self.viewed = 0
+
+    def reset(self, pager=None, layout=None):
+        if self.pager is not None and self.pager is not pager:
+            self.pager.close()
+        self.pager = pager
+        self.layout = layout
+        self.rows = []
+        self.pending = False
+        self.viewed = 0
+
+    @property
+    def complete(self) -> bool:
+        return self.pager is None or self.pager.done
+
+    def request(self):
+        '''Read the next page on a worker. Called on drawing: writes no bpy data.'''
+        if self.complete or self.pending:
+            return
+        self.pending = True
+        reloader.follow('logs', partial(read_log_page, self.pager, self.layout, thumbnails.store), apply_log_page)
+
+    def view(self, index, count):
+        '''Row index of count rows is drawn.'''
+        if index >= count - self.size // 4:
+            self.request()
+        page = index // self.size
+        if page != self.viewed:
+            self.viewed = page
+            reloader.defer('logs', lambda context, _: self.update(context))
+
+    def graph_icons(self, index) -> '[icon_id, ...] | None: None if not drawn (yet)':
+        if self.layout is None:
+            return None
+        return graph_icons.icons(index // self.size, index % self.size)
+
+    def update(self, context):
+        '''Generator: graph icons of pages to keep loaded, others released.'''
+        gcon = g(context)
+        pages = (len(gcon.logs) + self.size - 1) // self.size
+        near = set(range(max(self.viewed - self.keep, 0), self.viewed + self.keep + 1))
+        near.add(gcon.active_log // self.size)
+
+        # icons of pages not loaded yet are kept: reused if the reloaded rows are the same
+        for page in sorted(graph_icons.pages - (near if self.layout else set())):
+            graph_icons.release(page)
+        if not self.layout:
+            return
+        for page in sorted(p for p in near if p < pages):
+            with tracer.span("graph", 'reload', page=page):
+                graph_icons.build(page, self.rows[page * self.size:(page + 1) * self.size])
+            yield
+
+
+log_pages = LogPages()
+
+
+class ReloadPipeline:
+    '''
+    Reload parts of GitContext off the main thread.
+    Workers put results into a queue, a bpy.app.timers callback applies them
+    in time slices so the UI keeps responding. Results of a part reloaded
+    again meanwhile are dropped (generation per part).
+    '''
+
+    # seconds of applying per timer call
+    time_slice = 0.01
+    # seconds between timer calls while reloading
+    interval = 0.01
+
+    def __init__(self, parts):
+        # {name: (prepare, apply)}
+        self.parts = parts
+        self.__generations = dict.fromkeys(parts, 0)
+        # (name, generation, result | exception, apply)
+        self.__results = queue.Queue()
+        # [(name, generation, apply generator), ...]
+        self.__tasks = deque()
+        # workers not taken from the queue yet
+        self.__pending = 0
+        # same function object to register / unregister
+        self.__timer = self.__tick
+
+    @property
+    def busy(self) -> bool:
+        return bool(self.__pending or self.__tasks)
+
+    def start(self, context, names=None):
+        '''Reload parts (all if None) on worker threads.'''
+        for name in names or self.parts:
+            prepare, apply = self.parts[name]
+            self.__generations[name] += 1
+            self.__spawn(name, prepare(context), apply)
+
+    def follow(self, name, collect, apply):
+        '''Run collect on a worker as part of the current reload of name.'''
+        self.__spawn(name, collect, apply)
+
+    def defer(self, name, apply, result=None):
+        '''Apply result by the timer, as part of the current reload of name.'''
+        self.__pending += 1
+        self.__results.put((name, self.__generations[name], result, apply))
+        self.__schedule()
+
+    def __spawn(self, name, collect, apply):
+        self.__pending += 1
+        Thread(
+            target=self.__work, args=(name, self.__generations[name], collect, apply),
+            name=f"blendgit-reload-{name}", daemon=True
+            ).start()
+        self.__schedule()
+
+    def __schedule(self):
+        if not bpy.app.timers.is_registered(self.__timer):
+            bpy.app.timers.register(self.__timer, first_interval=self.interval, persistent=True)
+
+    def run(self, context, name):
+        '''Reload part now, on main thread. Results of earlier reloads are dropped.'''
+        prepare, apply = self.parts[name]
+        self.__generations[name] += 1
+        for _ in apply(context, prepare(context)()):
+            pass
+
+    def cancel(self):
+        '''Drop results of all running reloads.'''
+        for name in self.__generations:
+            self.__generations[name] += 1
+        self.__tasks.clear()
+
+    def stop(self):
+        self.cancel()
+        log_pages.reset()
+        if bpy.app.timers.is_registered(self.__timer):
+            bpy.app.timers.unregister(self.__timer)
+
+    def __work(self, name, generation, collect, apply):
+        try:
+            with tracer.span(name, 'reload'):
+                result = collect()
+        except Exception as e:
+            result = e
+        self.__results.put((name, generation, result, apply))
+
+    def __take(self, context) -> 'bool: task added':
         while True:
-            idx = i+1
-            if idx >= len(gcon.logs):
-                break
-            log_next = gcon.logs[idx]
-            if idx == 0 or log_next.commit_hash:
-                break
-            log.logline += "\n" + log_next.logline
-            gcon.logs.remove(idx)
-        
-    for log in gcon.logs:
-        update_thumbnail(context, log)
+            try:
+                name, generation, result, apply = self.__results.get_nowait()
+            except queue.Empty:
+                return False
+            self.__pending -= 1
+            if generation != self.__generations[name]:
+                continue
+            if isinstance(result, Exception):
+                print(f"BlendGit: reload {name} failed", file=sys.stderr)
+                traceback.print_exception(type(result), result, result.__traceback__)
+                continue
+            self.__tasks.append((name, generation, apply(context, result)))
+            return True
+
+    def __tick(self) -> 'float | None: seconds to next call, None when done':
+        context = bpy.context
+        deadline = time.perf_counter() + self.time_slice
+        applied = False
+        with tracer.span("apply", 'reload') as span:
+            steps = 0
+            while time.perf_counter() < deadline:
+                if not self.__tasks and not self.__take(context):
+                    break
+                name, generation, task = self.__tasks[0]
+                if generation != self.__generations[name]:
+                    self.__tasks.popleft()
+                    continue
+                steps += 1
+                try:
+                    next(task)
+                except StopIteration:
+                    self.__tasks.popleft()
+                    applied = True
+                except Exception:
+                    self.__tasks.popleft()
+                    print(f"BlendGit: reload {name} failed", file=sys.stderr)
+                    traceback.print_exc()
+            span['steps'] = steps
+
+        if applied:
+            for window in context.window_manager.windows:
+                for area in window.screen.areas:
+                    area.tag_redraw()
+        return self.interval if self.busy else None
+
+
+reloader = ReloadPipeline({
+    'files':    (prepare_files, apply_files),
+    'branches': (prepare_entries(["branch"]), apply_entries('branches')),
+    'stashes':  (prepare_entries(["stash", "list"]), apply_entries('stashes')),
+    'logs':     (prepare_logs, apply_logs),
+    })
+
+
+@traced('reload')
+def reload_files(context):
+    reloader.run(context, 'files')
 
-    gcon.active_log = 0
 
+@traced('reload')
+def reload_branches(context):
+    reloader.run(context, 'branches')
 
-def get_thumbnail_path(context, commit_hash):
-    gcon = g(context)
-    path = os.path.join(
-        gcon.rootdir,
-        ".git",
-        ".git_thumbnails",
-        f"{commit_hash}.png"
-        )
-    return path
 
+@traced('reload')
+def reload_stashes(context):
+    reloader.run(context, 'stashes')
 
-def update_thumbnail(context, log):
-    name = "." + log.commit_hash
 
-    if log.thumbnail is None:
-        textures = bpy.data.textures
-        tex = textures.get(name)
-        log.thumbnail = tex or textures.new(name, 'IMAGE')
-    img = log.thumbnail.image or bpy.data.images.get(name)
-    if img:
-        img.reload()
-        log.thumbnail.image = img
-    else:
-        path = get_thumbnail_path(context, log.commit_hash)
-        if os.path.isfile(path):
-            img = bpy.data.images.load(path)
-            img.name = name
-            log.image = img
-            
-            log.thumbnail.image = img
-            log.thumbnail.extension = 'CLIP'
-
-    if img:
-        w, h = img.size
-        if w * h:
-            if w > h:
-                log.thumbnail.crop_max_x = h / w
-            else:
-                log.thumbnail.crop_max_y = w / h
+@traced('reload')
+def reload_logs(context):
+    reloader.run(context, 'logs')
 
 
 # +++++++++++++++++++++++++++++++++++++++++++++
@@ -152,6 +587,14 @@ class GitOperator(Operator):
 
     popup_options = bl_options | {'REGISTER', 'UNDO'}
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # record call count / wall time per operator
+        for name in ('invoke', 'execute'):
+            fn = cls.__dict__.get(name)
+            if fn is not None:
+                setattr(cls, name, measured(fn, lambda op: op.bl_idname))
+
     @classmethod
     def poll(cls, context):
         cls.check_repo(context)
@@ -159,11 +602,12 @@ class GitOperator(Operator):
 
     @classmethod
     def check_repo(cls, context):
-        cls.__git_context   = gcon  = g(context)
-        cls.__git           = git   = Git(context)
-        if not git.operative:
-            print(cls.__name__, __name__, "Git is NOT operative")
-        return git.operative and gcon.is_repository
+        with metrics.scope('poll'):
+            cls.__git_context   = gcon  = g(context)
+            cls.__git           = git   = Git.get(context)
+            if not git.operative:
+                print(cls.__name__, __name__, "Git is NOT operative")
+            return git.operative and gcon.is_repository
 
     __git_context = None
     __entry = None
@@ -176,6 +620,10 @@ class GitOperator(Operator):
     def git(self):
         return self.__git
 
+    @classmethod
+    def get_git(cls):
+        return cls.__git
+
     @classmethod
     def get_entry(cls):
         return cls.__entry
@@ -198,15 +646,25 @@ class GitOperator(Operator):
         cls.__results = cls.__git.command(cmd)
         cls.__result_string = ""
         if hasattr(reporter, 'report'):
-            res = cls.get_results(str)
-            if res.strip():
-                if 'fatal' in res or 'error' in res:
-                    t = {'ERROR'}
-                elif res == 'No local changes to save':
-                    t = {'WARNING'}
-                else:
-                    t = {'INFO'}
-                reporter.report(t, res)
+            cls.__report(reporter, cls.get_results(str))
+
+    @classmethod
+    def set_results(cls, lines, reporter=None):
+        cls.__results = iter(lines)
+        cls.__result_string = "\n".join(lines)
+        if hasattr(reporter, 'report'):
+            cls.__report(reporter, cls.__result_string)
+
+    @classmethod
+    def __report(cls, reporter, res):
+        if res.strip():
+            if 'fatal' in res or 'error' in res:
+                t = {'ERROR'}
+            elif res == 'No local changes to save':
+                t = {'WARNING'}
+            else:
+                t = {'INFO'}
+            reporter.report(t, res)
 
     @classmethod
     def get_results(cls, type=None):
@@ -220,6 +678,105 @@ class GitOperator(Operator):
             return None
 
 
+class ModalCommand:
+    '''
+    Mixin for GitOperator:
+    run git process off the main thread, show its progress in status bar.
+    ESC terminates the process.
+    '''
+
+    # seconds of timer polling the process
+    interval = 0.1
+
+    __job = None
+    __timer = None
+
+    def start_command(self, context, cmd):
+        self.__job = self.git.start(cmd)
+        if self.__job is None:
+            self.report({'ERROR'}, "Git is NOT operative")
+            return {'CANCELLED'}
+
+        self.command_label = cmd if type(cmd) is str else " ".join(cmd)
+
+        wm = context.window_manager
+        self.__timer = wm.event_timer_add(self.interval, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def progress(self, job) -> 'float: 0.0 - 1.0 | None':
+        return job.progress
+
+    def modal(self, context, event):
+        job = self.__job
+
+        if event.type == 'ESC' and event.value == 'PRESS':
+            job.cancel()
+            return {'RUNNING_MODAL'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        if not job.done:
+            progress = self.progress(job)
+            if progress is not None:
+                context.window_manager.progress_update(int(progress * 100))
+            text = job.message or (job.lines[-1] if job.lines else "")
+            context.workspace.status_text_set(
+                f"$git {self.command_label}  {text}  (ESC: Cancel)"
+                )
+            return {'RUNNING_MODAL'}
+
+        self.__stop(context)
+
+        if job.cancelled:
+            self.set_results(self.result_lines(job), reporter=self)
+            self.cancel_command(context)
+            self.report({'WARNING'}, f"Cancelled: $git {self.command_label}")
+            return {'CANCELLED'}
+
+        if job.returncode != 0:
+            self.set_results(self.result_lines(job))
+            self.report({'ERROR'}, self.get_results(str) or f"Failed: $git {self.command_label}")
+            return self.fail_command(context, job)
+
+        self.set_results(self.result_lines(job), reporter=self)
+        return self.finish_command(context, job)
+
+    def __stop(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self.__timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    def cancel(self, context):
+        # operator is cancelled by Blender (e.g. file load)
+        if self.__job and not self.__job.done:
+            self.__job.cancel()
+            self.__job.wait()
+            self.__stop(context)
+            self.cancel_command(context)
+
+    def result_lines(self, job) -> '[line, ...]: output reported to the user':
+        return job.lines
+
+    def cancel_command(self, context):
+        # clean up after terminated process
+        pass
+
+    def fail_command(self, context, job):
+        # on main thread after process exited with error: file is not reverted,
+        # status is shown (conflicts, paths left by git)
+        reload_files(context)
+        return {'CANCELLED'}
+
+    def finish_command(self, context, job):
+        # on main thread after process finished
+        bpy.ops.wm.revert_mainfile()
+        return {'FINISHED'}
+
+
 class GIT_OT_reload(GitOperator):
     bl_idname = "git.reload"
     bl_label = "Reload Repository"
@@ -227,10 +784,11 @@ class GIT_OT_reload(GitOperator):
 
     def invoke(self, context, event):
         gcon = g(context)
+        # results of repository / file loaded before
+        reloader.cancel()
 
         # check version
-        self.command(["version"])
-        gcon.version = self.get_results(str)
+        gcon.version = self.git.version_string
 
         # check: is cwd repository?
         exist = self.git.chdir(gcon.rootdir)
@@ -251,28 +809,31 @@ class GIT_OT_reload(GitOperator):
             self.report({'WARNING'}, "Not a git repository")
             return {'CANCELLED'}
 
+        if p(context).use_watcher:
+            watcher.watch(gcon.rootdir)
+        else:
+            watcher.shutdown()
+
         return self.execute(context)
 
 
     def execute(self, context):
-        threads = (
-            Thread(target=t, args=(context,))
-            for t in (
-                reload_files,
-                reload_branches,
-                reload_stashes,
-                reload_logs
-                )
-            )
-        for t in threads:
-            t.start()
-
+        # worktree may be changed outside of git
+        self.git.invalidate()
         self.git.clean_ignore()
-
-        for t in threads:
-            t.join()
-
-        self.report({'INFO'}, "Reloaded repository.")
+        prefs = p(context)
+        thumbnails.budget = prefs.thumbnail_memory << 20
+        store = get_store(self.git, prefs.thumbnail_store)
+        thumbnails.set_store(store)
+        if prefs.extract_previews and store is not None:
+            extractor.workers = prefs.preview_workers
+            # commits changing several .blend files show the open one
+            extractor.start(self.git, store, thumbnails, prefer=common.get_blend_path(context))
+
+        # applied by timer, see ReloadPipeline
+        reloader.start(context)
+
+        self.report({'INFO'}, "Reloading repository...")
         return {'FINISHED'}
 
 
@@ -489,7 +1050,7 @@ class GIT_OT_branch_delete(BranchOperator):
         return {'FINISHED'}
 
 
-class GIT_OT_switch(BranchOperator):
+class GIT_OT_switch(ModalCommand, BranchOperator):
     bl_idname = "git.switch"
     bl_label = "File is dirty: Recent edits are to be discarded"
     bl_description = "$git switch <branch>"
@@ -510,14 +1071,14 @@ class GIT_OT_switch(BranchOperator):
 
     def execute(self, context):
         if self.branchname:
-            self.command(["switch", self.branchname], reporter=self)
-            if "error" in self.get_results(str):
-                return {'CANCELLED'}
-            bpy.ops.wm.revert_mainfile()
-            return {'FINISHED'}
-
+            if self.git.supports('switch'):
+                cmd = ["switch", "--progress", self.branchname]
+            else:
+                cmd = ["checkout", "--progress", self.branchname]
+            return self.start_command(context, cmd)
+        return {'CANCELLED'}
 
-class GIT_OT_merge(BranchOperator):
+class GIT_OT_merge(ModalCommand, BranchOperator):
     bl_idname = "git.merge"
     bl_label = "Merge Branch"
     bl_description = "$git merge [--ff | --no-ff | --squash] [-Xours | -Xtheirs] <branch>"
@@ -576,7 +1137,7 @@ class GIT_OT_merge(BranchOperator):
         layout.prop(self, 'message', text="Message")
 
     def execute(self, context):
-        cmd = ["merge", self.incoming_branch]
+        cmd = ["merge", "--progress", self.incoming_branch]
 
         if self.ff_count == 0:
             cmd.append(self.fastforward)
@@ -587,13 +1148,16 @@ class GIT_OT_merge(BranchOperator):
         if self.message:
             cmd.extend(["-m", self.message])
 
-        self.command(cmd, reporter=self)
-
         # if self.strategy == '--squash':
         #     self.command(["commit"])
         
-        bpy.ops.wm.revert_mainfile()
-        return {'FINISHED'}
+        return self.start_command(context, cmd)
+
+    def cancel_command(self, context):
+        gitdir = self.git.cache.gitdir
+        if gitdir and os.path.isfile(os.path.join(gitdir, "MERGE_HEAD")):
+            # results are read: command() is lazy
+            self.command(["merge", "--abort"], reporter=self)
 
 
 class FileOperator(GitOperator):
@@ -631,7 +1195,13 @@ class GIT_OT_unstage(FileOperator):
     def execute(self, context):
         opt = "--theirs" if self.resolve_unmerge else "--staged"
 
-        self.command(["restore", opt, self.target_ref], reporter=self)
+        if self.git.supports('restore'):
+            cmd = ["restore", opt, self.target_ref]
+        elif self.resolve_unmerge:
+            cmd = ["checkout", opt, "--", self.target_ref]
+        else:
+            cmd = ["reset", "-q", "HEAD", "--", self.target_ref]
+        self.command(cmd, reporter=self)
 
         reload_files(context)
         return {'FINISHED'}
@@ -685,7 +1255,7 @@ class StashOperator(GitOperator):
         return cls.check_repo(context) and cls.set_entry('stashes', 'active_stash')
 
 
-class GIT_OT_stash_save(StashOperator):
+class GIT_OT_stash_save(ModalCommand, StashOperator):
     bl_idname = "git.stash_save"
     bl_label = "Save Stash"
     bl_description = "$git stash save <msg> -u"
@@ -710,10 +1280,7 @@ class GIT_OT_stash_save(StashOperator):
 
     def execute(self, context):
         cmd = ["stash", "save", self.message, "-u"]
-        self.command(cmd, reporter=self)
-
-        bpy.ops.wm.revert_mainfile()
-        return {'FINISHED'}
+        return self.start_command(context, cmd)
 
 
 class GIT_OT_stash_apply(StashOperator):
@@ -778,7 +1345,7 @@ class LogOperator(GitOperator):
             return False
 
 
-class GIT_OT_reset(LogOperator):
+class GIT_OT_reset(ModalCommand, LogOperator):
     bl_idname = "git.reset"
     bl_label = "Reset Commit"
     bl_description = "$git reset [--soft | --mixed | --hard] <commit>"
@@ -808,34 +1375,29 @@ class GIT_OT_reset(LogOperator):
         if c_hash == "":
             return {'CANCELLED'}
 
-        self.command([
+        return self.start_command(context, [
             "reset",
             self.option,
             c_hash
-            ],
-            reporter=self
-            )
-
-        bpy.ops.wm.revert_mainfile()
-        return {'FINISHED'}
+            ])
 
 
-class GIT_OT_revert(LogOperator):
+class GIT_OT_revert(ModalCommand, LogOperator):
     bl_idname = "git.revert"
     bl_label = "Revert Commit"
     bl_description = "$git revert [--no-edit] <commit>"
 
     def parent_items_fn(self, context):
         cls = GIT_OT_revert
-        cls.command(["show", cls.get_entry().commit_hash])
-        for line in cls.get_results():
-            if line.startswith("Merge:"):
-                _, c1, c2 = line.split(' ')
-                return [
-                    ('1', c1, ""),
-                    ('2', c2, "")
-                    ]
-        return None
+        c_hash = cls.get_entry().commit_hash
+
+        def factory():
+            parents = cls.get_git().parents(c_hash)
+            if len(parents) < 2:
+                return []
+            return [(str(i), c[:7], "") for i, c in enumerate(parents, 1)]
+        # kept referenced: Blender does not copy enum item strings
+        return cls.get_git().cached('revert_items', c_hash, factory)
 
     parent: EnumProperty(items=parent_items_fn)
 
@@ -868,10 +1430,13 @@ class GIT_OT_revert(LogOperator):
         if self.is_merge:
             cmd += ["-m", self.parent]
 
-        self.command(cmd, reporter=self)
+        return self.start_command(context, cmd)
 
-        bpy.ops.wm.revert_mainfile()
-        return {'FINISHED'}
+    def cancel_command(self, context):
+        gitdir = self.git.cache.gitdir
+        if gitdir and os.path.isfile(os.path.join(gitdir, "REVERT_HEAD")):
+            # results are read: command() is lazy
+            self.command(["revert", "--abort"], reporter=self)
 
 
 # class GIT_OT_rebase(LogOperator):
@@ -908,13 +1473,26 @@ class GIT_OT_commit(LogOperator):
     # 3 line format: summary, blank, desc
     summary: StringProperty(name="Summary")
     desc: StringProperty(name="Description")
-        
+
+    thumbnail: EnumProperty(
+        name="Thumbnail",
+        items=[
+            ('NONE', "None", "Commit without thumbnail"),
+            ('VIEW', "Viewport", "Capture the 3D viewport as thumbnail"),
+            ('CAMERA', "Camera", "Capture the view of a camera as thumbnail"),
+            ],
+        default='NONE'
+        )
+    camera: StringProperty(name="Camera")
+
     @classmethod
     def poll(cls, context):
         return cls.check_repo(context) and g(context).is_commit_ready
 
     def invoke(self, context, event):
         self.summary = self.desc = ""
+        if not self.camera and context.scene.camera:
+            self.camera = context.scene.camera.name
 
         wm = context.window_manager
         return wm.invoke_props_dialog(self)
@@ -932,12 +1510,19 @@ class GIT_OT_commit(LogOperator):
         layout.label(text="Description")
         layout.prop(self, "desc", text="")
 
+        layout.label(text="Thumbnail")
+        layout.row().prop(self, "thumbnail", expand=True)
+        if self.thumbnail == 'CAMERA':
+            layout.prop_search(self, "camera", context.scene, "objects", text="", icon='CAMERA_DATA')
+
 
     def execute(self, context):
         if not self.summary and not self.desc:
             self.report({'ERROR'}, "Comment is empty")
             return {'CANCELLED'}
 
+        head = self.git.output(["rev-parse", "--verify", "-q", "HEAD"]).strip()
+
         comment = self.summary + "\n\n" + self.desc
 
         cmd = ["commit", "-m", comment]
@@ -950,9 +1535,31 @@ class GIT_OT_commit(LogOperator):
             reporter=self
             )
 
+        if self.thumbnail != 'NONE':
+            commit = self.git.output(["rev-parse", "--verify", "-q", "HEAD"]).strip()
+            # not committed: HEAD is not moved
+            if commit and commit != head:
+                self.capture_thumbnail(context, commit.decode())
+
         bpy.ops.git.reload('INVOKE_DEFAULT')
         return {'FINISHED'}
 
+    def capture_thumbnail(self, context, commit):
+        camera = None
+        if self.thumbnail == 'CAMERA':
+            camera = context.scene.objects.get(self.camera)
+            if camera is None or camera.type != 'CAMERA':
+                self.report({'WARNING'}, f"No thumbnail: not a camera: {self.camera}")
+                return
+
+        with tracer.span("capture", 'thumbnail'):
+            pixels = view_pixels(context, camera)
+        if pixels is None:
+            self.report({'WARNING'}, "No thumbnail: no 3D viewport to capture")
+            return
+        # encoded and stored on a worker
+        thumbnails.put_later(commit, Thumb(*pixels))
+
 
 
 classes = (
@@ -5,7 +5,6 @@ from bpy.props import *
 from functools import reduce
 
 from .backend_git import Git
-from .common import extract_hash
 
 
 class BranchEntry(PropertyGroup):
@@ -16,38 +15,7 @@ class BranchEntry(PropertyGroup):
 
 
 class FileEntry(PropertyGroup):
-    def __update(self, context):
-        logline = self.logline
-
-        self.name = logline
-        self.ref = logline[3:].strip('"')
-
-        X,Y = logline[:2]
-
-        if X+Y=="!!":  # ignored
-            status = Git.STATUS_IGNORED
-        elif X+Y=="??":  # untracked
-            status = Git.STATUS_UNTRACKED
-        elif X+Y in [  # merge conflicts
-            "DD",   # unmerged, both deleted
-            "AU",   # unmerged, added by us
-            "UD",   # unmerged, deleted by them
-            "UA",   # unmerged, added by them
-            "DU",   # unmerged, deleted by us
-            "AA",   # unmerged, both added
-            "UU"    # unmerged, both modified
-            ]:
-            status = Git.STATUS_UNMERGED
-        elif Y in "AMDRC":  # not updated
-            status = Git.STATUS_NOTSTAGED
-        elif X in "DMARC":  # index and worktree matches
-            status = Git.STATUS_STAGED
-        elif X == "H":      # unmodified(ls-files)
-            status = Git.STATUS_UNMODIFIED
-
-        self.status = status
-
-    logline: StringProperty(update=__update)
+    # name: "XY path" for display, filled by ops_main.reload_files
     ref: StringProperty()
     status: IntProperty(
         min=Git.STATUS_UNMODIFIED,
@@ -71,19 +39,18 @@ class StashEntry(PropertyGroup):
 
 
 class LogEntry(PropertyGroup):
+    # filled by ops_main.apply_logs from backend_git.LogRecord
+    # logline: graph and "<abbrev> (<refs>) <subject>" as displayed, name: same
+    logline: StringProperty()
+    commit_hash: StringProperty()   # abbreviated, as displayed
+    full_hash: StringProperty()
+    parents: StringProperty()       # full hashes, space separated
+    author: StringProperty()
+    date: StringProperty()
+    refs: StringProperty()
+    subject: StringProperty()
+    graph: StringProperty()
 
-    def __update(self, context):
-        logline = self.logline
-        self.name = logline
-
-        c_hash = extract_hash(logline)
-        if c_hash:
-            self.commit_hash = c_hash
-
-    logline: StringProperty(update=__update)
-    commit_hash: StringProperty()
-
-    thumbnail: PointerProperty(type=bpy.types.ImageTexture)
 
 
 class GitContext(PropertyGroup):
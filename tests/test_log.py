@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import headless
+from benchmarks import import_addon_module, synth, verify
+
+
+# Commits of thumbnail notes (NotesStore) are not listed with the history.
+
+PARAMS = dict(files=300, commits=200, branches=4, stashes=2, blob_mb=1, ignored=10)
+
+
+class TestNotesExcluded(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        headless.install()
+        # Git changes to its rootdir
+        cls.cwd = os.getcwd()
+        cls.backend = import_addon_module("backend_git")
+        cls.store = import_addon_module("thumbnail_store")
+
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.rootdir = synth.generate(os.path.join(cls.tempdir.name, "repo"), PARAMS, log=lambda *_: None)
+        cls.history = set(cls.rev_list("--all"))
+
+        run = lambda *args: subprocess.run(["git", *args], cwd=cls.rootdir, env=synth.ENV, check=True,
+                                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        ref = f"--ref={cls.store.NotesStore.NOTES_REF}"
+        run("notes", ref, "add", "-m", "first", "HEAD")
+        run("notes", ref, "add", "-f", "-m", "second", "HEAD")
+        cls.notes = set(cls.rev_list("--all")) - cls.history
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.cwd)
+        cls.tempdir.cleanup()
+
+    @classmethod
+    def rev_list(cls, *args) -> '[commit_hash, ...]':
+        return subprocess.run(["git", "rev-list", *args], cwd=cls.rootdir, check=True,
+                              stdout=subprocess.PIPE).stdout.decode().split()
+
+    def test_notes_committed(self):
+        self.assertEqual(len(self.notes), 2)
+
+    def test_log(self):
+        git = self.backend.Git("", self.rootdir)
+        self.assertEqual({r.hash for r in git.log()}, self.history)
+
+        pager = git.log_pages("log --graph --oneline --all", size=100, graph_text=False)
+        hashes = set()
+        while not pager.done:
+            hashes.update(r.hash for r in pager.next_page())
+        self.assertEqual(hashes, self.history)
+
+    def test_walk(self):
+        git = self.backend.Git("", self.rootdir)
+        for use_odb in (True, False):
+            git.use_odb = use_odb
+            self.assertEqual(set(git.walk(self.backend.ALL_REFS)), self.history)
+
+    def test_collect_garbage(self):
+        git = self.backend.Git("", self.rootdir)
+        store = self.store.NotesStore(git)
+        self.assertEqual(self.store.collect_garbage(git, store), 0)
+        self.assertEqual(verify.check(os.path.join(self.rootdir, ".git"), log=lambda *_: None), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import synth, verify
+
+
+# Objects read in-process (backend_odb) against `git cat-file`, on a small
+# generated repository and on a bare clone of it (pack written by pack-objects).
+
+PARAMS = dict(files=300, commits=200, branches=4, stashes=2, blob_mb=1, ignored=10)
+
+
+class TestObjectDatabase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.rootdir = synth.generate(os.path.join(cls.tempdir.name, "repo"), PARAMS, log=lambda *_: None)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tempdir.cleanup()
+
+    def test_repository(self):
+        self.assertEqual(verify.check(os.path.join(self.rootdir, ".git"), log=lambda *_: None), [])
+
+    def test_bare_clone(self):
+        clone = os.path.join(self.tempdir.name, "clone.git")
+        subprocess.run(["git", "clone", "-q", "--bare", "--no-local", self.rootdir, clone], check=True)
+        self.assertEqual(verify.check(clone, log=lambda *_: None), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,266 @@
+import os
+import sqlite3
+import struct
+import subprocess
+import threading
+import zlib
+
+from collections import namedtuple
+
+from .backend_git import ALL_REFS, NOTES_GLOB
+
+
+# Thumbnails of commits packed into .git, instead of a PNG file per commit.
+# A thumbnail is kept at the sizes it is shown: LIST for rows of GIT_UL_log,
+# POPUP for GIT_OT_show. Pixels are RGBA 8-bit rows bottom up, as previews
+# take them, zlib compressed.
+#
+# DatabaseStore: SQLite database in .git.
+# NotesStore: git objects noted on commits under NOTES_REF, deduplicated and
+# pushed with `git push <remote> refs/notes/*`.
+
+
+# longest side in pixels
+LEVELS = {'LIST': 32, 'POPUP': 256}
+
+Thumb = namedtuple('Thumb', ('width', 'height', 'rgba'))
+
+THUMB_HEADER = struct.Struct(">HH")
+
+
+def fit(width, height, size) -> '(width, height): longest side size at most, never enlarged':
+    scale = min(size / max(width, height, 1), 1.0)
+    return max(round(width * scale), 1), max(round(height * scale), 1)
+
+
+def downscale(thumb, size) -> Thumb:
+    '''Nearest pixels of thumb fitting in size.'''
+    width, height = fit(thumb.width, thumb.height, size)
+    if (width, height) == (thumb.width, thumb.height):
+        return thumb
+    stride = thumb.width * 4
+    rgba = memoryview(thumb.rgba)
+    xs = [x * thumb.width // width * 4 for x in range(width)]
+    rows = []
+    for y in range(height):
+        start = y * thumb.height // height * stride
+        row = rgba[start:start + stride]
+        rows.append(b"".join(row[x:x + 4] for x in xs))
+    return Thumb(width, height, b"".join(rows))
+
+
+def levels_of(thumb) -> '{level: Thumb}':
+    levels = {}
+    for level, size in sorted(LEVELS.items(), key=lambda kv: -kv[1]):
+        # smaller levels from larger ones: fewer pixels to sample
+        thumb = levels[level] = downscale(thumb, size)
+    return levels
+
+
+def pack(thumb) -> bytes:
+    return THUMB_HEADER.pack(thumb.width, thumb.height) + zlib.compress(thumb.rgba, 6)
+
+
+def unpack(data) -> Thumb:
+    width, height = THUMB_HEADER.unpack_from(data)
+    return Thumb(width, height, zlib.decompress(data[THUMB_HEADER.size:]))
+
+
+class DatabaseStore:
+    '''
+    Packed thumbnails in .git/blendgit-thumbnails.db.
+    A connection is opened per call: workers read pages while the main thread writes.
+    '''
+
+    FILENAME = "blendgit-thumbnails.db"
+
+    def __init__(self, gitdir):
+        self.path = os.path.join(gitdir, self.FILENAME)
+        self.key = ('DATABASE', self.path)
+
+    def __connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.path, timeout=5.0)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS thumbnails ("
+            " commit_hash TEXT NOT NULL, level TEXT NOT NULL, data BLOB NOT NULL,"
+            " PRIMARY KEY (commit_hash, level)) WITHOUT ROWID"
+            )
+        return con
+
+    def get_many(self, hashes, level) -> '{commit_hash: packed thumb}':
+        hashes = list(hashes)
+        if not hashes or not os.path.isfile(self.path):
+            return {}
+        found = {}
+        con = self.__connect()
+        try:
+            # bound variables per statement are limited (999 before SQLite 3.32)
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i:i + 500]
+                found.update(con.execute(
+                    "SELECT commit_hash, data FROM thumbnails WHERE level = ? AND commit_hash IN "
+                    f"({','.join('?' * len(chunk))})",
+                    (level, *chunk)
+                    ))
+        finally:
+            con.close()
+        return found
+
+    def put(self, commit_hash, thumb):
+        con = self.__connect()
+        try:
+            with con:
+                con.executemany(
+                    "INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?)",
+                    [(commit_hash, level, pack(t)) for level, t in levels_of(thumb).items()]
+                    )
+        finally:
+            con.close()
+
+    def delete(self, hashes):
+        if not os.path.isfile(self.path):
+            return
+        con = self.__connect()
+        try:
+            with con:
+                con.executemany("DELETE FROM thumbnails WHERE commit_hash = ?", [(h,) for h in hashes])
+        finally:
+            con.close()
+
+    def commits(self) -> '{commit_hash, ...}':
+        if not os.path.isfile(self.path):
+            return set()
+        con = self.__connect()
+        try:
+            return {h for h, in con.execute("SELECT DISTINCT commit_hash FROM thumbnails")}
+        finally:
+            con.close()
+
+    def compact(self):
+        if not os.path.isfile(self.path):
+            return
+        con = self.__connect()
+        try:
+            con.execute("VACUUM")
+        finally:
+            con.close()
+
+
+class NotesStore:
+    '''
+    Packed thumbnails as notes of commits: one blob per commit holding all levels.
+    '''
+
+    NOTES_REF = "refs/notes/blendgit-thumbnails"
+
+    # note blob: MAGIC, then (level name length, level name, packed length, packed thumb) per level
+    MAGIC = b"BGTH1"
+    ENTRY = struct.Struct(">BI")
+
+    # notes are commits of NOTES_REF: writers of the same ref lose updates to each other
+    __write_lock = threading.Lock()
+
+    def __init__(self, git):
+        self.git = git
+        self.key = ('NOTES', git.cache.gitdir)
+
+    def __notes(self) -> '{commit_hash: blob_hash}':
+        # notes tree is fanned out into directories when large: "ab/cdef..."
+        # ls-tree is read-only, its output is cached until refs change
+        data = self.git.output(["ls-tree", "-r", "-z", self.NOTES_REF])
+        notes = {}
+        for entry in data.split(b"\0"):
+            meta, _, path = entry.partition(b"\t")
+            if path:
+                notes[path.decode().replace("/", "")] = meta.split()[2].decode()
+        return notes
+
+    @classmethod
+    def encode(cls, thumb) -> bytes:
+        chunks = [cls.MAGIC]
+        for level, t in levels_of(thumb).items():
+            name, data = level.encode(), pack(t)
+            chunks += [cls.ENTRY.pack(len(name), len(data)), name, data]
+        return b"".join(chunks)
+
+    @classmethod
+    def decode(cls, blob, level) -> 'packed thumb | None':
+        if not blob.startswith(cls.MAGIC):
+            return None
+        pos = len(cls.MAGIC)
+        while pos < len(blob):
+            name_len, data_len = cls.ENTRY.unpack_from(blob, pos)
+            pos += cls.ENTRY.size
+            name = blob[pos:pos + name_len].decode()
+            pos += name_len
+            if name == level:
+                return blob[pos:pos + data_len]
+            pos += data_len
+        return None
+
+    def get_many(self, hashes, level) -> '{commit_hash: packed thumb}':
+        notes = self.__notes()
+        found = {}
+        for h in hashes:
+            blob = notes.get(h)
+            if blob is None:
+                continue
+            obj = self.git.query('blob', lambda reader: reader.read(blob))
+            data = obj and self.decode(obj[2], level)
+            if data:
+                found[h] = data
+        return found
+
+    def __run(self, cmd, data=None) -> 'bytes: stdout':
+        # raises OSError when git fails
+        p = self.git.spawn(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        if p is None:
+            raise OSError("git is not available")
+        out, err = p.communicate(data)
+        if p.returncode != 0:
+            raise OSError(f"git {cmd[0]} failed: {err.decode(errors='replace').strip()}")
+        return out
+
+    def put(self, commit_hash, thumb):
+        blob = self.__run(["hash-object", "-w", "--stdin"], self.encode(thumb)).decode().strip()
+        with self.__write_lock:
+            # -C: note is the blob as is, not cleaned up as text
+            self.__run(["notes", f"--ref={self.NOTES_REF}", "add", "-f", "-C", blob, commit_hash])
+
+    def delete(self, hashes):
+        with self.__write_lock:
+            notes = self.__notes()
+            hashes = [h for h in hashes if h in notes]
+            if hashes:
+                self.__run(["notes", f"--ref={self.NOTES_REF}", "remove", "--ignore-missing", *hashes])
+
+    def commits(self) -> '{commit_hash, ...}':
+        return set(self.__notes())
+
+    def compact(self):
+        # replaced note blobs are loose objects until `git gc`
+        pass
+
+
+def get_store(git, mode='DATABASE') -> 'DatabaseStore | NotesStore | None: None out of repository':
+    if not git.cache.gitdir:
+        return None
+    if mode == 'NOTES':
+        return NotesStore(git)
+    return DatabaseStore(git.cache.gitdir)
+
+
+def collect_garbage(git, store) -> 'int | None: thumbnails removed, None if reachable commits are unknown':
+    '''Remove thumbnails of commits not reachable from refs or reflogs.'''
+    # reflogs of notes refs list notes commits: excluded as ancestors of notes refs
+    records = git.records(["rev-list", *ALL_REFS, "--reflog", "--not", f"--glob={NOTES_GLOB}"])
+    reachable = set(records)
+    if records.returncode != 0 or not reachable:
+        # failed rev-list would make every thumbnail unreachable
+        return None
+    unreachable = store.commits() - reachable
+    if unreachable:
+        store.delete(sorted(unreachable))
+    store.compact()
+    return len(unreachable)
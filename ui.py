@@ -1,8 +1,11 @@
 import bpy
 from bpy.types import Menu, UIList, Panel
 
-from .backend_git import Git
-from .image_util import get_icon
+from .backend_git import Git, objects
+from .image_util import get_icon, thumbnails
+from .blend_preview import renderer
+from .metrics import metrics, drawing
+from .ops_main import log_pages
 from . import common
 from .common import (
     alert,
@@ -62,9 +65,11 @@ class GIT_PT_context(GitPanel):
             alert(layout, "git.exe is NOT found")
 
     def draw(self, context):
+        metrics.redraw()
         self._draw(self.layout, context)
 
     @staticmethod
+    @drawing
     def _draw(layout, context):
         gcon = g(context)
 
@@ -98,6 +103,7 @@ class GIT_PT_init(GitPanel):
         self._draw(self.layout, context)
 
     @staticmethod
+    @drawing
     def _draw(layout, context):
         grid = layout.grid_flow(even_columns=True)
         grid.operator("git.load", text="Load Repository", icon='NEWFOLDER')
@@ -115,6 +121,7 @@ class GIT_PT_shortcut(GitPanel):
         self._draw(self.layout, context)
         
     @staticmethod
+    @drawing
     def _draw(layout, context):
         prefs = p(context)
         if len(prefs.shortcuts) == 0:
@@ -171,6 +178,7 @@ class GIT_PT_branch(GitPanel):
         self._draw(self.layout, context)
         
     @staticmethod
+    @drawing
     def _draw(layout, context):        
         gcon = g(context)
         if len(gcon.branches)>0:
@@ -304,6 +312,7 @@ class GIT_PT_file(GitPanel):
         self._draw(self.layout, context)
         
     @staticmethod
+    @drawing
     def _draw(layout, context):
         gcon = g(context)
 
@@ -337,6 +346,7 @@ class GIT_PT_stash(GitPanel):
         self._draw(self.layout, context)
         
     @staticmethod
+    @drawing
     def _draw(layout, context):
         gcon = g(context)
         if len(gcon.stashes)>0:
@@ -372,9 +382,22 @@ class GIT_UL_log(UIList):
         gcon = data
         log = item
 
-        col = layout.column()
-        for line in log.logline.split('\n'):
-            col.label(text=line)
+        icons = log_pages.graph_icons(index)
+        if icons is None:
+            col = layout.column()
+            for line in log.logline.split('\n'):
+                col.label(text=line)
+        else:
+            row = layout.row(align=True)
+            for icon in icons:
+                row.label(text="", icon_value=icon)
+            row.label(text=log.logline)
+
+        thumbnail = thumbnails.icon(log.full_hash)
+        if thumbnail:
+            layout.label(text="", icon_value=thumbnail)
+
+        log_pages.view(index, len(data.logs))
 
     def draw_filter(self, context, layout):
         row = layout.row()
@@ -387,6 +410,10 @@ class GIT_UL_log(UIList):
         prefs = p(context)
         subrow.prop_menu_enum(prefs, 'log_command', text="", icon='COLLAPSEMENU')
 
+        # search commits not loaded yet
+        if self.filter_name:
+            log_pages.request()
+
 
 
 class GIT_MT_log(Menu):
@@ -401,6 +428,12 @@ class GIT_MT_log(Menu):
         # layout.separator()
 
         layout.operator("git.thumbnail_edit", icon='IMAGE_REFERENCE')
+        if renderer.running:
+            done, total = renderer.progress
+            layout.operator("git.thumbnail_render", text=f"Cancel Thumbnails ({done}/{total})", icon='CANCEL').cancel = True
+        else:
+            layout.operator("git.thumbnail_render", icon='RENDER_STILL')
+        layout.operator("git.thumbnail_gc", icon='TRASH')
         layout.operator("git.checkout_file", icon='FILE_NEW')
         layout.operator("git.pick_library", icon='IMPORT')
         layout.separator()
@@ -416,6 +449,7 @@ class GIT_PT_log(GitPanel):
         self._draw(self.layout, context)
         
     @staticmethod
+    @drawing
     def _draw(layout, context):
         gcon = g(context)
         if len(gcon.logs)>0:
@@ -455,6 +489,67 @@ class GIT_PT_log(GitPanel):
 
 
 
+class GIT_PT_metrics(GitPanel):
+    bl_label = "Metrics"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    @classmethod
+    def poll(cls, context):
+        return p(context).show_metrics_panel
+
+    def draw_header(self, context):
+        self.layout.operator("git.metrics_reset", text="", icon='LOOP_BACK', emboss=False)
+
+    def draw(self, context):
+        self._draw(self.layout, context)
+
+    @staticmethod
+    def _draw_stats(layout, title, stats):
+        layout.label(text=title, translate=False)
+        if not stats:
+            layout.label(text="No calls.", translate=False)
+            return
+
+        col = layout.column(align=True)
+        for name, origin, stat in stats:
+            row = col.row(align=True)
+            split = row.split(factor=0.4, align=True)
+            split.label(text=name, translate=False)
+            split = split.split(factor=0.2, align=True)
+            split.label(text=origin, translate=False)
+            text = f"{stat.count}x  {stat.wall*1000:.0f}ms  avg {stat.wall*1000/stat.count:.1f}ms  {stat.nbytes/1024:.0f}KiB"
+            split.label(text=text, translate=False)
+            if stat.failures:
+                sub = row.row()
+                sub.alert = True
+                sub.label(text=f"{stat.failures} failed (last {stat.returncode})", translate=False)
+
+    @staticmethod
+    def _draw(layout, context):
+        col = layout.column(align=True)
+        col.label(text=f"Spawns: {metrics.spawns} (draw/poll: {metrics.passive_spawns})", translate=False)
+        last = metrics.spawns_per_redraw[-1] if metrics.spawns_per_redraw else 0
+        col.label(
+            text=f"Spawns per redraw: {last} (avg {metrics.average_spawns_per_redraw:.2f} / {metrics.redraws} redraws)",
+            translate=False
+            )
+
+        cache = Git.get(context).cache
+        col.label(text=f"Result cache: {cache.hits} hits / {cache.misses} misses", translate=False)
+        col.label(
+            text=f"Object cache: {len(objects)} entries / {objects.nbytes/2**20:.1f}MiB, {objects.hits} hits / {objects.misses} misses",
+            translate=False
+            )
+
+        layout.separator()
+        GIT_PT_metrics._draw_stats(layout, "Git Commands", metrics.top('git'))
+        layout.separator()
+        GIT_PT_metrics._draw_stats(layout, "Operators", metrics.top('op'))
+
+        layout.operator("git.metrics_reset", icon='LOOP_BACK')
+
+
+
 panels = (
     GIT_PT_context,
     GIT_PT_init,
@@ -462,7 +557,8 @@ panels = (
     GIT_PT_branch,
     GIT_PT_file,
     GIT_PT_stash,
-    GIT_PT_log
+    GIT_PT_log,
+    GIT_PT_metrics
     )
 
 classes = (
@@ -483,5 +579,7 @@ classes = (
 
     GIT_UL_log,
     GIT_MT_log,
-    GIT_PT_log
+    GIT_PT_log,
+
+    GIT_PT_metrics
     )
\ No newline at end of file
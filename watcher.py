@@ -0,0 +1,395 @@
+import os
+import sys
+import errno
+import select
+import socket
+import struct
+import hashlib
+import tempfile
+import threading
+import time
+import ctypes
+import ctypes.util
+
+
+# Worktree watcher (Linux inotify).
+#
+# Changed paths are kept with a sequence number. A token "blendgit:<session>:<seq>"
+# marks a point in time: changed_since(token) lists paths changed after it,
+# or None when everything has to be rescanned (unknown token, queue overflow,
+# watch limit exceeded). Tokens are served to git over a unix socket with
+# fsmonitor_hook.py, as `core.fsmonitor` hook (protocol version 2).
+
+
+# inotify(7)
+IN_MODIFY       = 0x00000002
+IN_ATTRIB       = 0x00000004
+IN_CLOSE_WRITE  = 0x00000008
+IN_MOVED_FROM   = 0x00000040
+IN_MOVED_TO     = 0x00000080
+IN_CREATE       = 0x00000100
+IN_DELETE       = 0x00000200
+IN_DELETE_SELF  = 0x00000400
+IN_MOVE_SELF    = 0x00000800
+IN_Q_OVERFLOW   = 0x00004000
+IN_IGNORED      = 0x00008000
+IN_ONLYDIR      = 0x01000000
+IN_EXCL_UNLINK  = 0x04000000
+IN_ISDIR        = 0x40000000
+
+IN_NONBLOCK     = 0o4000
+IN_CLOEXEC      = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+    | IN_ONLYDIR | IN_EXCL_UNLINK
+    )
+
+EVENT = struct.Struct("iIII")
+
+HOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fsmonitor_hook.py")
+
+
+def find_python() -> 'str: python interpreter running HOOK_PATH | ""':
+    '''
+    sys.executable is the Blender binary on Blender 2.83 - 2.90,
+    the bundled interpreter is bpy.app.binary_path_python there.
+    '''
+    if os.path.basename(sys.executable).startswith("python"):
+        return sys.executable
+    try:
+        import bpy
+        path = getattr(bpy.app, "binary_path_python", "")
+    except ImportError:
+        path = ""
+    if path and os.path.isfile(path):
+        return path
+    # bundled interpreter: <sys.prefix>/bin/python3.7m, ...
+    major, minor = sys.version_info[:2]
+    for name in (f"python{major}.{minor}", f"python{major}.{minor}m", f"python{major}"):
+        path = os.path.join(sys.prefix, "bin", name)
+        if os.path.isfile(path):
+            return path
+    return ""
+
+
+class Inotify:
+    _libc = None
+
+    @classmethod
+    def libc(cls) -> 'CDLL | None':
+        if cls._libc is None and sys.platform.startswith("linux"):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+                libc.inotify_init1.argtypes = [ctypes.c_int]
+                libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+                libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+                cls._libc = libc
+            except (OSError, AttributeError):
+                cls._libc = False
+        return cls._libc or None
+
+    @classmethod
+    def supported(cls) -> bool:
+        return cls.libc() is not None
+
+    def __init__(self):
+        self.fd = self.libc().inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, os.strerror(e))
+
+    def add_watch(self, path, mask=WATCH_MASK) -> 'int: watch descriptor':
+        wd = self.libc().inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, os.strerror(e), path)
+        return wd
+
+    def rm_watch(self, wd):
+        self.libc().inotify_rm_watch(self.fd, wd)
+
+    def read(self) -> '[(wd, mask, name), ...]':
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return events
+            pos = 0
+            while pos < len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, pos)
+                pos += EVENT.size
+                name = data[pos:pos + length].rstrip(b"\0")
+                pos += length
+                events.append((wd, mask, os.fsdecode(name)))
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class Watcher:
+    # changed paths kept before everything counts as changed
+    MAX_CHANGES = 100000
+
+    def __init__(self, rootdir):
+        self.rootdir = os.path.abspath(rootdir)
+        # reason of full scans, e.g. watch limit
+        self.failed = ""
+        self.ready = threading.Event()
+
+        self.__session = f"{os.getpid()}.{int(time.time() * 1000)}"
+        self.__seq = 0
+        # tokens before floor are not answered
+        self.__floor = 1
+        # {relative path (dirs end with "/"): seq}
+        self.__changes = {}
+        # {wd: relative dir path ("" or "dir/")}
+        self.__watches = {}
+
+        self.__lock = threading.RLock()
+        self.__inotify = None
+        self.__server = None
+        self.__wake = os.pipe()
+        self.__thread = None
+
+        key = hashlib.sha1(self.rootdir.encode('utf-8', 'surrogateescape')).hexdigest()[:12]
+        self.socket_path = os.path.join(tempfile.gettempdir(), f"blendgit-{key}-{os.getpid()}.sock")
+        # no interpreter: git scans the worktree itself
+        self.python = find_python()
+
+    @property
+    def running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive() and not self.failed
+
+    @property
+    def hook_command(self) -> 'str: value of core.fsmonitor | ""':
+        if not self.running or not self.ready.is_set() or not self.python:
+            return ""
+        return f'"{self.python}" "{HOOK_PATH}" "{self.socket_path}"'
+
+    def start(self):
+        self.__inotify = Inotify()
+        try:
+            os.remove(self.socket_path)
+        except OSError:
+            pass
+        self.__server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__server.bind(self.socket_path)
+        self.__server.listen(8)
+        self.__thread = threading.Thread(target=self.__run, name="blendgit-watcher", daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        if self.__thread is not None:
+            if self.__thread.is_alive():
+                os.write(self.__wake[1], b"x")
+            self.__thread.join()
+            self.__thread = None
+        self.__close()
+
+    def __close(self):
+        if self.__server is not None:
+            self.__server.close()
+            self.__server = None
+            try:
+                os.remove(self.socket_path)
+            except OSError:
+                pass
+        if self.__inotify is not None:
+            self.__inotify.close()
+            self.__inotify = None
+        for fd in self.__wake:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.__wake = (-1, -1)
+
+    # tokens
+
+    @property
+    def token(self) -> str:
+        with self.__lock:
+            return f"blendgit:{self.__session}:{self.__seq}"
+
+    def changed_since(self, token) -> '(token, [path, ...] | None: None to rescan everything)':
+        with self.__lock:
+            if self.running and self.ready.is_set():
+                self.__process(self.__inotify.read())
+            current = self.token
+            if not self.running or not self.ready.is_set() or not token:
+                return current, None
+
+            prefix, _, seq = token.rpartition(":")
+            if prefix != f"blendgit:{self.__session}" or not seq.isdigit() or int(seq) < self.__floor:
+                return current, None
+            seq = int(seq)
+            return current, sorted(p for p, s in self.__changes.items() if s > seq)
+
+    def __changed(self, path):
+        self.__changes[path] = self.__seq
+        if len(self.__changes) > self.MAX_CHANGES:
+            self.__reset()
+
+    def __reset(self):
+        # everything counts as changed for earlier tokens
+        self.__changes.clear()
+        self.__seq += 1
+        self.__floor = self.__seq
+
+    # watches
+
+    def __watch_tree(self, relpath) -> 'bool: watched completely':
+        # relpath: "" or "dir/"
+        stack = [relpath]
+        while stack:
+            rel = stack.pop()
+            path = os.path.join(self.rootdir, rel)
+            try:
+                wd = self.__inotify.add_watch(path)
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    self.failed = "inotify watch limit exceeded (fs.inotify.max_user_watches)"
+                    print(f"BlendGit: {self.failed}, falling back to full scans", file=sys.stderr)
+                    return False
+                # removed meanwhile
+                continue
+            self.__watches[wd] = rel
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False) and entry.name != ".git":
+                            stack.append(rel + entry.name + "/")
+            except OSError:
+                continue
+        return True
+
+    def __unwatch_tree(self, relpath):
+        for wd, rel in list(self.__watches.items()):
+            if rel.startswith(relpath):
+                self.__inotify.rm_watch(wd)
+                del self.__watches[wd]
+
+    def __process(self, events):
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                self.__reset()
+                continue
+            rel = self.__watches.get(wd)
+            if rel is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.__watches[wd]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                if rel:
+                    self.__seq += 1
+                    self.__changed(rel)
+                continue
+
+            self.__seq += 1
+            if mask & IN_ISDIR:
+                path = rel + name + "/"
+                if mask & IN_MOVED_FROM:
+                    self.__unwatch_tree(path)
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    if not self.__watch_tree(path):
+                        return
+            else:
+                path = rel + name
+            self.__changed(path)
+
+    # thread
+
+    def __run(self):
+        try:
+            with self.__lock:
+                ok = self.__watch_tree("")
+                # tokens before watches were complete are not answered
+                self.__reset()
+            if ok:
+                self.ready.set()
+            else:
+                return
+
+            fds = [self.__inotify.fd, self.__server, self.__wake[0]]
+            while not self.failed:
+                readable, _, _ = select.select(fds, [], [])
+                if self.__wake[0] in readable:
+                    return
+                if self.__inotify.fd in readable:
+                    with self.__lock:
+                        self.__process(self.__inotify.read())
+                if self.__server in readable:
+                    self.__answer()
+        except OSError as e:
+            self.failed = str(e)
+            print(f"BlendGit: watcher stopped: {e}", file=sys.stderr)
+        finally:
+            if self.failed:
+                # release watches
+                with self.__lock:
+                    self.__inotify.close()
+
+    def __answer(self):
+        # fsmonitor_hook.py: "<token>\n" -> "<new token>\0<path>\0..." ("/" for all)
+        conn, _ = self.__server.accept()
+        with conn:
+            conn.settimeout(1.0)
+            data = b""
+            while not data.endswith(b"\n"):
+                chunk = conn.recv(4096)
+                if not chunk:
+                    break
+                data += chunk
+            token, paths = self.changed_since(data.decode('utf-8', 'surrogateescape').strip())
+            if paths is None:
+                paths = ["/"]
+            conn.sendall(
+                b"\0".join(p.encode('utf-8', 'surrogateescape') for p in [token, *paths]) + b"\0"
+                )
+
+
+# {rootdir: Watcher}
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def watch(rootdir) -> 'Watcher | None: None if inotify is not available':
+    '''
+    Watcher of rootdir, started once. Watchers of other directories are stopped.
+    '''
+    if not rootdir or not Inotify.supported():
+        return None
+    key = os.path.abspath(rootdir)
+    with _watchers_lock:
+        for other in [k for k in _watchers if k != key]:
+            _watchers.pop(other).stop()
+        w = _watchers.get(key)
+        if w is None:
+            w = Watcher(key)
+            try:
+                w.start()
+            except OSError as e:
+                print(f"BlendGit: can not watch {key}: {e}", file=sys.stderr)
+                w.stop()
+                return None
+            _watchers[key] = w
+        return w
+
+
+def get(rootdir) -> 'Watcher | None: running watcher of rootdir':
+    with _watchers_lock:
+        w = _watchers.get(os.path.abspath(rootdir)) if rootdir else None
+    return w if w and w.running else None
+
+
+def shutdown():
+    with _watchers_lock:
+        for w in _watchers.values():
+            w.stop()
+        _watchers.clear()